@@ -0,0 +1,15 @@
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    """Admin endpoints need `Authorization: Bearer <ADMIN_API_TOKEN>`; without a token set they are off."""
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API disabled")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
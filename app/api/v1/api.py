@@ -1,8 +1,33 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import create_short, get_stats, redirect_short
+from app.api.v1.endpoints import (
+    create_short,
+    delete_links,
+    export_visits,
+    get_stats,
+    get_trending,
+    redirect_short,
+)
 
 api_router = APIRouter()
 
 api_router.include_router(create_short.router, tags=["shorten"])
+# Before get_stats, so /stats/top is not taken for a short code
+api_router.include_router(get_trending.router, tags=["stats"])
 api_router.include_router(get_stats.router, tags=["stats"])
+api_router.include_router(export_visits.router, tags=["stats"])
+api_router.include_router(delete_links.router, tags=["links"])
 api_router.include_router(redirect_short.router, tags=["redirect"])
+
+# The same routes as a flat table, for middleware that has to classify requests before routing
+api_routes = [
+    route
+    for module in (
+        create_short,
+        get_trending,
+        get_stats,
+        export_visits,
+        delete_links,
+        redirect_short,
+    )
+    for route in module.router.routes
+]
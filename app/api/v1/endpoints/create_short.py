@@ -10,5 +10,7 @@ router = APIRouter()
 @router.post("/shorten", response_model=ShortenResponse)
 async def create_short(payload: ShortenRequest, session: AsyncSession = Depends(get_db_dependency)):
     us = URLService(session)
-    url = await us.create_short(payload.url)
-    return ShortenResponse(short_code=url.short_code, short_url=f"/{url.short_code}")
+    url = await us.create_short(payload.url, expires_at=payload.expires_at)
+    return ShortenResponse(
+        short_code=url.short_code, short_url=f"/{url.short_code}", expires_at=url.expires_at
+    )
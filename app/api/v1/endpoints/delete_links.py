@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_admin
+from app.core.db import get_db_dependency
+from app.schemas import BulkDeleteRequest, BulkDeleteResponse
+from app.services import URLService
+
+router = APIRouter()
+
+
+@router.delete("/links", response_model=BulkDeleteResponse, dependencies=[Depends(require_admin)])
+async def delete_links(
+    payload: BulkDeleteRequest, session: AsyncSession = Depends(get_db_dependency)
+):
+    link_filter = payload.filter
+    removed = await URLService(session).remove_links(
+        codes=payload.codes,
+        original_url_prefix=link_filter.original_url_prefix if link_filter else None,
+        created_before=link_filter.created_before if link_filter else None,
+        deactivate_only=payload.mode == "deactivate",
+    )
+    return BulkDeleteResponse(affected=len(removed))
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import require_admin
+from app.core.db import get_db_dependency
+from app.services import URLService, VisitExportService
+from app.services.visit_export import CONTENT_TYPES
+
+router = APIRouter()
+
+
+# Raw visits carry visitor IPs, so exports are for admins only
+@router.get("/stats/{short_code}/visits/export", dependencies=[Depends(require_admin)])
+async def export_visits(
+    short_code: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    since: Optional[datetime] = Query(None, description="Visits at or after this time"),
+    until: Optional[datetime] = Query(None, description="Visits before this time"),
+    after: Optional[int] = Query(None, ge=0, description="Resume after this visit id"),
+    session: AsyncSession = Depends(get_db_dependency),
+):
+    url = await URLService(session).get_by_code(short_code)
+    if not url:
+        raise HTTPException(status_code=404, detail="Not found")
+    chunks = VisitExportService().stream(format, url.id, since=since, until=until, after=after)
+    return StreamingResponse(
+        chunks,
+        media_type=CONTENT_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{short_code}-visits.{format}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -1,21 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas import StatsResponse
 from app.core.db import get_db_dependency
-from app.services import URLService
+from app.services import StatsService
 
 router = APIRouter()
 
 
+def not_modified(
+    etag: str, modified: float, if_none_match: Optional[str], if_modified_since: Optional[str]
+) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins, If-Modified-Since is only read without it."""
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag in tags
+    if if_modified_since is not None:
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
 @router.get("/stats/{short_code}", response_model=StatsResponse)
-async def get_stats(short_code: str, session: AsyncSession = Depends(get_db_dependency)):
-    us = URLService(session)
-    url = await us.get_by_code(short_code)
-    if not url:
+async def get_stats(
+    short_code: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_db_dependency),
+):
+    # The session only connects if the cached stats have to be rebuilt
+    entry = await StatsService(session).get(short_code)
+    if not entry:
         raise HTTPException(status_code=404, detail="Not found")
-    return StatsResponse(
-        original_url=url.original_url,
-        short_code=url.short_code,
-        visits=url.visit_count,
-        created_at=url.created_at,
-    )
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": formatdate(entry.modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if not_modified(entry.etag, entry.modified, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return entry.stats
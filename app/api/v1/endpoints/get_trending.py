@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Query
+
+from app.core.config import settings
+from app.schemas import TrendingResponse
+from app.services import TrendingService
+
+router = APIRouter()
+
+
+@router.get("/stats/top", response_model=TrendingResponse)
+async def get_trending(
+    window: int = Query(15, ge=1, le=settings.TRENDING_MAX_WINDOW, description="Minutes"),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """The most visited links over the last `window` minutes, from the cache alone."""
+    leaders = await TrendingService().top(window, limit)
+    return TrendingResponse(window=window, links=[link._asdict() for link in leaders])
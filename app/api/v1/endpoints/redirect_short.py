@@ -1,14 +1,31 @@
+import time
 from starlette.responses import RedirectResponse
 from fastapi import APIRouter, HTTPException, Request, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
 from app.core.db import get_db_dependency
+from app.core.metrics import REDIRECT_TOTAL
 from app.services import URLService
-from app.decorators import log_visit
+from app.decorators import log_visit, observe_latency
 
 router = APIRouter()
 
 
+def redirect_cache_headers(max_age: int = settings.REDIRECT_CACHE_MAX_AGE) -> dict:
+    """
+    Let the edge proxy microcache the redirect (X-Accel-Expires) while forcing browsers
+    to come back to the edge, so every hit is still counted there.
+    """
+    if max_age <= 0:
+        return {"Cache-Control": "no-store", "X-Accel-Expires": "0"}
+    return {
+        "Cache-Control": f"public, max-age=0, s-maxage={max_age}",
+        "X-Accel-Expires": str(max_age),
+    }
+
+
 @router.get("/{short_code}")
+@observe_latency(REDIRECT_TOTAL)
 @log_visit("short_code")
 async def redirect_short(
     short_code: str,
@@ -16,7 +33,14 @@ async def redirect_short(
     session: AsyncSession = Depends(get_db_dependency),
 ):
     us = URLService(session)
-    url = await us.get_by_code(short_code)
-    if not url:
+    target = await us.resolve(short_code)
+    if not target:
         raise HTTPException(status_code=404, detail="Not found")
-    return RedirectResponse(url.original_url, status_code=307)
+    original_url, expires = target
+    headers = redirect_cache_headers()
+    if expires is not None:
+        # The edge must not keep serving the redirect past the link's expiry
+        headers = redirect_cache_headers(
+            min(settings.REDIRECT_CACHE_MAX_AGE, int(expires - time.time()))
+        )
+    return RedirectResponse(original_url, status_code=307, headers=headers)
@@ -1,14 +1,145 @@
 # app/core/redis.py
 import asyncio
+import fnmatch
+import heapq
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from redis import asyncio as aioredis
-from typing import Optional, List, Any
+from redis.client import NEVER_DECODE
+from typing import Optional, List, Any, Awaitable, Callable
 import logging
+from app.core.circuit_breaker import CircuitBreaker
 from app.core.config import settings
+from app.core.hll import HyperLogLog
+from app.core.metrics import Counter, Gauge
+from app.core.tracing import span
 
 logger = logging.getLogger("RedisClient")
 
+# Sliding-window counter: the previous fixed window weighted by how much of it still
+# overlaps the sliding one, plus the current window. `admitted` hits were already let
+# through locally and always count; one more is admitted only while under the limit.
+SLIDING_WINDOW_SCRIPT = """
+local limit, window = tonumber(ARGV[1]), tonumber(ARGV[2])
+local weight, admitted = tonumber(ARGV[3]), tonumber(ARGV[4])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0') + admitted
+local estimate = tonumber(redis.call('GET', KEYS[2]) or '0') * weight + current
+local allowed = 0
+if estimate < limit then
+    current = current + 1
+    estimate = estimate + 1
+    allowed = 1
+end
+if current > 0 then
+    redis.call('SET', KEYS[1], current, 'EX', window * 2)
+end
+return {allowed, math.floor(estimate)}
+"""
 
-class RedisClient:
+
+class CacheBackend(ABC):
+    """Interface shared by the Redis client and the in-process cache."""
+
+    async def connect(self):
+        pass
+
+    async def ensure_connection(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, expire: int = 3600) -> bool: ...
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1) -> int: ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def delete_many(self, keys: List[str]) -> int:
+        """Delete several keys in one round trip; returns how many existed."""
+
+    @abstractmethod
+    async def keys(self, pattern: str) -> List[str]: ...
+
+    @abstractmethod
+    async def get_and_delete(self, key: str) -> str: ...
+
+    @abstractmethod
+    async def ping(self) -> bool: ...
+
+    @abstractmethod
+    async def pfadd_many(
+        self, sketches: dict[str, list[str]], expire: Optional[int] = None
+    ) -> bool:
+        """Add values to several HyperLogLog keys at once, optionally (re)setting their TTL."""
+
+    @abstractmethod
+    async def pfcount(self, key: str) -> int: ...
+
+    @abstractmethod
+    async def pfmerge(self, dest: str, sources: List[str]) -> bool: ...
+
+    @abstractmethod
+    async def dump_sketch(self, key: str) -> Optional[bytes]:
+        """A HyperLogLog key's serialized registers, in this backend's own encoding."""
+
+    @abstractmethod
+    async def load_sketch(self, key: str, data: bytes, expire: Optional[int] = None) -> bool: ...
+
+    @abstractmethod
+    async def sliding_window(
+        self, key: str, previous_key: str, limit: int, window: int, weight: float, admitted: int = 0
+    ) -> Optional[tuple[bool, int]]:
+        """
+        Count `admitted` hits plus one more if the sliding-window estimate is under
+        `limit`, atomically. Returns whether it was admitted and the new estimate,
+        or None if nothing could be counted.
+        """
+
+    @abstractmethod
+    async def zincr_many(
+        self,
+        key: str,
+        increments: dict[str, int],
+        expire: Optional[int] = None,
+        max_members: Optional[int] = None,
+    ) -> bool:
+        """
+        Add to several members' scores in a sorted set in one round trip, optionally
+        (re)setting its TTL and trimming it to its `max_members` highest scores.
+        """
+
+    @abstractmethod
+    async def zunion_top(
+        self, dest: str, sources: List[str], limit: int, expire: int
+    ) -> List[tuple[str, float]]:
+        """Sum sorted sets into `dest` and return its `limit` highest members, highest first."""
+
+    def stats(self) -> dict:
+        return {}
+
+
+def _never_sent(error: BaseException) -> bool:
+    """Whether a failed Redis call is known not to have reached the server."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, ConnectionRefusedError):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class RedisClient(CacheBackend):
     def __init__(
         self,
         url: str,
@@ -17,6 +148,9 @@ class RedisClient:
         socket_timeout: int = 5,
         retry_attempts: int = 3,
         retry_delay: int = 1,
+        op_timeout: float = settings.REDIS_OP_TIMEOUT,
+        breaker: Optional[CircuitBreaker] = None,
+        max_pending_counters: int = settings.REDIS_MAX_PENDING_COUNTERS,
     ):
         self._url = url
         self._decode_responses = decode_responses
@@ -24,33 +158,57 @@ class RedisClient:
         self._socket_timeout = socket_timeout
         self._retry_attempts = retry_attempts
         self._retry_delay = retry_delay
+        self._op_timeout = op_timeout
         self._client: Optional[aioredis.Redis] = None
         self._connection_pool: Optional[aioredis.ConnectionPool] = None
         self._is_connected = False
 
+        self.breaker = breaker or CircuitBreaker(
+            "redis",
+            failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.REDIS_BREAKER_RECOVERY_TIMEOUT,
+        )
+        # Counter increments that could not reach Redis, replayed once it recovers
+        self._pending_counters: dict[str, int] = {}
+        self._max_pending_counters = max_pending_counters
+        self._pending_flush_task: Optional[asyncio.Task] = None
+        self._sliding_window = None
+        self.timeouts = 0
+        self.dropped_increments = 0
+        # Increments that timed out, so may or may not have been applied
+        self.unconfirmed_increments = 0
+
+    def _build_client(self):
+        """Create the connection pool; connections are opened lazily on first use."""
+        if not self._client:
+            self._connection_pool = aioredis.ConnectionPool.from_url(
+                self._url,
+                decode_responses=self._decode_responses,
+                socket_connect_timeout=self._connect_timeout,
+                socket_timeout=self._socket_timeout,
+                max_connections=10,
+                retry_on_timeout=True,
+            )
+            self._client = aioredis.Redis(connection_pool=self._connection_pool)
+            # Runs via EVALSHA, loading the script only when the server lacks it
+            self._sliding_window = self._client.register_script(SLIDING_WINDOW_SCRIPT)
+
     async def ensure_connection(self):
-        """Ensure Redis connection is established."""
-        if not self._is_connected or not self._client:
-            await self.connect()
+        """Ensure the Redis client exists without blocking on the network."""
+        if not self._client:
+            self._build_client()
 
     async def connect(self):
         """Initialize Redis connection with retry logic."""
         for attempt in range(self._retry_attempts):
             try:
-                if not self._client:
-                    self._connection_pool = aioredis.ConnectionPool.from_url(
-                        self._url,
-                        decode_responses=self._decode_responses,
-                        socket_connect_timeout=self._connect_timeout,
-                        socket_timeout=self._socket_timeout,
-                        max_connections=10,
-                        retry_on_timeout=True,
-                    )
-                    self._client = aioredis.Redis(connection_pool=self._connection_pool)
+                if not self._is_connected or not self._client:
+                    self._build_client()
                     await self._client.ping()  # Test connection
                     self._is_connected = True
+                    self.breaker.record_success()
                     logger.info("Redis connection established")
-                    return self._client
+                return self._client
             except Exception as e:
                 logger.warning(f"Redis connection attempt {attempt + 1} failed: {e}")
                 if attempt < self._retry_attempts - 1:
@@ -69,104 +227,468 @@ class RedisClient:
             self._connection_pool = None
         self._is_connected = False
 
-    async def get_and_delete(self, key: str) -> str:
-        """Atomically get and delete a key with error handling."""
+    async def _call(
+        self,
+        name: str,
+        operation: Callable[[], Awaitable[Any]],
+        default: Any,
+        attempts: int = 1,
+    ) -> Any:
+        """
+        Run a Redis operation behind the circuit breaker with a per-operation timeout.
+        Returns `default` immediately while the breaker is open.
+        """
         await self.ensure_connection()
-        for attempt in range(self._retry_attempts):
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                return default
             try:
-                script = """
-                local val = redis.call('GET', KEYS[1])
-                if val then
-                    redis.call('DEL', KEYS[1])
-                    return val
-                end
-                return 0
-                """
-                return await self._client.eval(script, 1, key)
+                result = await asyncio.wait_for(operation(), timeout=self._op_timeout)
+                self.breaker.record_success()
+                if self._pending_counters:
+                    self._schedule_pending_flush()
+                return result
             except Exception as e:
-                logger.warning(f"get_and_delete attempt {attempt + 1} failed: {e}")
-                if attempt < self._retry_attempts - 1:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                self.breaker.record_failure()
+                logger.warning(f"{name} attempt {attempt + 1} failed: {e!r}")
+                if attempt < attempts - 1:
                     await asyncio.sleep(self._retry_delay)
-                else:
-                    return "0"
+        return default
+
+    async def get_and_delete(self, key: str) -> str:
+        """Atomically get and delete a key with error handling."""
+        script = """
+        local val = redis.call('GET', KEYS[1])
+        if val then
+            redis.call('DEL', KEYS[1])
+            return val
+        end
+        return 0
+        """
+        return await self._call(
+            "get_and_delete",
+            lambda: self._client.eval(script, 1, key),
+            "0",
+            attempts=self._retry_attempts,
+        )
 
     async def keys(self, pattern: str) -> List[str]:
         """Get keys matching pattern with retry logic."""
-        await self.ensure_connection()
-        for attempt in range(self._retry_attempts):
-            try:
-                return await self._client.keys(pattern)
-            except Exception as e:
-                logger.warning(f"keys attempt {attempt + 1} failed: {e}")
-                if attempt < self._retry_attempts - 1:
-                    await asyncio.sleep(self._retry_delay)
-                else:
-                    return []
+        return await self._call(
+            "keys", lambda: self._client.keys(pattern), [], attempts=self._retry_attempts
+        )
 
-    # Add ensure_connection to all other methods...
     async def get(self, key: str) -> Optional[str]:
-        await self.ensure_connection()
-        for attempt in range(self._retry_attempts):
-            try:
-                return await self._client.get(key)
-            except Exception as e:
-                logger.warning(f"get attempt {attempt + 1} failed: {e}")
-                if attempt < self._retry_attempts - 1:
-                    await asyncio.sleep(self._retry_delay)
-                else:
-                    return None
+        with span("redis_get"):
+            return await self._call("get", lambda: self._client.get(key), None)
 
     async def set(self, key: str, value: str, expire: int = 3600) -> bool:
-        await self.ensure_connection()
-        for attempt in range(self._retry_attempts):
-            try:
-                return await self._client.set(key, value, ex=expire)
-            except Exception as e:
-                logger.warning(f"set attempt {attempt + 1} failed: {e}")
-                if attempt < self._retry_attempts - 1:
-                    await asyncio.sleep(self._retry_delay)
-                else:
-                    return False
+        return await self._call("set", lambda: self._client.set(key, value, ex=expire), False)
 
     async def incr(self, key: str, amount: int = 1) -> int:
+        """
+        Increments that never reached Redis (open breaker, refused connection) are
+        buffered and replayed. One that failed in flight may already have been
+        applied, so it is dropped and counted rather than risk counting a click twice.
+        """
         await self.ensure_connection()
-        for attempt in range(self._retry_attempts):
-            try:
-                return await self._client.incrby(key, amount)
-            except Exception as e:
-                logger.warning(f"incr attempt {attempt + 1} failed: {e}")
-                if attempt < self._retry_attempts - 1:
-                    await asyncio.sleep(self._retry_delay)
-                else:
-                    return 0
+        if not self.breaker.allow():
+            self._buffer_increment(key, amount)
+            return 0
+        try:
+            result = await asyncio.wait_for(
+                self._client.incrby(key, amount), timeout=self._op_timeout
+            )
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.warning(f"incr failed: {e!r}")
+            if _never_sent(e):
+                self._buffer_increment(key, amount)
+            else:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                self.unconfirmed_increments += amount
+            return 0
+        self.breaker.record_success()
+        if self._pending_counters:
+            self._schedule_pending_flush()
+        return result
 
     async def delete(self, key: str) -> bool:
         """Delete key with retry logic."""
-        for attempt in range(self._retry_attempts):
-            try:
-                result = await self._client.delete(key)
-                return result > 0
-            except Exception as e:
-                logger.warning(f"delete attempt {attempt + 1} failed: {e}")
-                if attempt < self._retry_attempts - 1:
-                    await asyncio.sleep(self._retry_delay)
-                else:
-                    return False
+        result = await self._call(
+            "delete", lambda: self._client.delete(key), 0, attempts=self._retry_attempts
+        )
+        return result > 0
+
+    async def delete_many(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        return await self._call(
+            "delete_many", lambda: self._client.delete(*keys), 0, attempts=self._retry_attempts
+        )
 
     async def ping(self) -> bool:
-        """Ping Redis server with retry logic."""
-        for attempt in range(self._retry_attempts):
-            try:
-                return await self._client.ping()
-            except Exception as e:
-                logger.warning(f"ping attempt {attempt + 1} failed: {e}")
-                if attempt < self._retry_attempts - 1:
-                    await asyncio.sleep(self._retry_delay)
-                else:
-                    return False
+        """Ping Redis server, bypassing the breaker so health checks see the real state."""
+        await self.ensure_connection()
+        try:
+            return await asyncio.wait_for(self._client.ping(), timeout=self._op_timeout)
+        except Exception as e:
+            logger.warning(f"ping failed: {e!r}")
+            return False
+
+    async def pfadd_many(
+        self, sketches: dict[str, list[str]], expire: Optional[int] = None
+    ) -> bool:
+        async def run():
+            pipe = self._client.pipeline(transaction=False)
+            for key, values in sketches.items():
+                pipe.pfadd(key, *values)
+                if expire:
+                    pipe.expire(key, expire)
+            return await pipe.execute()
+
+        return await self._call("pfadd_many", run, None) is not None
+
+    async def pfcount(self, key: str) -> int:
+        return await self._call("pfcount", lambda: self._client.pfcount(key), 0)
+
+    async def pfmerge(self, dest: str, sources: List[str]) -> bool:
+        return await self._call("pfmerge", lambda: self._client.pfmerge(dest, *sources), False)
+
+    async def dump_sketch(self, key: str) -> Optional[bytes]:
+        # HyperLogLogs are binary strings, which the decoding client would mangle
+        return await self._call(
+            "dump_sketch",
+            lambda: self._client.execute_command("GET", key, **{NEVER_DECODE: []}),
+            None,
+        )
+
+    async def load_sketch(self, key: str, data: bytes, expire: Optional[int] = None) -> bool:
+        return await self._call(
+            "load_sketch", lambda: self._client.set(key, data, ex=expire), False
+        )
+
+    async def sliding_window(
+        self, key: str, previous_key: str, limit: int, window: int, weight: float, admitted: int = 0
+    ) -> Optional[tuple[bool, int]]:
+        result = await self._call(
+            "sliding_window",
+            lambda: self._sliding_window(
+                keys=[key, previous_key], args=[limit, window, weight, admitted]
+            ),
+            None,
+        )
+        if result is None:
+            return None
+        allowed, estimate = result
+        return bool(allowed), int(estimate)
+
+    async def zincr_many(
+        self,
+        key: str,
+        increments: dict[str, int],
+        expire: Optional[int] = None,
+        max_members: Optional[int] = None,
+    ) -> bool:
+        async def run():
+            pipe = self._client.pipeline(transaction=False)
+            for member, amount in increments.items():
+                pipe.zincrby(key, amount, member)
+            if max_members:
+                pipe.zremrangebyrank(key, 0, -max_members - 1)
+            if expire:
+                pipe.expire(key, expire)
+            return await pipe.execute()
+
+        return await self._call("zincr_many", run, None) is not None
+
+    async def zunion_top(
+        self, dest: str, sources: List[str], limit: int, expire: int
+    ) -> List[tuple[str, float]]:
+        async def run():
+            pipe = self._client.pipeline(transaction=False)
+            pipe.zunionstore(dest, sources)
+            pipe.expire(dest, expire)
+            pipe.zrevrange(dest, 0, limit - 1, withscores=True)
+            return (await pipe.execute())[-1]
+
+        return await self._call("zunion_top", run, [])
+
+    def _buffer_increment(self, key: str, amount: int):
+        """Keep counter increments in memory while Redis is unavailable."""
+        if key not in self._pending_counters and (
+            len(self._pending_counters) >= self._max_pending_counters
+        ):
+            self.dropped_increments += amount
+            return
+        self._pending_counters[key] = self._pending_counters.get(key, 0) + amount
+
+    def _schedule_pending_flush(self):
+        if self._pending_flush_task is None or self._pending_flush_task.done():
+            self._pending_flush_task = asyncio.create_task(self.flush_pending_counters())
+
+    async def flush_pending_counters(self) -> int:
+        """Replay buffered counter increments to Redis in a single pipeline."""
+        if not self._pending_counters or not self.breaker.allow():
+            return 0
+        pending, self._pending_counters = self._pending_counters, {}
+
+        async def run():
+            pipe = self._client.pipeline(transaction=False)
+            for key, amount in pending.items():
+                pipe.incrby(key, amount)
+            return await pipe.execute()
+
+        try:
+            await asyncio.wait_for(run(), timeout=self._op_timeout * 4)
+            self.breaker.record_success()
+            logger.info(f"Replayed {len(pending)} buffered counters to Redis")
+            return len(pending)
+        except Exception as e:
+            self.breaker.record_failure()
+            logger.warning(f"Replaying buffered counters failed: {e!r}")
+            if not _never_sent(e):
+                # Part of the pipeline may have been applied; replaying it could double count
+                self.unconfirmed_increments += sum(pending.values())
+                return 0
+            for key, amount in pending.items():
+                self._buffer_increment(key, amount)
+            return 0
+
+    def stats(self) -> dict:
+        return {
+            **self.breaker.stats(),
+            "timeouts": self.timeouts,
+            "pending_counters": len(self._pending_counters),
+            "dropped_increments": self.dropped_increments,
+            "unconfirmed_increments": self.unconfirmed_increments,
+        }
 
     async def client(self) -> aioredis.Redis:
         return self._client
 
 
+class LocalCache:
+    """Small in-process LRU cache with per-entry TTL, used in front of Redis."""
+
+    def __init__(self, max_items: int = 10000, ttl: float = 30.0):
+        self._max_items = max_items
+        self._ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._data[key] = (time.monotonic() + (ttl or self._ttl), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self._max_items:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        return self._data.pop(key, None) is not None
+
+    def keys(self) -> List[str]:
+        now = time.monotonic()
+        return [key for key, (expires, _) in self._data.items() if expires >= now]
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process replacement for Redis on single-node deployments. Cached values live
+    in a bounded LRU; visit counters are kept apart so eviction never loses counts.
+    """
+
+    def __init__(self, max_items: int = 100_000):
+        self._values = LocalCache(max_items)
+        self._counters: dict[str, int] = {}
+        # Unique visitor sketches, also kept out of the LRU: key -> (expires, sketch)
+        self._sketches: dict[str, tuple[float, HyperLogLog]] = {}
+        # Sorted sets: key -> (expires, member -> score)
+        self._zsets: dict[str, tuple[float, dict[str, float]]] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        if key in self._counters:
+            return str(self._counters[key])
+        return self._values.get(key)
+
+    async def set(self, key: str, value: str, expire: int = 3600) -> bool:
+        self._values.set(key, value, ttl=expire)
+        return True
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        value = self._counters.get(key, 0) + amount
+        self._counters[key] = value
+        return value
+
+    async def delete(self, key: str) -> bool:
+        deleted = self._counters.pop(key, None) is not None
+        return self._values.delete(key) or deleted
+
+    async def delete_many(self, keys: List[str]) -> int:
+        return sum([await self.delete(key) for key in keys])
+
+    async def keys(self, pattern: str) -> List[str]:
+        return [
+            key
+            for key in [*self._counters, *self._values.keys()]
+            if fnmatch.fnmatchcase(key, pattern)
+        ]
+
+    async def get_and_delete(self, key: str) -> str:
+        if key in self._counters:
+            return str(self._counters.pop(key))
+        value = self._values.get(key)
+        self._values.delete(key)
+        return value if value is not None else "0"
+
+    async def ping(self) -> bool:
+        return True
+
+    def _sketch(self, key: str) -> Optional[HyperLogLog]:
+        item = self._sketches.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del self._sketches[key]
+            return None
+        return item[1]
+
+    def _store_sketch(self, key: str, sketch: HyperLogLog, expire: Optional[int]):
+        self._sketches[key] = (time.monotonic() + expire if expire else math.inf, sketch)
+
+    async def pfadd_many(
+        self, sketches: dict[str, list[str]], expire: Optional[int] = None
+    ) -> bool:
+        for key, values in sketches.items():
+            sketch = self._sketch(key) or HyperLogLog()
+            sketch.add(values)
+            if expire or key not in self._sketches:
+                self._store_sketch(key, sketch, expire)
+        return True
+
+    async def pfcount(self, key: str) -> int:
+        sketch = self._sketch(key)
+        return sketch.count() if sketch else 0
+
+    async def pfmerge(self, dest: str, sources: List[str]) -> bool:
+        merged = HyperLogLog(bytes(self._sketch(dest) or HyperLogLog()))
+        for key in sources:
+            if sketch := self._sketch(key):
+                merged.merge(sketch)
+        expires = self._sketches[dest][0] if dest in self._sketches else math.inf
+        self._sketches[dest] = (expires, merged)
+        return True
+
+    async def dump_sketch(self, key: str) -> Optional[bytes]:
+        sketch = self._sketch(key)
+        return bytes(sketch) if sketch else None
+
+    async def load_sketch(self, key: str, data: bytes, expire: Optional[int] = None) -> bool:
+        self._store_sketch(key, HyperLogLog(data), expire)
+        return True
+
+    async def sliding_window(
+        self, key: str, previous_key: str, limit: int, window: int, weight: float, admitted: int = 0
+    ) -> Optional[tuple[bool, int]]:
+        current = (self._values.get(key) or 0) + admitted
+        estimate = (self._values.get(previous_key) or 0) * weight + current
+        allowed = estimate < limit
+        if allowed:
+            current += 1
+            estimate += 1
+        if current > 0:
+            self._values.set(key, current, ttl=window * 2)
+        return allowed, int(estimate)
+
+    def _zset(self, key: str) -> dict[str, float]:
+        item = self._zsets.get(key)
+        if item is None or item[0] < time.monotonic():
+            self._zsets.pop(key, None)
+            return {}
+        return item[1]
+
+    @staticmethod
+    def _highest(scores: dict[str, float], count: int) -> List[tuple[str, float]]:
+        return heapq.nlargest(count, scores.items(), key=lambda item: item[1])
+
+    async def zincr_many(
+        self,
+        key: str,
+        increments: dict[str, int],
+        expire: Optional[int] = None,
+        max_members: Optional[int] = None,
+    ) -> bool:
+        scores = self._zset(key)
+        for member, amount in increments.items():
+            scores[member] = scores.get(member, 0) + amount
+        if max_members and len(scores) > max_members:
+            scores = dict(self._highest(scores, max_members))
+        expires = self._zsets[key][0] if key in self._zsets else math.inf
+        self._zsets[key] = (time.monotonic() + expire if expire else expires, scores)
+        return True
+
+    async def zunion_top(
+        self, dest: str, sources: List[str], limit: int, expire: int
+    ) -> List[tuple[str, float]]:
+        merged: dict[str, float] = {}
+        for key in sources:
+            for member, score in self._zset(key).items():
+                merged[member] = merged.get(member, 0) + score
+        self._zsets[dest] = (time.monotonic() + expire, merged)
+        return self._highest(merged, limit)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._values),
+            "counters": len(self._counters),
+            "sketches": len(self._sketches),
+            "sorted_sets": len(self._zsets),
+        }
+
+
 redis_client = RedisClient(settings.REDIS_URL)
+cache_client: CacheBackend = (
+    MemoryCache(settings.MEMORY_CACHE_MAX_ITEMS)
+    if settings.CACHE_BACKEND == "memory"
+    else redis_client
+)
+local_cache = LocalCache(settings.LOCAL_CACHE_MAX_ITEMS, settings.LOCAL_CACHE_TTL)
+
+Gauge("redis_circuit_open", "1 while the Redis circuit breaker is open").set_function(
+    lambda: float(redis_client.breaker.is_open)
+)
+Counter("redis_short_circuited", "Redis calls skipped by the open circuit").set_function(
+    lambda: redis_client.breaker.short_circuited
+)
+Counter("redis_timeouts", "Redis operations that hit the per-operation timeout").set_function(
+    lambda: redis_client.timeouts
+)
+Counter(
+    "redis_unconfirmed_increments",
+    "Counter increments dropped because a timeout left unknown whether Redis applied them",
+).set_function(lambda: redis_client.unconfirmed_increments)
+Gauge("redis_pending_counters", "Counter keys buffered locally while Redis is down").set_function(
+    lambda: len(redis_client._pending_counters)
+)
+Gauge("local_cache_entries", "Entries in the in-process short-code cache").set_function(
+    lambda: len(local_cache)
+)
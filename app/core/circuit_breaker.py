@@ -0,0 +1,89 @@
+import logging
+import time
+
+logger = logging.getLogger("CircuitBreaker")
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker guarding calls to a remote dependency."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 5.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        # Metrics
+        self.total_calls = 0
+        self.total_failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(self.HALF_OPEN)
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted right now."""
+        state = self.state
+        if state == self.CLOSED:
+            self.total_calls += 1
+            return True
+        if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            self.total_calls += 1
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self):
+        self._consecutive_failures = 0
+        if self._state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self.total_failures += 1
+        self._consecutive_failures += 1
+        if self._state == self.HALF_OPEN or (
+            self._state == self.CLOSED and self._consecutive_failures >= self.failure_threshold
+        ):
+            self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        previous, self._state = self._state, state
+        self._half_open_calls = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+        logger.warning(f"{self.name} circuit {previous} -> {state}")
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "total_calls": self.total_calls,
+            "total_failures": self.total_failures,
+            "short_circuited": self.short_circuited,
+            "times_opened": self.times_opened,
+        }
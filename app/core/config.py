@@ -1,4 +1,4 @@
-from typing import Optional, List
+from typing import Literal, Optional, List
 from dotenv import load_dotenv
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
@@ -21,6 +21,57 @@ class Settings(BaseSettings):
     REDIS_PORT: int = Field(default=6379, description="Redis port")
     REDIS_DB: int = Field(default=0, description="Redis database number")
     REDIS_PASSWORD: Optional[str] = Field(default=None, description="Redis password")
+    REDIS_OP_TIMEOUT: float = Field(
+        default=0.25, description="Per-operation Redis timeout in seconds"
+    )
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = Field(
+        default=5, description="Consecutive Redis failures before the circuit opens"
+    )
+    REDIS_BREAKER_RECOVERY_TIMEOUT: float = Field(
+        default=5.0, description="Seconds the Redis circuit stays open before a half-open probe"
+    )
+    REDIS_MAX_PENDING_COUNTERS: int = Field(
+        default=100_000, description="Max distinct counters buffered locally while Redis is down"
+    )
+
+    # In-process cache
+    LOCAL_CACHE_ENABLED: bool = Field(
+        default=False,
+        description="Keep resolved short codes in each process; other processes see "
+        "deletes, deactivations and new expiries up to LOCAL_CACHE_TTL late",
+    )
+    LOCAL_CACHE_MAX_ITEMS: int = Field(
+        default=10_000, description="Max entries in the in-process short-code cache"
+    )
+    LOCAL_CACHE_TTL: float = Field(
+        default=30.0, description="TTL in seconds for in-process short-code cache entries"
+    )
+
+    # Backends
+    CACHE_BACKEND: Literal["redis", "memory"] = Field(
+        default="redis", description="Shared cache and counters: Redis or in-process memory"
+    )
+    QUEUE_BACKEND: Literal["rabbitmq", "redis_streams", "memory"] = Field(
+        default="rabbitmq",
+        description="Visit transport: RabbitMQ, Redis Streams or an in-process asyncio queue",
+    )
+    MEMORY_CACHE_MAX_ITEMS: int = Field(
+        default=100_000, description="Max cached values held by the in-process cache backend"
+    )
+    MEMORY_QUEUE_MAX_SIZE: int = Field(
+        default=100_000, description="Messages the in-process queue holds before dropping"
+    )
+
+    # Redis Streams visit transport
+    VISIT_STREAM_MAXLEN: int = Field(
+        default=1_000_000, description="Approximate cap on entries kept in the visit stream"
+    )
+    VISIT_STREAM_GROUP: str = Field(
+        default="visit-workers", description="Consumer group the visit workers read through"
+    )
+    VISIT_STREAM_CLAIM_IDLE_MS: int = Field(
+        default=60_000, description="Idle time before an unacknowledged entry is reclaimed"
+    )
 
     # RabbitMQ
     RABBITMQ_URL: str = Field(
@@ -32,11 +83,154 @@ class Settings(BaseSettings):
     RABBITMQ_PASS: str = Field(default="guest", description="RabbitMQ Password")
 
     # API
+    ADMIN_API_TOKEN: Optional[str] = Field(
+        default=None,
+        description="Bearer token for admin endpoints such as DELETE /links (unset = off)",
+    )
     API_V1_STR: str = Field(default="/api/v1", description="API v1 prefix")
     PROJECT_NAME: str = Field(default="Shoraka URL-shortener API", description="Project name")
     VERSION: str = Field(default="1.0.0", description="API version")
     DESCRIPTION: str = Field(default="A URL-shortener API", description="API description")
 
+    # Health checks
+    HEALTH_PROBE_INTERVAL: float = Field(
+        default=5.0, description="Seconds between background dependency health probes"
+    )
+
+    # Edge cache (bundled nginx)
+    REDIRECT_CACHE_MAX_AGE: int = Field(
+        default=10, description="Seconds the edge proxy may serve a cached redirect (0 disables)"
+    )
+    EDGE_CACHE_PURGE_URL: Optional[str] = Field(
+        default=None, description="Base URL of the edge purge endpoint, e.g. http://proxy/purge"
+    )
+    EDGE_ACCESS_LOG_PATH: Optional[str] = Field(
+        default=None, description="nginx access log of edge cache hits shipped into visit logging"
+    )
+
+    # Workers
+    VISIT_WORKER_PROCESSES: int = Field(
+        default=0, ge=0, description="Visit consumer processes the worker manager runs (0 = cores)"
+    )
+
+    VISIT_BATCH_MIN_SIZE: int = Field(
+        default=50, ge=1, description="Smallest visit batch the adaptive policy uses"
+    )
+    VISIT_BATCH_MAX_SIZE: int = Field(
+        default=2000, ge=1, description="Largest visit batch the adaptive policy uses"
+    )
+    VISIT_BATCH_MIN_INTERVAL: float = Field(
+        default=0.05, description="Seconds a batch may wait to fill when the queue is empty"
+    )
+    VISIT_BATCH_MAX_INTERVAL: float = Field(
+        default=1.0, description="Seconds a batch may wait to fill under a full backlog"
+    )
+    VISIT_BATCH_TARGET_FLUSH_SECONDS: float = Field(
+        default=0.5, description="Flush latency the adaptive policy keeps batches under"
+    )
+    VISIT_QUEUE_DEPTH_INTERVAL: float = Field(
+        default=1.0, description="Seconds between queue depth samples taken by VisitWorker"
+    )
+
+    LINK_EXPIRY_SWEEP_INTERVAL: float = Field(
+        default=30.0, description="Seconds between LinkExpirySweeper passes"
+    )
+    LINK_EXPIRY_BATCH_SIZE: int = Field(
+        default=500, ge=1, description="Expired links deactivated per sweeper transaction"
+    )
+
+    # Visit outbox
+    VISIT_OUTBOX_DIR: Optional[str] = Field(
+        default="var/visit-outbox",
+        description="Directory for web processes' visit outboxes (empty publishes directly)",
+    )
+    VISIT_OUTBOX_SEGMENT_BYTES: int = Field(
+        default=8 * 1024 * 1024, description="Size of each memory-mapped outbox segment"
+    )
+    VISIT_OUTBOX_MAX_BYTES: int = Field(
+        default=256 * 1024 * 1024, description="Outbox size per web process before visits drop"
+    )
+
+    # Visit enrichment
+    GEOIP_DB_PATH: Optional[str] = Field(
+        default=None,
+        description="CSV of start_ip,end_ip,country,asn ranges used to geolocate visits",
+    )
+    GEOIP_RELOAD_INTERVAL: float = Field(
+        default=60.0, description="Seconds between checks of the GeoIP file for changes"
+    )
+
+    # Unique visitors
+    VISITOR_HASH_KEY: str = Field(
+        default="", description="Key for hashing visitor IPs before they enter the sketches"
+    )
+    UNIQUE_VISITORS_DAY_TTL: int = Field(
+        default=3 * 24 * 3600, description="Seconds a per-day visitor sketch stays in the cache"
+    )
+    UNIQUE_VISITORS_PERSIST_INTERVAL: float = Field(
+        default=60.0, description="Seconds between copies of touched day sketches to Postgres"
+    )
+
+    # Stats
+    STATS_CACHE_TTL: float = Field(
+        default=5.0, description="Seconds link stats are served from the cache before a rebuild"
+    )
+
+    # Trending links
+    TRENDING_MAX_WINDOW: int = Field(
+        default=60,
+        ge=1,
+        description="Longest leaderboard window in minutes, and how long minute buckets live",
+    )
+    TRENDING_MINUTE_MAX_MEMBERS: int = Field(
+        default=10_000, ge=1, description="Links kept per minute bucket; the rest are trimmed"
+    )
+
+    # Visit export
+    VISIT_EXPORT_CHUNK_SIZE: int = Field(
+        default=1000, ge=1, description="Rows fetched per server-side cursor round trip in exports"
+    )
+
+    # Visit archive
+    VISIT_ARCHIVE_URI: str = Field(
+        default="var/visit-archive",
+        description="Directory or object store URI (s3://bucket/prefix) for archived visits",
+    )
+    VISIT_ARCHIVE_AFTER_DAYS: int = Field(
+        default=365, ge=1, description="Age in days after which archive-visits moves visits out"
+    )
+    VISIT_ARCHIVE_BATCH_SIZE: int = Field(
+        default=50_000, ge=1, description="Visits read, written and deleted per archive batch"
+    )
+
+    # Visit spill
+    VISIT_SPILL_DIR: Optional[str] = Field(
+        default="var/visit-spill",
+        description="Directory for visit batches spilled while Postgres is down (empty disables)",
+    )
+    VISIT_SPILL_MAX_BYTES: int = Field(
+        default=1024 * 1024 * 1024, description="Disk the spill log may use per visit worker"
+    )
+    VISIT_SPILL_AFTER_FAILURES: int = Field(
+        default=3, ge=1, description="Consecutive failed commits before batches spill to disk"
+    )
+
+    # Metrics
+    WORKER_METRICS_PORT: int = Field(
+        default=9100, description="Port for the worker /metrics endpoint (0 disables)"
+    )
+
+    # Request tracing
+    SERVER_TIMING_ENABLED: bool = Field(
+        default=False, description="Add per-stage Server-Timing headers to responses"
+    )
+    TRACE_SAMPLE_RATE: float = Field(
+        default=0.0, ge=0.0, le=1.0, description="Fraction of requests exported as trace records"
+    )
+    TRACE_FILE: Optional[str] = Field(
+        default=None, description="JSON-lines file for sampled traces (defaults to the log)"
+    )
+
     # Env
     ENVIRONMENT: str = Field(
         default="development", description="Environment (development/staging/production)"
@@ -44,8 +238,20 @@ class Settings(BaseSettings):
     DEBUG: bool = Field(default=True, description="Debug mode")
 
     # Rate limiting
+    RATE_LIMIT_ENABLED: bool = Field(default=True, description="Limit API requests per client IP")
     RATE_LIMIT_REQUESTS: int = Field(default=100, description="Rate limit requests per minute")
     RATE_LIMIT_WINDOW: int = Field(default=60, description="Rate limit window in seconds")
+    RATE_LIMIT_ROUTES: dict[str, int] = Field(
+        default={"create_short": 20, "redirect_short": 600},
+        description="Requests per window by endpoint name, overriding RATE_LIMIT_REQUESTS (0 = off)",
+    )
+    TRUSTED_PROXIES: list[str] = Field(
+        default=["127.0.0.1/32", "::1/128"],
+        description="Addresses or networks whose X-Forwarded-For is believed for client IPs",
+    )
+    RATE_LIMIT_LOCAL_BATCH: int = Field(
+        default=10, ge=1, description="Requests a process admits locally before asking Redis"
+    )
 
     # Logging
     LOG_LEVEL: str = Field(default="INFO", description="Logging level")
@@ -74,6 +280,11 @@ class Settings(BaseSettings):
     def is_production(self) -> bool:
         return self.ENVIRONMENT.lower() == "production"
 
+    @property
+    def embedded_workers(self) -> bool:
+        """In-process backends are only visible to workers running in the web process."""
+        return self.CACHE_BACKEND == "memory" or self.QUEUE_BACKEND == "memory"
+
     @property
     def database_url_sync(self) -> str:
         return self.DATABASE_URL.replace("postgresql+asyncpg", "postgresql+psycopg")
@@ -1,13 +1,29 @@
 from contextlib import asynccontextmanager
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.tracing import span
 from sqlmodel import SQLModel
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class TracedPool(AsyncAdaptedQueuePool):
+    """
+    Times every connection checkout as the `db_checkout` span, including waits for a
+    free connection and opening new ones. Sessions check out lazily, on their first
+    statement, so a request that never queries never shows the span.
+    """
+
+    def connect(self):
+        with span("db_checkout"):
+            return super().connect()
+
 
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
     future=True,
+    poolclass=TracedPool,
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("EdgeCache")
+
+
+class EdgeCachePurger:
+    """Purges cached redirects from the bundled nginx (ngx_cache_purge) by short code."""
+
+    def __init__(
+        self, purge_url: Optional[str] = settings.EDGE_CACHE_PURGE_URL, timeout: float = 1.0
+    ):
+        self._purge_url = purge_url.rstrip("/") if purge_url else None
+        self._timeout = timeout
+        self._client = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._purge_url is not None
+
+    async def _get_client(self):
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=self._timeout)
+        return self._client
+
+    async def purge(self, *short_codes: str) -> int:
+        """Purge the given codes; returns how many were actually evicted at the edge."""
+        if not self.enabled or not short_codes:
+            return 0
+
+        client = await self._get_client()
+
+        async def purge_one(code: str) -> bool:
+            try:
+                resp = await client.request("PURGE", f"{self._purge_url}/{code}")
+                # 404 means nothing was cached for this code, which is fine
+                return resp.status_code == 200
+            except Exception as e:
+                logger.warning(f"Edge purge failed for {code}: {e!r}")
+                return False
+
+        results = await asyncio.gather(*(purge_one(code) for code in short_codes))
+        return sum(results)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+edge_purger = EdgeCachePurger()
@@ -0,0 +1,163 @@
+import asyncio
+import csv
+import ipaddress
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_right
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("GeoIP")
+
+Location = tuple[Optional[str], Optional[int]]  # (ISO country code, ASN)
+NO_LOCATION: Location = (None, None)
+MAX_ASN = 2**32 - 1
+
+
+class IPRangeIndex:
+    """
+    Non-overlapping IP ranges held in sorted parallel arrays: range starts and ends,
+    an index into the distinct country codes, and the ASN. IPv4 ranges use 32-bit
+    arrays; IPv6 ranges need Python ints and are kept in lists.
+    """
+
+    def __init__(self, rows: list[tuple[int, int, int, str, int]]):
+        # rows: (version, start, end, country, asn)
+        self.countries: list[str] = []
+        country_ids: dict[str, int] = {}
+        self.tables = {}
+        for version in (4, 6):
+            ranges = sorted(r[1:] for r in rows if r[0] == version)
+            numbers = (lambda: array("I")) if version == 4 else list
+            starts, ends, asns = numbers(), numbers(), array("I")
+            country_index = array("H")
+            for start, end, country, asn in ranges:
+                if starts and start <= ends[-1]:
+                    logger.warning(
+                        f"Skipping overlapping range starting at {start} in IPv{version}"
+                    )
+                    continue
+                starts.append(start)
+                ends.append(end)
+                if country not in country_ids:
+                    country_ids[country] = len(self.countries)
+                    self.countries.append(country)
+                country_index.append(country_ids[country])
+                asns.append(asn)
+            self.tables[version] = (starts, ends, country_index, asns)
+
+    def __len__(self) -> int:
+        return sum(len(table[0]) for table in self.tables.values())
+
+    @classmethod
+    def from_csv(cls, path: str) -> "IPRangeIndex":
+        """
+        Load `start_ip,end_ip,country,asn` rows; a header row is skipped. The country
+        must be a two-letter code or empty.
+        """
+        rows = []
+        with open(path, newline="") as f:
+            for line_no, record in enumerate(csv.reader(f), 1):
+                try:
+                    start, end = ipaddress.ip_address(record[0]), ipaddress.ip_address(record[1])
+                    country = record[2].strip().upper() if len(record) > 2 else ""
+                    # visit.country is varchar(2): one bad code would fail whole batches
+                    if country and not (
+                        len(country) == 2 and country.isascii() and country.isalpha()
+                    ):
+                        raise ValueError(country)
+                    asn = (
+                        int(record[3].strip().upper().removeprefix("AS") or 0)
+                        if len(record) > 3
+                        else 0
+                    )
+                    # ASNs are stored in an unsigned 32-bit array
+                    if not 0 <= asn <= MAX_ASN:
+                        raise ValueError(asn)
+                except (ValueError, IndexError):
+                    if line_no > 1:
+                        logger.warning(f"Skipping malformed GeoIP row {line_no} in {path}")
+                    continue
+                rows.append((start.version, int(start), int(end), country, asn))
+        return cls(rows)
+
+    def lookup(self, ip: Optional[str]) -> Location:
+        return self.lookup_many([ip])[0]
+
+    def lookup_many(self, ips: list[Optional[str]]) -> list[Location]:
+        """
+        Locate a batch of addresses. They are sorted once and matched against the
+        ranges in a single forward pass, each search starting where the last ended.
+        """
+        results = [NO_LOCATION] * len(ips)
+        parsed = []
+        for i, ip in enumerate(ips):
+            try:
+                address = ipaddress.ip_address(ip) if ip else None
+            except ValueError:
+                continue
+            if address is not None:
+                parsed.append((address.version, int(address), i))
+        parsed.sort()
+
+        lo, version = 0, None
+        for addr_version, value, i in parsed:
+            if addr_version != version:
+                version, lo = addr_version, 0
+                starts, ends, country_index, asns = self.tables[version]
+            pos = bisect_right(starts, value, lo) - 1
+            if pos >= 0:
+                lo = pos
+                if value <= ends[pos]:
+                    results[i] = (self.countries[country_index[pos]] or None, asns[pos] or None)
+        return results
+
+
+class GeoIPResolver:
+    """
+    The current IPRangeIndex for `path`, rebuilt in a thread when the file changes
+    and swapped in as one reference, so lookups never see a half-loaded index.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = settings.GEOIP_DB_PATH,
+        check_interval: float = settings.GEOIP_RELOAD_INTERVAL,
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        self.index: Optional[IPRangeIndex] = None
+        self._version: Optional[tuple[int, int]] = None
+        self._next_check = 0.0
+
+    async def refresh(self):
+        """Reload the index if the file changed; checks at most once per interval."""
+        if not self.path or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + self.check_interval
+        try:
+            st = os.stat(self.path)
+        except OSError as e:
+            if self.index is None:
+                logger.warning(
+                    f"GeoIP database {self.path} unavailable, visits are not enriched: {e}"
+                )
+            return
+        version = (st.st_mtime_ns, st.st_size)
+        if version == self._version:
+            return
+        # Visit batches call this before writing: a bad file must never fail them
+        try:
+            index = await asyncio.to_thread(IPRangeIndex.from_csv, self.path)
+        except Exception as e:
+            logger.error(f"Could not load GeoIP database {self.path}, keeping the last one: {e!r}")
+            return
+        self.index, self._version = index, version
+        logger.info(f"Loaded {len(index)} IP ranges from {self.path}")
+
+    def lookup_many(self, ips: list[Optional[str]]) -> list[Location]:
+        index = self.index
+        return index.lookup_many(ips) if index is not None else [NO_LOCATION] * len(ips)
@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import logging
+from typing import Optional
+
+from sqlmodel import text
+
+from app.core.cache import cache_client, redis_client
+from app.core.config import settings
+from app.core.db import engine
+from app.core.queue import queue_client, rabbitmq_client
+from app.schemas import HealthCheck
+
+logger = logging.getLogger("HealthProber")
+
+PROBE_TIMEOUT = 2.0
+WARMUP_TIMEOUT = 10.0
+CACHE_WARM_CONNECTIONS = 4
+
+HEALTHY_STATUSES = ("connected", "in-process", "not used")
+
+
+async def warm_up():
+    """Open and prime the DB pool, cache pool and queue channel before serving traffic."""
+
+    async def database():
+        async def touch():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        # Concurrent checkouts make the pool open its connections now, not on first requests
+        size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+        await asyncio.gather(*(touch() for _ in range(size)))
+
+    async def cache():
+        await cache_client.connect()
+        await asyncio.gather(*(cache_client.ping() for _ in range(CACHE_WARM_CONNECTIONS)))
+
+    async def queue():
+        await queue_client.connect()
+
+    steps = {"database": database, "cache": cache, "queue": queue}
+    results = await asyncio.gather(
+        *(asyncio.wait_for(step(), WARMUP_TIMEOUT) for step in steps.values()),
+        return_exceptions=True,
+    )
+    for name, result in zip(steps, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"Warm-up of {name} failed: {result!r}")
+
+
+class HealthProber:
+    """
+    Probes the dependencies on an interval so health endpoints answer from the last
+    snapshot instead of opening connections on every load balancer check.
+    """
+
+    def __init__(self, interval: float = settings.HEALTH_PROBE_INTERVAL):
+        self.interval = interval
+        self.snapshot: Optional[HealthCheck] = None
+        self.warmed_up = False
+        self.running = True
+
+    async def start(self):
+        while self.running:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Health probe failed: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    @property
+    def ready(self) -> bool:
+        """Warmed up and able to reach Postgres; Redis and the broker have fallbacks."""
+        return (
+            self.warmed_up and self.snapshot is not None and self.snapshot.database == "connected"
+        )
+
+    async def probe(self) -> HealthCheck:
+        db_status, redis_status, rabbitmq_status = await asyncio.gather(
+            self._probe(self._database), self._probe(self._redis), self._probe(self._rabbitmq)
+        )
+        healthy = db_status == "connected" and {redis_status, rabbitmq_status} <= set(
+            HEALTHY_STATUSES
+        )
+        self.snapshot = HealthCheck(
+            status="healthy" if healthy else "degraded",
+            timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            version=settings.VERSION,
+            environment=settings.ENVIRONMENT,
+            database=db_status,
+            redis=redis_status,
+            rabbitmq=rabbitmq_status,
+            redis_circuit=cache_client.stats(),
+        )
+        return self.snapshot
+
+    @staticmethod
+    async def _probe(check) -> str:
+        try:
+            return await asyncio.wait_for(check(), PROBE_TIMEOUT)
+        except Exception as e:
+            return f"error: {str(e) or type(e).__name__}"
+
+    @staticmethod
+    async def _database() -> str:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return "connected"
+
+    @staticmethod
+    async def _redis() -> str:
+        if settings.CACHE_BACKEND == "memory":
+            return "in-process"
+        return "connected" if await redis_client.ping() else "disconnected"
+
+    @staticmethod
+    async def _rabbitmq() -> str:
+        if settings.QUEUE_BACKEND == "memory":
+            return "in-process"
+        if settings.QUEUE_BACKEND == "redis_streams":
+            return "not used"
+        connection = rabbitmq_client._connection
+        if connection is None:
+            await rabbitmq_client.connect(max_retries=1)
+            connection = rabbitmq_client._connection
+        return "connected" if connection and not connection.is_closed else "disconnected"
+
+    def stop(self):
+        self.running = False
+
+
+health_prober = HealthProber()
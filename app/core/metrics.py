@@ -0,0 +1,354 @@
+"""
+Minimal Prometheus instrumentation.
+
+Metrics are updated from the event loop only, so recording is a plain attribute
+increment (no locks) and histogram buckets are allocated once at creation time.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+logger = logging.getLogger("Metrics")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)  # fmt: skip
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# (suffix, labels, value)
+Sample = tuple[str, dict[str, str], float]
+# (name, type, help, samples)
+Family = tuple[str, str, str, list[Sample]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric"):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def collect(self) -> list[Family]:
+        return [
+            (m.name, m.type, m.documentation, m.collect_samples()) for m in self._metrics.values()
+        ]
+
+    def render(self) -> str:
+        return render(self.collect())
+
+
+REGISTRY = Registry()
+
+
+class _Child:
+    __slots__ = ("value", "_function")
+
+    def __init__(self):
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the value lazily at scrape time."""
+        self._function = function
+
+    def get(self) -> float:
+        return self._function() if self._function else self.value
+
+
+class _HistogramChild:
+    __slots__ = ("_upper_bounds", "_counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Sequence[float]):
+        self._upper_bounds = upper_bounds
+        self._counts = [0] * (len(upper_bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self._counts[bisect_left(self._upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        total, result = 0, []
+        for bound, count in zip((*self._upper_bounds, math.inf), self._counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class _Timer:
+    """Context manager observing the elapsed time into a histogram."""
+
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        return _Child()
+
+    def labels(self, **labels: str):
+        """Return (and cache) the child for a label set; bind it once at import time."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _label_dict(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def collect_samples(self) -> list[Sample]:
+        return [("", self._label_dict(key), child.get()) for key, child in self._children.items()]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def collect_samples(self) -> list[Sample]:
+        return [("_total", labels, value) for _, labels, value in super().collect_samples()]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: Optional[Registry] = REGISTRY,
+    ):
+        self._upper_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self._upper_bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def collect_samples(self) -> list[Sample]:
+        samples: list[Sample] = []
+        for key, child in self._children.items():
+            labels = self._label_dict(key)
+            for bound, count in child.cumulative():
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                samples.append(("_bucket", {**labels, "le": le}, count))
+            samples.append(("_sum", labels, child.sum))
+            samples.append(("_count", labels, child.count))
+        return samples
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(families: Iterable[Family]) -> str:
+    """Render metric families in the Prometheus text exposition format."""
+    lines = []
+    for name, metric_type, documentation, samples in families:
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for suffix, labels, value in samples:
+            lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def merge_families(snapshots: dict[str, list[Family]], label: str = "worker") -> list[Family]:
+    """Combine families collected in several processes, tagging samples with their source."""
+    merged: dict[str, Family] = {}
+    for source, families in snapshots.items():
+        for name, metric_type, documentation, samples in families:
+            family = merged.setdefault(name, (name, metric_type, documentation, []))
+            family[3].extend(
+                (suffix, {label: source, **labels}, value) for suffix, labels, value in samples
+            )
+    return list(merged.values())
+
+
+async def start_metrics_server(
+    host: str,
+    port: int,
+    registry: Registry = REGISTRY,
+    health: Optional[Callable[[], dict[str, Any]]] = None,
+) -> asyncio.AbstractServer:
+    """
+    Serve GET /metrics from processes that don't run the web app (workers), and
+    GET /health when a `health` callable is given (503 unless it reports healthy).
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?")[0] if len(parts) >= 2 and parts[0] == "GET" else None
+            if path == "/metrics":
+                status, content_type, body = "200 OK", CONTENT_TYPE, registry.render().encode()
+            elif path == "/health" and health:
+                report = health()
+                status = (
+                    "200 OK" if report.get("status") == "healthy" else "503 Service Unavailable"
+                )
+                content_type, body = "application/json", json.dumps(report).encode()
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"Not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.warning(f"Metrics request failed: {e!r}")
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Metrics server listening on {host}:{port}")
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+REDIRECT_STAGE_SECONDS = Histogram(
+    "redirect_stage_seconds",
+    "Time spent in each stage of the redirect handler",
+    labelnames=("stage",),
+)
+REDIRECT_CACHE_LOOKUP = REDIRECT_STAGE_SECONDS.labels(stage="cache_lookup")
+REDIRECT_DB_FALLBACK = REDIRECT_STAGE_SECONDS.labels(stage="db_fallback")
+REDIRECT_VISIT_PUBLISH = REDIRECT_STAGE_SECONDS.labels(stage="visit_publish")
+REDIRECT_TOTAL = REDIRECT_STAGE_SECONDS.labels(stage="total")
+
+SHORTEN_COLLISION_RETRIES = Counter(
+    "shorten_collision_retries", "Short code collisions retried by /shorten"
+)
+
+VISIT_WORKER_BATCH_SIZE = Histogram(
+    "visit_worker_batch_size", "Visits per VisitWorker flush", buckets=SIZE_BUCKETS
+)
+VISIT_WORKER_FLUSH_SECONDS = Histogram(
+    "visit_worker_flush_seconds", "Duration of VisitWorker flushes"
+)
+VISIT_WORKER_IN_FLIGHT = Gauge(
+    "visit_worker_in_flight", "Visits in the batch VisitWorker is writing, not yet acknowledged"
+)
+VISIT_WORKER_SPILLED = Counter(
+    "visit_worker_spilled", "Visits spilled to the local segment log while Postgres was failing"
+)
+VISIT_WORKER_SPILL_BYTES = Gauge(
+    "visit_worker_spill_bytes", "Spilled visit bytes not yet replayed into Postgres"
+)
+VISIT_WORKER_BATCH_TARGET = Gauge(
+    "visit_worker_batch_target", "Batch size currently chosen by the adaptive batch policy"
+)
+VISIT_WORKER_BATCH_INTERVAL = Gauge(
+    "visit_worker_batch_interval_seconds", "Batch fill interval chosen by the adaptive policy"
+)
+VISIT_WORKER_QUEUE_DEPTH = Gauge(
+    "visit_worker_queue_depth", "Visits waiting on the queue, as last sampled by VisitWorker"
+)
+VISIT_WORKER_VISITS_WRITTEN = Counter(
+    "visit_worker_visits_written", "Visit rows committed by VisitWorker"
+)
+
+COUNTER_SYNC_CYCLE_SECONDS = Histogram(
+    "counter_sync_cycle_seconds", "Duration of CounterSyncWorker flush cycles"
+)
+COUNTER_SYNC_KEYS_DRAINED = Counter(
+    "counter_sync_keys_drained", "visits:* keys drained from Redis by CounterSyncWorker"
+)
@@ -0,0 +1,233 @@
+import fcntl
+import logging
+import mmap
+import os
+import shutil
+import uuid
+import zlib
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import Counter
+from app.core.segment_log import HEADER, Position
+
+logger = logging.getLogger("Outbox")
+
+LOCK_FILE = "lock"
+CURSOR_FILE = "cursor"
+SEGMENT_SUFFIX = ".seg"
+
+OUTBOX_DROPPED = Counter("visit_outbox_dropped", "Visit events dropped because the outbox was full")
+
+
+class Outbox:
+    """
+    Append-only log of encoded events in memory-mapped, preallocated segment files.
+
+    `append` is a memcpy into the mapping, so the redirect path never waits on the
+    broker or the disk. The payload is written before its header, and a zero header
+    marks the end of the data, so a crash mid-append leaves nothing half-readable.
+    Data survives a process crash (it is in the page cache); `sync` flushes it to
+    disk. Each process owns one outbox directory, held with an flock; directories
+    whose lock is free belong to dead processes and can be adopted with `open`.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int, max_bytes: int):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_bytes = max_bytes
+        self.segments: list[int] = []
+        self.cursor: Position = (0, 0)
+        self.end: Position = (0, 0)  # where the next record is written
+        self._maps: dict[int, mmap.mmap] = {}
+        self._lock_fd: Optional[int] = None
+
+    @classmethod
+    def create(cls, root: str, segment_bytes: int, max_bytes: int) -> "Outbox":
+        """A fresh outbox for this process under `root`."""
+        outbox = cls(
+            os.path.join(root, f"{os.getpid()}-{uuid.uuid4().hex[:8]}"), segment_bytes, max_bytes
+        )
+        os.makedirs(outbox.directory)
+        outbox._lock()
+        outbox.segments = [0]
+        outbox._map(0)
+        return outbox
+
+    @classmethod
+    def open(cls, directory: str) -> Optional["Outbox"]:
+        """Adopt the outbox of a dead process; None if its owner still holds it."""
+        outbox = cls(directory, 0, 0)
+        try:
+            outbox._lock()
+        except BlockingIOError:
+            return None
+        outbox.segments = sorted(
+            int(name[: -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+        outbox.cursor = outbox._load_cursor()
+        if outbox.segments:
+            outbox.segment_bytes = os.path.getsize(outbox._path(outbox.segments[0]))
+            outbox.end = (outbox.segments[-1], outbox.segment_bytes)
+        return outbox
+
+    @staticmethod
+    def orphans(root: str, exclude: Optional[str] = None) -> list[str]:
+        """Outbox directories under `root` other than `exclude`."""
+        try:
+            names = os.listdir(root)
+        except FileNotFoundError:
+            return []
+        return [
+            path
+            for path in (os.path.join(root, name) for name in sorted(names))
+            if path != exclude and os.path.isdir(path)
+        ]
+
+    def _lock(self):
+        fd = os.open(os.path.join(self.directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            raise
+        self._lock_fd = fd
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:010d}{SEGMENT_SUFFIX}")
+
+    def _map(self, segment: int) -> mmap.mmap:
+        if segment not in self._maps:
+            path = self._path(segment)
+            with open(path, "a+b") as f:
+                if os.fstat(f.fileno()).st_size < self.segment_bytes:
+                    f.truncate(self.segment_bytes)  # sparse; zero-filled on read
+                self._maps[segment] = mmap.mmap(f.fileno(), self.segment_bytes)
+        return self._maps[segment]
+
+    def append(self, record: bytes) -> bool:
+        """Append one record; False (and the record is dropped) when the outbox is full."""
+        size = HEADER.size + len(record)
+        segment, offset = self.end
+        if offset + size > self.segment_bytes:
+            if (
+                size > self.segment_bytes
+                or (len(self.segments) + 1) * self.segment_bytes > self.max_bytes
+            ):
+                OUTBOX_DROPPED.inc()
+                return False
+            segment, offset = segment + 1, 0
+            self.segments.append(segment)
+        buf = self._map(segment)
+        buf[offset + HEADER.size : offset + size] = record
+        buf[offset : offset + HEADER.size] = HEADER.pack(len(record), zlib.crc32(record))
+        self.end = (segment, offset + size)
+        return True
+
+    def read(self, max_records: int) -> tuple[list[bytes], Position]:
+        """Up to `max_records` records after the cursor, and the position following them."""
+        records: list[bytes] = []
+        segment, offset = self.cursor
+        for current in [s for s in self.segments if s >= segment]:
+            if current != segment:
+                segment, offset = current, 0
+            buf = self._map(segment)
+            while len(records) < max_records and offset + HEADER.size <= self.segment_bytes:
+                length, crc = HEADER.unpack_from(buf, offset)
+                if length == 0:
+                    break
+                payload = buf[offset + HEADER.size : offset + HEADER.size + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    logger.error(
+                        f"Corrupt record at {self._path(segment)}:{offset}, skipping segment"
+                    )
+                    break
+                records.append(payload)
+                offset += HEADER.size + length
+            if len(records) >= max_records:
+                break
+        return records, (segment, offset)
+
+    def commit(self, position: Position):
+        """Persist the read cursor and release segments that are fully shipped."""
+        self.cursor = position
+        tmp_path = os.path.join(self.directory, f"{CURSOR_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(f"{position[0]} {position[1]}")
+        os.replace(tmp_path, os.path.join(self.directory, CURSOR_FILE))
+        for segment in [s for s in self.segments if s < position[0]]:
+            buf = self._maps.pop(segment, None)
+            if buf is not None:
+                buf.close()
+            os.remove(self._path(segment))
+            self.segments.remove(segment)
+
+    def _load_cursor(self) -> Position:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                segment, offset = f.read().split()
+                return int(segment), int(offset)
+        except (FileNotFoundError, ValueError):
+            return (self.segments[0], 0) if self.segments else (0, 0)
+
+    def backlog(self) -> int:
+        """Approximate bytes not yet shipped."""
+        (cursor_segment, cursor_offset), (end_segment, end_offset) = self.cursor, self.end
+        return (end_segment - cursor_segment) * self.segment_bytes + end_offset - cursor_offset
+
+    def sync(self):
+        """Flush the mapped segments to disk."""
+        for buf in self._maps.values():
+            buf.flush()
+
+    def close(self):
+        for buf in self._maps.values():
+            buf.close()
+        self._maps.clear()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def remove(self):
+        """Delete a fully shipped outbox directory."""
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class VisitOutbox:
+    """This process's outbox for visit events; a no-op until `open` is called."""
+
+    def __init__(self, root: Optional[str] = settings.VISIT_OUTBOX_DIR):
+        self.root = root
+        self.outbox: Optional[Outbox] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.outbox is not None
+
+    def open(self):
+        if self.root and self.outbox is None:
+            self.outbox = Outbox.create(
+                self.root,
+                settings.VISIT_OUTBOX_SEGMENT_BYTES,
+                settings.VISIT_OUTBOX_MAX_BYTES,
+            )
+            logger.info(f"Visit outbox at {self.outbox.directory}")
+
+    def append(self, record: bytes) -> bool:
+        return self.outbox.append(record)
+
+    def close(self):
+        """Close the outbox, leaving anything unshipped for the next process to adopt."""
+        if self.outbox is not None:
+            if self.outbox.backlog() == 0:
+                self.outbox.remove()
+            else:
+                self.outbox.sync()
+                self.outbox.close()
+            self.outbox = None
+
+
+visit_outbox = VisitOutbox()
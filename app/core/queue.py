@@ -1,18 +1,122 @@
 import asyncio
 import logging
+import os
+import socket
+import time
 import aio_pika
 import json
+from abc import ABC, abstractmethod
 from typing import Optional, Callable, Awaitable, Any
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
 from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.core.tracing import span
 
 logger = logging.getLogger("RabbitMQ Client")
 
+# Batches a consumer may hold unacknowledged; bounds worker memory via prefetch
+PREFETCH_BATCHES = 2
+RETRY_BACKOFF_MAX = 30.0
+CLOSE_TIMEOUT = 10.0
 
-class RabbitMQClient:
+_CLOSED = object()  # sentinel that ends a consumer loop
+
+BatchHandler = Callable[[list[bytes]], Awaitable[None]]
+
+
+class BatchLimits:
+    """
+    Batch size and fill interval for `consume_batches`. Consumers read them before
+    every batch, so a subclass may retune them from the hooks below while consuming,
+    with `batch_size` never above `max_batch_size`.
+    """
+
+    def __init__(
+        self, batch_size: int = 200, interval: float = 1.0, max_batch_size: Optional[int] = None
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_batch_size = max_batch_size or batch_size
+
+    def observe_depth(self, depth: Optional[int]):
+        """Called with the number of messages waiting on the queue."""
+
+    def record_flush(self, rows: int, seconds: float):
+        """Called after a batch has been handled."""
+
+
+async def collect_batch(source: asyncio.Queue, batch_size: int, block: float) -> tuple[list, bool]:
+    """
+    Wait for one item, then keep taking items until `batch_size` is reached or
+    `block` seconds have passed. Returns the batch and whether the queue was closed.
+    """
+    item = await source.get()
+    if item is _CLOSED:
+        return [], True
+    batch = [item]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + block
+    while len(batch) < batch_size:
+        try:
+            item = source.get_nowait()
+        except asyncio.QueueEmpty:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(source.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+        if item is _CLOSED:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+def retry_delay(failures: int) -> float:
+    return min(2.0**failures, RETRY_BACKOFF_MAX)
+
+
+class QueueBackend(ABC):
+    """Interface shared by the visit transports (RabbitMQ, Redis Streams, in-process)."""
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def drain(self, timeout: float = 5.0):
+        """Wait for queued messages to be handled; a no-op for durable brokers."""
+
+    @abstractmethod
+    async def publish(self, queue_name: str, message: dict): ...
+
+    @abstractmethod
+    async def consume(self, queue_name: str, handler: Callable[[Any], Awaitable[None]]): ...
+
+    @abstractmethod
+    async def consume_batches(self, queue_name: str, handler: BatchHandler, limits: BatchLimits):
+        """
+        Deliver up to `limits.batch_size` message bodies per `handler` call, waiting at
+        most `limits.interval` seconds to fill a batch. Messages count as handled only
+        once `handler` returns; if it raises, the batch is delivered again later.
+        """
+
+    async def depth(self, queue_name: str) -> Optional[int]:
+        """Messages waiting to be consumed, if the transport can tell cheaply."""
+        return None
+
+
+class RabbitMQClient(QueueBackend):
     def __init__(self, url: str = settings.RABBITMQ_URL):
         self._url = url
         self._connection: Optional[aio_pika.RobustConnection] = None
         self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        # Passive declares for depth() run here: a 404 closes the channel it ran on
+        self._depth_channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._batch_consumers: list[tuple[asyncio.Queue, asyncio.Event]] = []
 
     async def connect(self, max_retries: int = 3, retry_delay: int = 5):
         """Connect to RabbitMQ with retry logic."""
@@ -32,21 +136,30 @@ class RabbitMQClient:
                     raise e
 
     async def close(self):
-        """Close RabbitMQ connection."""
+        """Let batch consumers settle the batch in hand, then close the connection."""
+        for deliveries, _ in self._batch_consumers:
+            deliveries.put_nowait(_CLOSED)
+        if self._batch_consumers:
+            waiters = [asyncio.create_task(done.wait()) for _, done in self._batch_consumers]
+            _, pending = await asyncio.wait(waiters, timeout=CLOSE_TIMEOUT)
+            for waiter in pending:
+                waiter.cancel()
         if self._connection:
             await self._connection.close()
             self._connection = None
             self._channel = None
+            self._depth_channel = None
 
     async def publish(self, queue_name: str, message: dict):
         """Publish message to queue."""
         assert self._channel, "RabbitMQ channel not initialized. Call connect() first."
         body = json.dumps(message, default=str).encode()
-        queue = await self._channel.declare_queue(queue_name, durable=True)
-        await self._channel.default_exchange.publish(
-            aio_pika.Message(body=body),
-            routing_key=queue.name,
-        )
+        with span("amqp_publish"):
+            queue = await self._channel.declare_queue(queue_name, durable=True)
+            await self._channel.default_exchange.publish(
+                aio_pika.Message(body=body),
+                routing_key=queue.name,
+            )
 
     async def consume(self, queue_name: str, handler: Callable[[Any], Awaitable[None]]):
         """Consume messages from queue."""
@@ -62,5 +175,350 @@ class RabbitMQClient:
                     except Exception as e:
                         logger.error(f"Error processing message: {e}")
 
+    async def consume_batches(self, queue_name: str, handler: BatchHandler, limits: BatchLimits):
+        """
+        Hold delivery tags until `handler` has committed the batch, then ack them all
+        with one `multiple=True` ack. A failed batch is nacked back onto the queue
+        after a backoff. Prefetch is sized to the largest batch, so at most
+        `PREFETCH_BATCHES` of those are ever unacknowledged in this consumer.
+        """
+        assert self._channel, "RabbitMQ channel not initialized. Call connect() first."
+        # Set once: the broker keeps a running consumer on the prefetch it started with,
+        # so batches could never grow past it
+        await self._channel.set_qos(prefetch_count=limits.max_batch_size * PREFETCH_BATCHES)
+        queue = await self._channel.declare_queue(queue_name, durable=True)
+
+        deliveries: asyncio.Queue = asyncio.Queue()
+        done = asyncio.Event()
+        self._batch_consumers.append((deliveries, done))
+        consumer_tag = await queue.consume(deliveries.put)
+        failures = 0
+        try:
+            while True:
+                batch, closed = await collect_batch(deliveries, limits.batch_size, limits.interval)
+                if batch:
+                    failures = await self._settle(queue_name, batch, handler, failures)
+                if closed:
+                    return
+        finally:
+            done.set()
+            self._batch_consumers.remove((deliveries, done))
+            try:
+                await queue.cancel(consumer_tag)
+            except Exception as e:
+                logger.debug(f"Cancelling consumer on {queue_name} failed: {e!r}")
+
+    async def depth(self, queue_name: str) -> Optional[int]:
+        """Ready (not yet delivered) messages, from a passive queue declare."""
+        if not self._connection:
+            return None
+        if self._depth_channel is None or self._depth_channel.is_closed:
+            self._depth_channel = await self._connection.channel()
+        queue = await self._depth_channel.declare_queue(queue_name, passive=True)
+        return queue.declaration_result.message_count
+
+    async def _settle(
+        self,
+        queue_name: str,
+        batch: list[aio_pika.abc.AbstractIncomingMessage],
+        handler: BatchHandler,
+        failures: int,
+    ) -> int:
+        """Run `handler` on a batch and ack or requeue it; returns the failure streak."""
+        last = batch[-1]  # messages arrive in delivery-tag order on this channel
+        try:
+            await handler([message.body for message in batch])
+        except Exception as e:
+            failures += 1
+            delay = retry_delay(failures)
+            logger.error(
+                f"Batch of {len(batch)} from {queue_name} failed, requeueing in {delay:.0f}s: {e}"
+            )
+            await asyncio.sleep(delay)
+            try:
+                await last.nack(multiple=True, requeue=True)
+            except Exception as nack_error:
+                logger.warning(f"Nack failed, broker will redeliver: {nack_error!r}")
+            return failures
+
+        try:
+            await last.ack(multiple=True)
+        except Exception as e:
+            # The channel was lost after commit; the broker redelivers, so expect duplicates
+            logger.warning(f"Ack of {len(batch)} committed messages failed: {e!r}")
+        return 0
+
+
+class InProcessQueue(QueueBackend):
+    """
+    asyncio queues feeding workers in the same process, for single-node deployments.
+    Messages are dropped (and counted) once a queue holds `max_size` items, so a
+    stalled consumer never blocks the request path.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        self._max_size = max_size
+        self._queues: dict[str, asyncio.Queue] = {}
+        self.dropped = 0
+
+    def _queue(self, queue_name: str) -> asyncio.Queue:
+        queue = self._queues.get(queue_name)
+        if queue is None:
+            # Unbounded so close() can always enqueue its sentinel; publish enforces the limit
+            queue = self._queues[queue_name] = asyncio.Queue()
+        return queue
+
+    async def publish(self, queue_name: str, message: dict):
+        queue = self._queue(queue_name)
+        if queue.qsize() >= self._max_size:
+            self.dropped += 1
+            logger.warning(f"In-process queue {queue_name} full, dropping message")
+            return
+        queue.put_nowait(json.dumps(message, default=str).encode())
+
+    async def consume(self, queue_name: str, handler: Callable[[Any], Awaitable[None]]):
+        """Consume messages until the queue is closed."""
+        queue = self._queue(queue_name)
+        while True:
+            body = await queue.get()
+            try:
+                if body is _CLOSED:
+                    return
+                await handler(body)
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+            finally:
+                queue.task_done()
+
+    async def consume_batches(self, queue_name: str, handler: BatchHandler, limits: BatchLimits):
+        """Failed batches are retried in place; there is no broker to requeue them to."""
+        queue = self._queue(queue_name)
+        while True:
+            batch, closed = await collect_batch(queue, limits.batch_size, limits.interval)
+            failures = 0
+            while batch:
+                try:
+                    await handler(batch)
+                    break
+                except Exception as e:
+                    failures += 1
+                    delay = retry_delay(failures)
+                    logger.error(f"Batch of {len(batch)} failed, retrying in {delay:.0f}s: {e}")
+                    await asyncio.sleep(delay)
+            for _ in range(len(batch) + closed):
+                queue.task_done()
+            if closed:
+                return
+
+    async def drain(self, timeout: float = 5.0):
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues.values())), timeout
+            )
+        except asyncio.TimeoutError:
+            pending = sum(queue.qsize() for queue in self._queues.values())
+            logger.warning(f"In-process queues not drained after {timeout}s, {pending} left")
+
+    async def close(self):
+        """Stop consumers once they reach the messages queued so far."""
+        for queue in self._queues.values():
+            queue.put_nowait(_CLOSED)
+
+    def qsize(self, queue_name: str) -> int:
+        return self._queue(queue_name).qsize()
+
+    async def depth(self, queue_name: str) -> Optional[int]:
+        return self.qsize(queue_name)
+
+
+class RedisStreamsQueue(QueueBackend):
+    """
+    Visit transport over Redis Streams for deployments that already run Redis.
+
+    Each queue is the stream `stream:{queue_name}`, capped with an approximate
+    MAXLEN. Workers read through a consumer group and acknowledge entries only
+    after the batch handler returns, so a batch whose DB commit fails stays
+    pending: its consumer retries it after a backoff, and if that consumer is gone,
+    another one reclaims it with XAUTOCLAIM once it has been idle long enough.
+    """
+
+    def __init__(
+        self,
+        url: str = settings.REDIS_URL,
+        group: str = settings.VISIT_STREAM_GROUP,
+        maxlen: int = settings.VISIT_STREAM_MAXLEN,
+        claim_idle_ms: int = settings.VISIT_STREAM_CLAIM_IDLE_MS,
+        op_timeout: float = settings.REDIS_OP_TIMEOUT,
+    ):
+        self._url = url
+        self._group = group
+        self._maxlen = maxlen
+        self._claim_idle_ms = claim_idle_ms
+        self._op_timeout = op_timeout
+        self._consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._client: Optional[aioredis.Redis] = None
+        self._claim_cursors: dict[str, str] = {}
+        self._closed = False
+
+    @staticmethod
+    def stream_key(queue_name: str) -> str:
+        return f"stream:{queue_name}"
+
+    async def connect(self):
+        if not self._client:
+            self._client = aioredis.from_url(self._url, decode_responses=False)
+            self._closed = False
+        return self._client
+
+    async def close(self):
+        self._closed = True
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    async def publish(self, queue_name: str, message: dict):
+        """Append a message to the stream, trimming it to roughly `maxlen` entries."""
+        assert self._client, "Redis stream client not initialized. Call connect() first."
+        body = json.dumps(message, default=str).encode()
+        with span("stream_publish"):
+            await asyncio.wait_for(
+                self._client.xadd(
+                    self.stream_key(queue_name),
+                    {"body": body},
+                    maxlen=self._maxlen,
+                    approximate=True,
+                ),
+                timeout=self._op_timeout,
+            )
+
+    async def _ensure_group(self, stream: str):
+        try:
+            await self._client.xgroup_create(stream, self._group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _claim_stale(self, stream: str, count: int) -> list:
+        """Take over entries another consumer read but never acknowledged."""
+        cursor = self._claim_cursors.get(stream, "0-0")
+        response = await self._client.xautoclaim(
+            stream, self._group, self._consumer, self._claim_idle_ms, start_id=cursor, count=count
+        )
+        self._claim_cursors[stream] = response[0]
+        return response[1]
+
+    async def depth(self, queue_name: str) -> Optional[int]:
+        """Entries not yet delivered to the consumer group (XINFO GROUPS lag, Redis 7+)."""
+        if not self._client:
+            return None
+        for group in await self._client.xinfo_groups(self.stream_key(queue_name)):
+            name = group["name"]
+            if (name.decode() if isinstance(name, bytes) else name) == self._group:
+                return group.get("lag")
+        return None
+
+    async def _read(self, stream: str, last_id: str, count: int, block: Optional[int] = None):
+        response = await self._client.xreadgroup(
+            self._group, self._consumer, {stream: last_id}, count=count, block=block
+        )
+        return response[0][1] if response else []
+
+    async def _process(self, stream: str, entries: list, handler: BatchHandler) -> bool:
+        """Handle entries and XACK them; False if the handler failed, leaving them pending."""
+        # Entries trimmed by MAXLEN while pending come back without fields; drop them
+        trimmed = [entry_id for entry_id, fields in entries if not fields]
+        if trimmed:
+            await self._client.xack(stream, self._group, *trimmed)
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if not entries:
+            return True
+        try:
+            await handler([fields[b"body"] for _, fields in entries])
+        except Exception as e:
+            logger.error(f"Batch of {len(entries)} from {stream} failed, left pending: {e}")
+            return False
+        await self._client.xack(stream, self._group, *(entry_id for entry_id, _ in entries))
+        return True
+
+    async def consume_batches(
+        self,
+        queue_name: str,
+        handler: BatchHandler,
+        limits: BatchLimits,
+    ):
+        """
+        Read through the consumer group; entries are XACKed after `handler` returns.
+        After a failed batch this consumer backs off, then retries its own pending
+        entries (read from id 0) before it takes new ones.
+        """
+        await self.connect()
+        stream = self.stream_key(queue_name)
+        await self._ensure_group(stream)
+        claim_interval = self._claim_idle_ms / 1000 / 2
+        last_claim = 0.0
+        failures = 0
+        own_pending = True  # left over from a previous run under the same consumer name
+
+        while not self._closed:
+            try:
+                entries = []
+                if own_pending:
+                    entries = await self._read(stream, "0", limits.batch_size)
+                    own_pending = bool(entries)
+                if not entries and time.monotonic() - last_claim >= claim_interval:
+                    last_claim = time.monotonic()
+                    entries = await self._claim_stale(stream, limits.batch_size)
+                    if entries:
+                        logger.info(f"Reclaimed {len(entries)} stale entries from {stream}")
+                if not entries:
+                    entries = await self._read(
+                        stream, ">", limits.batch_size, block=max(int(limits.interval * 1000), 1)
+                    )
+                if not entries:
+                    continue
+                if await self._process(stream, entries, handler):
+                    failures = 0
+                else:
+                    # The batch is now pending on this consumer
+                    failures += 1
+                    own_pending = True
+                    await asyncio.sleep(retry_delay(failures))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._closed:
+                    break
+                if isinstance(e, ResponseError) and "NOGROUP" in str(e):
+                    # The stream was deleted under us; recreate it with the group
+                    await self._ensure_group(stream)
+                    continue
+                logger.error(f"Reading {stream} failed: {e!r}")
+                await asyncio.sleep(1)
+
+    async def consume(self, queue_name: str, handler: Callable[[Any], Awaitable[None]]):
+        """Consume messages one at a time (each batch is acked once all are handled)."""
+
+        async def handle_each(bodies: list[bytes]):
+            for body in bodies:
+                try:
+                    await handler(body)
+                except Exception as e:
+                    logger.error(f"Error processing message: {e}")
+
+        await self.consume_batches(queue_name, handle_each, BatchLimits(batch_size=10))
+
 
 rabbitmq_client = RabbitMQClient()
+if settings.QUEUE_BACKEND == "memory":
+    queue_client: QueueBackend = InProcessQueue(settings.MEMORY_QUEUE_MAX_SIZE)
+elif settings.QUEUE_BACKEND == "redis_streams":
+    queue_client = RedisStreamsQueue()
+else:
+    queue_client = rabbitmq_client
+
+Gauge("inprocess_queue_depth", "Visits waiting in the in-process queue").set_function(
+    lambda: queue_client.qsize("visits") if isinstance(queue_client, InProcessQueue) else 0
+)
+Counter("inprocess_queue_dropped", "Messages dropped by the full in-process queue").set_function(
+    lambda: getattr(queue_client, "dropped", 0)
+)
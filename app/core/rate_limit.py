@@ -0,0 +1,94 @@
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.cache import CacheBackend, LocalCache, cache_client
+from app.core.config import settings
+from app.core.metrics import Counter
+
+# A client is "clearly under" its limit below this share of it and skips the backend
+LOCAL_HEADROOM = 0.5
+LOCAL_MAX_CLIENTS = 100_000
+
+RATE_LIMITED = Counter(
+    "rate_limited_requests", "Requests refused with 429 by the rate limiter", labelnames=("route",)
+)
+
+
+@dataclass
+class _Tally:
+    window_id: int
+    estimate: int = 0  # the backend's estimate as of the last round trip
+    pending: int = 0  # admitted locally, not yet counted in the backend
+    blocked_until: float = 0.0
+
+
+class RateLimiter:
+    """
+    Sliding-window request limits per route and client, counted atomically in the
+    cache backend so they hold across web processes.
+
+    Each process keeps a tally per client: while the last known estimate plus local
+    admissions stays under half the limit, requests are admitted without a round
+    trip and reported in the next one, at most `local_batch` later. Refused clients
+    are refused locally until their window has moved on.
+    """
+
+    def __init__(
+        self,
+        cache: CacheBackend = cache_client,
+        window: int = settings.RATE_LIMIT_WINDOW,
+        local_batch: int = settings.RATE_LIMIT_LOCAL_BATCH,
+    ):
+        self.cache = cache
+        self.window = window
+        self.local_batch = local_batch
+        self._tallies = LocalCache(LOCAL_MAX_CLIENTS, ttl=window * 2)
+
+    async def check(self, route: str, client: str, limit: int) -> Optional[float]:
+        """None if the request may proceed, else the seconds until the client may retry."""
+        now = time.time()
+        window_id, elapsed = divmod(now, self.window)
+        window_id = int(window_id)
+        key = f"rl:{route}:{client}"
+
+        tally = self._tallies.get(key)
+        if tally is None or tally.window_id != window_id:
+            tally = _Tally(window_id, blocked_until=tally.blocked_until if tally else 0.0)
+            self._tallies.set(key, tally)
+        if tally.blocked_until > now:
+            return tally.blocked_until - now
+
+        if (
+            tally.pending + 1 < self.local_batch
+            and tally.estimate + tally.pending + 1 <= limit * LOCAL_HEADROOM
+        ):
+            tally.pending += 1
+            return None
+
+        # Requests admitted locally while this call is in flight go in the next one
+        admitted, tally.pending = tally.pending, 0
+        result = None
+        try:
+            result = await self.cache.sliding_window(
+                f"{key}:{window_id}",
+                f"{key}:{window_id - 1}",
+                limit,
+                self.window,
+                weight=1 - elapsed / self.window,
+                admitted=admitted,
+            )
+        finally:
+            if result is None:
+                tally.pending += admitted
+        if result is None:
+            # Fails open: while the backend is unreachable, requests are not limited
+            return None
+        allowed, tally.estimate = result
+        if allowed:
+            return None
+        tally.blocked_until = now + self.window - elapsed
+        return tally.blocked_until - now
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,170 @@
+import logging
+import os
+import struct
+import zlib
+from typing import Optional
+
+logger = logging.getLogger("SegmentLog")
+
+SEGMENT_SUFFIX = ".seg"
+CURSOR_FILE = "cursor"
+
+# Each record is framed as payload length + CRC32 of the payload
+HEADER = struct.Struct(">II")
+
+Position = tuple[int, int]  # (segment id, byte offset)
+
+
+class SegmentLog:
+    """
+    Append-only, single-writer log of byte records kept in numbered segment files,
+    with a persisted read cursor.
+
+    A crash can leave at most one torn record, at the tail of the newest segment;
+    it fails its length or CRC check and is truncated when the log is reopened.
+    Records before the cursor are consumed; segments wholly behind it are deleted
+    on `commit`. Reads are at-least-once: records read but not yet committed are
+    read again after a restart.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 16 * 1024 * 1024, fsync: bool = True):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.segments = sorted(
+            int(name[: -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(directory)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+        self.cursor = self._load_cursor()
+        self._writer = None
+        self._recover()
+
+    def _path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:010d}{SEGMENT_SUFFIX}")
+
+    def _recover(self):
+        """Truncate a torn tail record and move the cursor onto an existing segment."""
+        if self.segments:
+            last = self._path(self.segments[-1])
+            valid = self._scan(last)
+            size = os.path.getsize(last)
+            if valid < size:
+                logger.warning(f"Truncating {size - valid} torn bytes from the tail of {last}")
+                with open(last, "r+b") as f:
+                    f.truncate(valid)
+                    os.fsync(f.fileno())
+
+        segment, _ = self.cursor
+        live = [s for s in self.segments if s >= segment]
+        if not live:
+            self.cursor = (max([segment, *(s + 1 for s in self.segments)]), 0)
+        elif live[0] != segment:
+            self.cursor = (live[0], 0)
+        for stale in (s for s in self.segments if s < self.cursor[0]):
+            os.remove(self._path(stale))
+        self.segments = [s for s in self.segments if s >= self.cursor[0]]
+
+    @staticmethod
+    def _scan(path: str) -> int:
+        """Offset just past the last intact record in a segment."""
+        offset = 0
+        with open(path, "rb") as f:
+            while (frame := SegmentLog._read_frame(f)) is not None:
+                offset += HEADER.size + len(frame)
+        return offset
+
+    @staticmethod
+    def _read_frame(f) -> Optional[bytes]:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return None
+        length, crc = HEADER.unpack(header)
+        payload = f.read(length)
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return None
+        return payload
+
+    def append(self, record: bytes):
+        """Durably append a record (fsynced unless the log was opened with fsync=False)."""
+        if self._writer is None or self._writer.tell() >= self.segment_bytes:
+            self._roll()
+        self._writer.write(HEADER.pack(len(record), zlib.crc32(record)) + record)
+        self._writer.flush()
+        if self.fsync:
+            os.fsync(self._writer.fileno())
+
+    def _roll(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self.segments and os.path.getsize(self._path(self.segments[-1])) < self.segment_bytes:
+            segment = self.segments[-1]
+        else:
+            segment = max(self.segments[-1] + 1 if self.segments else 0, self.cursor[0])
+            self.segments.append(segment)
+        self._writer = open(self._path(segment), "ab")
+
+    def read(self, max_records: int) -> tuple[list[bytes], Position]:
+        """Up to `max_records` records after the cursor, and the position following them."""
+        records: list[bytes] = []
+        segment, offset = self.cursor
+        for current in [s for s in self.segments if s >= segment]:
+            if current != segment:
+                segment, offset = current, 0
+            path = self._path(segment)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                while len(records) < max_records:
+                    frame = self._read_frame(f)
+                    if frame is None:
+                        size = os.path.getsize(path)
+                        if offset < size:
+                            # Only the writer appends, so this is corruption, not a torn write
+                            logger.error(f"Skipping {size - offset} corrupt bytes in {path}")
+                            offset = size
+                        break
+                    records.append(frame)
+                    offset += HEADER.size + len(frame)
+            if len(records) >= max_records:
+                break
+        return records, (segment, offset)
+
+    def commit(self, position: Position):
+        """Persist the cursor and delete segments that are fully consumed."""
+        self.cursor = position
+        tmp_path = os.path.join(self.directory, f"{CURSOR_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(f"{position[0]} {position[1]}")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.directory, CURSOR_FILE))
+
+        for segment in [s for s in self.segments if s < position[0]]:
+            os.remove(self._path(segment))
+            self.segments.remove(segment)
+
+    def _load_cursor(self) -> Position:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as f:
+                segment, offset = f.read().split()
+                return int(segment), int(offset)
+        except (FileNotFoundError, ValueError):
+            return 0, 0
+
+    def size(self) -> int:
+        """Bytes not yet consumed."""
+        total = sum(os.path.getsize(self._path(s)) for s in self.segments)
+        if self.cursor[0] in self.segments:
+            total -= self.cursor[1]
+        return total
+
+    @property
+    def pending(self) -> bool:
+        return self.size() > 0
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
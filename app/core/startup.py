@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -5,6 +6,9 @@ from fastapi import FastAPI
 
 from app.core.db import init_db
 from app.core.config import settings
+from app.core.health import health_prober, warm_up
+from app.core.outbox import visit_outbox
+from app.core.queue import queue_client
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +27,56 @@ async def lifespan(app: FastAPI):
             logger.error(f"Failed to create database tables: {e}")
             raise
 
+    # Open connection pools now so the first requests don't pay for them
+    logger.info("Warming up connections...")
+    await warm_up()
+    await health_prober.probe()
+    health_prober.warmed_up = True
+    prober_task = asyncio.create_task(health_prober.start())
+
+    manager, manager_task = None, None
+    if settings.embedded_workers:
+        # In-process backends are private to this process, so it runs its own workers
+        from app.workers.manager_worker import WorkerGroup, build_workers
+
+        logger.info("Starting embedded workers for in-process backends...")
+        manager = WorkerGroup(build_workers("visits") + build_workers("singletons"))
+        manager_task = asyncio.create_task(manager.start())
+
+    shipper, shipper_task = None, None
+    if settings.VISIT_OUTBOX_DIR and not settings.embedded_workers:
+        from app.workers.outbox_shipper import OutboxShipper
+
+        visit_outbox.open()
+        shipper = OutboxShipper()
+        shipper_task = asyncio.create_task(shipper.start())
+
     yield
 
     # Shutdown
     logger.info("Shutting down application...")
 
+    health_prober.stop()
+    prober_task.cancel()
+
+    if shipper:
+        shipper_task.cancel()
+        try:
+            await shipper_task
+        except asyncio.CancelledError:
+            pass
+        await shipper.stop()
+        visit_outbox.close()
+
+    if manager:
+        await queue_client.drain()
+        await manager.stop()
+        manager_task.cancel()
+        try:
+            await manager_task
+        except asyncio.CancelledError:
+            pass
+
 
 def setup_logging():
     logging.basicConfig(
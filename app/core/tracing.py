@@ -0,0 +1,113 @@
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+logger = logging.getLogger("RequestTrace")
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+
+class RequestTrace:
+    """Per-request stage timings, accumulated by `span` while the trace is active."""
+
+    __slots__ = ("method", "path", "started", "spans")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans: dict[str, list[float]] = {}  # name -> [total seconds, count]
+
+    def add(self, name: str, duration: float):
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [duration, 1]
+        else:
+            entry[0] += duration
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def server_timing(self) -> str:
+        metrics = [f"{name};dur={total * 1000:.3f}" for name, (total, _) in self.spans.items()]
+        metrics.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(metrics)
+
+    def to_record(self, status: int) -> dict:
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "total_ms": round(self.elapsed() * 1000, 3),
+            "spans": {
+                name: {"ms": round(total * 1000, 3), "count": int(count)}
+                for name, (total, count) in self.spans.items()
+            },
+        }
+
+
+def start_trace(method: str, path: str):
+    """Activate a trace for the current context; returns (trace, token)."""
+    trace = RequestTrace(method, path)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+class span:
+    """
+    Time a stage of the current request. A no-op (one ContextVar lookup) when the
+    request is not being traced.
+    """
+
+    __slots__ = ("name", "_trace", "_start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._trace = _current_trace.get()
+        if self._trace is not None:
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self._trace is not None:
+            self._trace.add(self.name, time.perf_counter() - self._start)
+
+
+class TraceExporter:
+    """
+    Writes sampled trace records as JSON lines. File writes happen on a background
+    thread so exporting never blocks the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self._listener = None
+        self._logger = logging.getLogger("RequestTrace.export")
+        self._logger.propagate = path is None
+        if path:
+            handler = logging.FileHandler(path)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            self._logger.addHandler(logging.handlers.QueueHandler(records))
+            self._logger.setLevel(logging.INFO)
+            self._listener = logging.handlers.QueueListener(records, handler)
+            self._listener.start()
+
+    def export(self, record: dict):
+        self._logger.info(json.dumps(record))
+
+    def close(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
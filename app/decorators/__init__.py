@@ -1,6 +1,8 @@
 from .log_visit import log_visit
+from .observe_latency import observe_latency
 
 
 __all__ = [
     "log_visit",
+    "observe_latency",
 ]
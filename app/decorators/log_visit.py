@@ -1,5 +1,6 @@
 import functools
 from fastapi import Request
+from app.core.metrics import REDIRECT_VISIT_PUBLISH
 from app.services import VisitService
 
 
@@ -17,7 +18,8 @@ def log_visit(short_code_param: str = "short_code"):
 
             if short_code:
                 service = VisitService()
-                await service.log_visit(short_code=short_code, request=request)
+                with REDIRECT_VISIT_PUBLISH.time():
+                    await service.log_visit(short_code=short_code, request=request)
 
             return await func(*args, **kwargs)
 
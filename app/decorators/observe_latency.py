@@ -0,0 +1,18 @@
+import functools
+
+
+def observe_latency(histogram):
+    """
+    Decorator recording the wall time of an async endpoint (including any
+    decorators applied below it) into a histogram.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with histogram.time():
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
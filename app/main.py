@@ -1,16 +1,14 @@
-import datetime
-from fastapi import FastAPI, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
-from sqlmodel import text
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from app.core.config import settings
-from app.core.db import get_db_dependency
+from app.core.health import health_prober
 from app.core.startup import lifespan, setup_logging
-from app.api.v1.api import api_router
+from app.api.v1.api import api_router, api_routes
 from app.schemas import HealthCheck
-from app.core.cache import redis_client
-from app.core.queue import rabbitmq_client
+from app.core.metrics import REGISTRY, CONTENT_TYPE
+from app.core.tracing import TraceExporter
+from app.middleware import RateLimitMiddleware, ServerTimingMiddleware
 
 
 setup_logging()
@@ -25,6 +23,23 @@ app = FastAPI(
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        routes=api_routes,
+        default_limit=settings.RATE_LIMIT_REQUESTS,
+        route_limits=settings.RATE_LIMIT_ROUTES,
+        prefix=settings.API_V1_STR,
+    )
+
+if settings.SERVER_TIMING_ENABLED or settings.TRACE_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ServerTimingMiddleware,
+        emit_header=settings.SERVER_TIMING_ENABLED,
+        sample_rate=settings.TRACE_SAMPLE_RATE,
+        exporter=TraceExporter(settings.TRACE_FILE),
+    )
+
 
 @app.get("/", response_model=dict)
 async def root():
@@ -37,52 +52,31 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/health", response_model=HealthCheck)
-async def health_check(session: AsyncSession = Depends(get_db_dependency)):
-    db_status = "disconnected"
-    redis_status = "disconnected"
-    rabbitmq_status = "disconnected"
-
-    # --- DB health check ---
-    try:
-        await session.execute(text("SELECT 1"))
-        db_status = "connected"
-    except SQLAlchemyError as e:
-        db_status = f"error: {str(e)}"
-
-    # --- Redis health check ---
-    try:
-        await redis_client.connect()
-        pong = await redis_client.ping()
-        redis_status = "connected" if pong else "disconnected"
-    except Exception as e:
-        redis_status = f"error: {str(e)}"
-
-    # --- RabbitMQ health check ---
-    try:
-        await rabbitmq_client.connect()
-        if rabbitmq_client._connection and not rabbitmq_client._connection.is_closed:
-            rabbitmq_status = "connected"
-        else:
-            rabbitmq_status = "disconnected"
-    except Exception as e:
-        rabbitmq_status = f"error: {str(e)}"
-
-    # --- Overall status ---
-    status = (
-        "healthy"
-        if db_status == "connected"
-        and redis_status == "connected"
-        and rabbitmq_status == "connected"
-        else "degraded"
-    )
+async def health_check():
+    """Dependency status from the last background probe."""
+    return health_prober.snapshot or await health_prober.probe()
+
+
+@app.get("/health/live", include_in_schema=False)
+async def liveness():
+    """The process is up and its event loop is responsive."""
+    return {"status": "alive"}
+
 
-    return HealthCheck(
-        status=status,
-        timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
-        version=settings.VERSION,
-        environment=settings.ENVIRONMENT,
-        database=db_status,
-        redis=redis_status,
-        rabbitmq=rabbitmq_status,  # new field
+@app.get("/health/ready", include_in_schema=False)
+async def readiness():
+    """Connections are warmed up and Postgres is reachable."""
+    ready = health_prober.ready
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not ready",
+            "health": health_prober.snapshot.model_dump() if health_prober.snapshot else None,
+        },
     )
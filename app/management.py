@@ -1,7 +1,10 @@
+import asyncio
 import subprocess
 import sys
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from app.core.config import settings
 from app.core.db import init_db
 
 
@@ -66,6 +69,17 @@ def create_tables_directly():
         sys.exit(1)
 
 
+def archive_visits(older_than_days: int = settings.VISIT_ARCHIVE_AFTER_DAYS):
+    """Move visits older than the given age to the visit archive"""
+    # Needs pyarrow, which only this command uses
+    from app.services.visit_archive import VisitArchiver
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    print(f"Archiving visits before {cutoff.isoformat()} to {settings.VISIT_ARCHIVE_URI}...")
+    moved = asyncio.run(VisitArchiver().archive(cutoff))
+    print(f"Archived {moved} visits")
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python management.py <command> [args...]")
@@ -76,6 +90,7 @@ if __name__ == "__main__":
         print("  history                     - Show migration history")
         print("  current                     - Show current revision")
         print("  create-tables               - Create tables directly")
+        print("  archive-visits [days]       - Archive visits older than days")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -96,6 +111,11 @@ if __name__ == "__main__":
         show_current_revision()
     elif command == "create-tables":
         create_tables_directly()
+    elif command == "archive-visits":
+        if len(sys.argv) > 2:
+            archive_visits(int(sys.argv[2]))
+        else:
+            archive_visits()
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
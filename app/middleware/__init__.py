@@ -0,0 +1,7 @@
+from .rate_limit import RateLimitMiddleware
+from .server_timing import ServerTimingMiddleware
+
+__all__ = [
+    "RateLimitMiddleware",
+    "ServerTimingMiddleware",
+]
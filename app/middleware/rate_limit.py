@@ -0,0 +1,71 @@
+import math
+from typing import Optional, Sequence
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import BaseRoute, compile_path
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.rate_limit import RATE_LIMITED, RateLimiter, rate_limiter
+from app.utils import extract_client_ip
+
+
+class RateLimitMiddleware:
+    """
+    Enforces per-client request limits on `routes` (mounted under `prefix`),
+    answering `429` with `Retry-After` once a client exceeds them.
+
+    - `default_limit`: requests per window for routes without their own limit.
+    - `route_limits`: requests per window by route (endpoint) name.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: Sequence[BaseRoute],
+        default_limit: int,
+        route_limits: Optional[dict[str, int]] = None,
+        prefix: str = "",
+        limiter: RateLimiter = rate_limiter,
+    ):
+        self.app = app
+        self.default_limit = default_limit
+        self.route_limits = route_limits or {}
+        self.prefix = prefix
+        self.limiter = limiter
+        # Runs before routing, so requests are matched against the routes' own patterns
+        self._patterns = [
+            (compile_path(prefix + route.path)[0], route.methods, route.name)
+            for route in routes
+            if hasattr(route, "methods")
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route_name(scope["method"], scope["path"])
+        limit = self.route_limits.get(route, self.default_limit)
+        if route is None or limit <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        retry_in = await self.limiter.check(route, extract_client_ip(Request(scope)), limit)
+        if retry_in is None:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.labels(route=route).inc()
+        response = JSONResponse(
+            {"detail": "Too many requests"},
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(retry_in)))},
+        )
+        await response(scope, receive, send)
+
+    def _route_name(self, method: str, path: str) -> Optional[str]:
+        for regex, methods, name in self._patterns:
+            if method in methods and regex.match(path):
+                return name
+        return None
@@ -0,0 +1,58 @@
+import random
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.tracing import TraceExporter, end_trace, start_trace
+
+
+class ServerTimingMiddleware:
+    """
+    Records per-stage timings (see `app.core.tracing.span`) for HTTP requests.
+
+    - `emit_header`: add a `Server-Timing` header to every response.
+    - `sample_rate`: fraction of requests exported as structured trace records.
+
+    Requests that are neither timed nor sampled pass straight through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        emit_header: bool = True,
+        sample_rate: float = 0.0,
+        exporter: Optional[TraceExporter] = None,
+    ):
+        self.app = app
+        self.emit_header = emit_header
+        self.sample_rate = sample_rate
+        self.exporter = exporter or TraceExporter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (self.emit_header or sampled):
+            await self.app(scope, receive, send)
+            return
+
+        trace, token = start_trace(scope["method"], scope["path"])
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.emit_header:
+                    MutableHeaders(scope=message).append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            end_trace(token)
+            if sampled:
+                self.exporter.export(trace.to_record(status))
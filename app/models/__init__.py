@@ -1,9 +1,11 @@
 from .url import URL
 from .visit import Visit
+from .visitor_sketch import VisitorSketch
 from .mixins import *
 
 
 __all__ = [
     "URL",
     "Visit",
+    "VisitorSketch",
 ]
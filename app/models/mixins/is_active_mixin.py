@@ -1,5 +1,19 @@
-from sqlmodel import SQLModel, Field
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel, Field, update
 
 
 class IsActiveMixin(SQLModel, table=False):
     is_active: bool = Field(default=True, nullable=False)
+
+    @classmethod
+    async def deactivate_where(cls, session: AsyncSession, *criteria, returning=None) -> Any:
+        """
+        Deactivate every active row matching `criteria` in one UPDATE; the caller commits.
+        Returns the `returning` column of the affected rows, or their count.
+        """
+        stmt = update(cls).where(cls.is_active, *criteria).values(is_active=False)
+        if returning is None:
+            return (await session.execute(stmt)).rowcount
+        return list((await session.execute(stmt.returning(returning))).scalars())
@@ -1,30 +1,52 @@
 import datetime
 from typing import Optional, Any
 
-from sqlmodel import SQLModel, Field, select
+from sqlalchemy import ColumnElement, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel, Field, select, update
 
 
 class SoftDeleteMixin(SQLModel, table=False):
     deleted_at: Optional[datetime.datetime] = Field(default=None, nullable=True)
 
     @classmethod
-    def get_deleted(cls, db) -> Any:
-        stmt = select(cls).where(cls.deleted_at is not None)
-        return list(db.scalars(stmt))
+    def not_deleted(cls) -> ColumnElement[bool]:
+        return cls.deleted_at.is_(None)
 
     @classmethod
-    def get_not_deleted(cls, db) -> Any:
-        stmt = select(cls).where(cls.deleted_at is None)
-        return list(db.scalars(stmt))
+    async def get_deleted(cls, session: AsyncSession) -> Any:
+        result = await session.execute(select(cls).where(cls.deleted_at.is_not(None)))
+        return list(result.scalars())
 
-    def soft_delete(self, db):
-        self.deleted_at = datetime.datetime.now(datetime.UTC)
-        db.add(self)
-        db.commit()
-        db.refresh(self)
+    @classmethod
+    async def get_not_deleted(cls, session: AsyncSession) -> Any:
+        result = await session.execute(select(cls).where(cls.not_deleted()))
+        return list(result.scalars())
+
+    @classmethod
+    async def soft_delete_where(cls, session: AsyncSession, *criteria, returning=None) -> Any:
+        """
+        Soft delete every live row matching `criteria` in one UPDATE; the caller commits.
+        Returns the `returning` column of the affected rows, or their count.
+        """
+        # deleted_at is a naive UTC timestamp
+        stmt = (
+            update(cls)
+            .where(cls.not_deleted(), *criteria)
+            .values(deleted_at=func.timezone("UTC", func.now()))
+        )
+        if returning is None:
+            return (await session.execute(stmt)).rowcount
+        return list((await session.execute(stmt.returning(returning))).scalars())
+
+    async def soft_delete(self, session: AsyncSession):
+        self.deleted_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
+        session.add(self)
+        await session.commit()
+        await session.refresh(self)
 
-    def restore(self, db):
+    async def restore(self, session: AsyncSession):
         self.deleted_at = None
-        db.add(self)
-        db.commit()
-        db.refresh(self)
+        session.add(self)
+        await session.commit()
+        await session.refresh(self)
@@ -1,4 +1,6 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import DateTime, Index, text
 from sqlmodel import Field, Relationship
 
 from app.models.mixins import (
@@ -11,7 +13,30 @@ from app.models.mixins import (
 
 
 class URL(IDMixin, UUIDMixin, TimestampedMixin, IsActiveMixin, SoftDeleteMixin, table=True):
+    # Partial indexes: deleted and deactivated rows stay out of the indexes the redirect
+    # and shorten paths use, and only links still waiting to expire are swept
+    __table_args__ = (
+        Index(
+            "ix_url_short_code_live",
+            "short_code",
+            postgresql_where=text("deleted_at IS NULL AND is_active"),
+        ),
+        # Hash, because URLs can exceed the btree entry size limit
+        Index(
+            "ix_url_original_url_live",
+            "original_url",
+            postgresql_using="hash",
+            postgresql_where=text("deleted_at IS NULL AND is_active AND expires_at IS NULL"),
+        ),
+        Index(
+            "ix_url_expires_at_pending",
+            "expires_at",
+            postgresql_where=text("is_active AND expires_at IS NOT NULL"),
+        ),
+    )
+
     original_url: str
     short_code: str = Field(index=True, unique=True, max_length=64)
     visit_count: int = Field(default=0)
+    expires_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
     visits: List["Visit"] = Relationship(back_populates="url")
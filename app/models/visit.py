@@ -1,16 +1,24 @@
+from datetime import datetime
 from typing import Optional
-from sqlmodel import Field, Relationship
+from sqlalchemy import BigInteger, DateTime, Index
+from sqlalchemy.dialects.postgresql import INET
+from sqlmodel import Field, Relationship, SQLModel
 
-from app.models.mixins import (
-    UUIDMixin,
-    TimestampedMixin,
-    IsActiveMixin,
-    SoftDeleteMixin,
-    IDMixin,
-)
 
+class Visit(SQLModel, table=True):
+    """
+    An immutable visit event. Rows are only ever inserted, so unlike the other
+    models there is no uuid, audit timestamps, active flag or soft delete.
+    Fixed-width columns come first so rows pack without alignment padding.
+    """
 
-class Visit(IDMixin, UUIDMixin, TimestampedMixin, IsActiveMixin, SoftDeleteMixin, table=True):
+    # Serves lookups by link and keyset scans over a link's visits in id order
+    __table_args__ = (Index("ix_visit_url_id_id", "url_id", "id"),)
+
+    id: Optional[int] = Field(default=None, sa_type=BigInteger, primary_key=True)
+    visited_at: datetime = Field(sa_type=DateTime(timezone=True), nullable=False)
+    asn: Optional[int] = Field(default=None, sa_type=BigInteger)  # 4-byte ASNs exceed int4
     url_id: int = Field(foreign_key="url.id")
-    ip_address: Optional[str] = None
+    ip_address: Optional[str] = Field(default=None, sa_type=INET)
+    country: Optional[str] = Field(default=None, max_length=2)
     url: Optional["URL"] = Relationship(back_populates="visits")
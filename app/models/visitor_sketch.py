@@ -0,0 +1,19 @@
+from datetime import date
+
+from sqlalchemy import BigInteger, LargeBinary
+from sqlmodel import Field, SQLModel
+
+
+class VisitorSketch(SQLModel, table=True):
+    """
+    A short code's unique visitor HyperLogLog for one UTC day, copied out of the cache
+    so days can still be merged after their cache keys expire. `sketch` is in the
+    cache backend's own encoding; `estimate` is its count when saved.
+    """
+
+    __tablename__ = "visitor_sketch"
+
+    url_id: int = Field(foreign_key="url.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    estimate: int = Field(default=0, sa_type=BigInteger)
+    sketch: bytes = Field(sa_type=LargeBinary)
@@ -1,14 +1,21 @@
+from .bulk_delete import BulkDeleteRequest, BulkDeleteResponse, LinkFilter
 from .shorten_request import ShortenRequest
 from .shorten_response import ShortenResponse
 from .stats_response import StatsResponse
+from .trending_response import TrendingLink, TrendingResponse
 from .visit_message import VisitMessage
 from .health_check import HealthCheck
 
 
 __all__ = [
+    "BulkDeleteRequest",
+    "BulkDeleteResponse",
+    "LinkFilter",
     "ShortenRequest",
     "ShortenResponse",
     "StatsResponse",
+    "TrendingLink",
+    "TrendingResponse",
     "VisitMessage",
     "HealthCheck",
 ]
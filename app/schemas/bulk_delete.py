@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+MAX_BULK_CODES = 10_000
+
+
+class LinkFilter(BaseModel):
+    original_url_prefix: Optional[str] = Field(default=None, min_length=1)
+    created_before: Optional[datetime] = None
+
+
+class BulkDeleteRequest(BaseModel):
+    codes: Optional[list[str]] = Field(default=None, min_length=1, max_length=MAX_BULK_CODES)
+    filter: Optional[LinkFilter] = None
+    mode: Literal["delete", "deactivate"] = "delete"
+
+    @model_validator(mode="after")
+    def needs_selection(self) -> "BulkDeleteRequest":
+        # Never let an empty body match every link
+        if not self.codes and not (self.filter and self.filter.model_dump(exclude_none=True)):
+            raise ValueError("give codes or a non-empty filter")
+        return self
+
+
+class BulkDeleteResponse(BaseModel):
+    affected: int
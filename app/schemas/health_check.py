@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, Any
 
 
 class HealthCheck(BaseModel):
@@ -10,3 +10,4 @@ class HealthCheck(BaseModel):
     database: str
     redis: str
     rabbitmq: Optional[str] = None
+    redis_circuit: Optional[dict[str, Any]] = None
@@ -1,5 +1,20 @@
-from pydantic import BaseModel, HttpUrl
+from datetime import datetime, timezone
+from typing import Optional
+
+from pydantic import BaseModel, HttpUrl, field_validator
 
 
 class ShortenRequest(BaseModel):
     url: HttpUrl
+    expires_at: Optional[datetime] = None
+
+    @field_validator("expires_at")
+    @classmethod
+    def expires_in_future(cls, value: Optional[datetime]) -> Optional[datetime]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        if value <= datetime.now(timezone.utc):
+            raise ValueError("expires_at must be in the future")
+        return value
@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
 
@@ -5,3 +6,4 @@ from typing import Optional
 class ShortenResponse(BaseModel):
     short_code: str
     short_url: Optional[str] = None
+    expires_at: Optional[datetime] = None
@@ -6,4 +6,5 @@ class StatsResponse(BaseModel):
     original_url: HttpUrl
     short_code: str
     visits: int
+    unique_visitors: int
     created_at: datetime
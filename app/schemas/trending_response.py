@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+
+
+class TrendingLink(BaseModel):
+    short_code: str
+    visits: int
+
+
+class TrendingResponse(BaseModel):
+    window: int
+    links: list[TrendingLink]
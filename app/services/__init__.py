@@ -1,10 +1,31 @@
-from .short_code_factory import ShortCodeFactory
-from .url_service import URLService
-from .visit_service import VisitService
+import importlib
+
+# Loaded on first access (PEP 562), so importing one service doesn't import the others
+_SERVICES = {
+    "ShortCodeFactory": ".short_code_factory",
+    "StatsService": ".stats_service",
+    "TrendingService": ".trending_service",
+    "UniqueVisitorService": ".visitor_service",
+    "VisitArchiver": ".visit_archive",
+    "URLService": ".url_service",
+    "VisitExportService": ".visit_export",
+    "VisitService": ".visit_service",
+}
+
+
+def __getattr__(name: str):
+    if name in _SERVICES:
+        return getattr(importlib.import_module(_SERVICES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = [
     "ShortCodeFactory",
+    "StatsService",
+    "TrendingService",
+    "UniqueVisitorService",
+    "VisitArchiver",
     "URLService",
+    "VisitExportService",
     "VisitService",
 ]
@@ -1,19 +1,16 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.cache import redis_client
+from app.core.cache import cache_client
+from app.core.tracing import span
 
 
 class BaseService:
     def __init__(self, session: AsyncSession | None = None):
         self.session = session
-        self.redis = redis_client
+        self.cache = cache_client
 
-    async def ensure_redis_connection(self):
-        """Ensure Redis connection is established before using it."""
-        if hasattr(self.redis, "ensure_connection"):
-            await self.redis.ensure_connection()
-        else:
-            # Fallback for older Redis client implementation
-            await self.redis.connect()
+    async def ensure_cache_connection(self):
+        """Ensure the cache backend is ready before using it."""
+        await self.cache.ensure_connection()
 
     async def commit_or_rollback(self):
         """Commit session or rollback on error."""
@@ -25,14 +22,19 @@ class BaseService:
             await self.session.rollback()
             raise
 
+    async def execute(self, statement):
+        """Execute a statement on the session, timed as a `db_query` trace span."""
+        with span("db_query"):
+            return await self.session.execute(statement)
+
     async def cache_get(self, key: str):
-        await self.ensure_redis_connection()
-        return await self.redis.get(key)
+        await self.ensure_cache_connection()
+        return await self.cache.get(key)
 
     async def cache_set(self, key: str, value: str, expire: int = 86400):
-        await self.ensure_redis_connection()
-        return await self.redis.set(key, value, expire=expire)
+        await self.ensure_cache_connection()
+        return await self.cache.set(key, value, expire=expire)
 
     async def cache_incr(self, key: str):
-        await self.ensure_redis_connection()
-        return await self.redis.incr(key)
+        await self.ensure_cache_connection()
+        return await self.cache.incr(key)
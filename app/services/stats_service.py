@@ -0,0 +1,63 @@
+import json
+import time
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.schemas import StatsResponse
+from app.services.base import BaseService
+from app.services.url_service import URLService
+from app.services.visitor_service import UniqueVisitorService
+
+# Entries outlive their freshness so a rebuild can tell whether anything changed
+STATS_ENTRY_TTL = 3600
+
+
+class StatsEntry(NamedTuple):
+    stats: dict
+    etag: str
+    modified: float
+
+
+def stats_key(short_code: str) -> str:
+    return f"stats:{short_code}"
+
+
+class StatsService(BaseService):
+    """
+    Link stats served from the cache for STATS_CACHE_TTL seconds, so polling
+    dashboards do not reach Postgres. The ETag is built from the link's counters and
+    Last-Modified only moves when a rebuild finds that they changed.
+    """
+
+    @staticmethod
+    def etag(url_id: int, visits: int, unique_visitors: int) -> str:
+        return f'"{url_id:x}-{visits}-{unique_visitors}"'
+
+    async def get(self, short_code: str) -> Optional[StatsEntry]:
+        now = time.time()
+        previous = None
+        cached = await self.cache_get(stats_key(short_code))
+        if cached:
+            previous = json.loads(cached)
+            if now - previous["built"] < settings.STATS_CACHE_TTL:
+                return StatsEntry(previous["stats"], previous["etag"], previous["modified"])
+
+        url = await URLService(self.session).get_by_code(short_code)
+        if not url:
+            return None
+        unique_visitors = await UniqueVisitorService(self.session).count(url)
+        stats = StatsResponse(
+            original_url=url.original_url,
+            short_code=url.short_code,
+            visits=url.visit_count,
+            unique_visitors=unique_visitors,
+            created_at=url.created_at,
+        ).model_dump(mode="json")
+        etag = self.etag(url.id, url.visit_count, unique_visitors)
+        modified = previous["modified"] if previous and previous["etag"] == etag else now
+        await self.cache_set(
+            stats_key(short_code),
+            json.dumps({"stats": stats, "etag": etag, "modified": modified, "built": now}),
+            expire=STATS_ENTRY_TTL,
+        )
+        return StatsEntry(stats, etag, modified)
@@ -0,0 +1,52 @@
+import time
+from typing import NamedTuple, Optional
+
+from app.core.config import settings
+from app.services.base import BaseService
+
+MINUTE = 60
+# The merged leaderboard is rebuilt on every read; the key only needs to outlive that read
+UNION_TTL = 10
+
+
+class TrendingLink(NamedTuple):
+    short_code: str
+    visits: int
+
+
+def minute_key(minute: int) -> str:
+    return f"top:{minute}"
+
+
+class TrendingService(BaseService):
+    """
+    A sliding-window leaderboard of the most visited links: one sorted set per
+    minute, fed with the batched counts the counter sync drains, summed over the
+    last N minutes on read. Buckets are trimmed to their busiest links, so counts
+    for links outside the top of a minute are dropped.
+    """
+
+    async def record(self, counts: dict[str, int], now: Optional[float] = None) -> bool:
+        """Add drained visit counts, keyed by short code, to the current minute."""
+        if not counts:
+            return True
+        await self.ensure_cache_connection()
+        minute = int((now or time.time()) // MINUTE)
+        return await self.cache.zincr_many(
+            minute_key(minute),
+            counts,
+            expire=(settings.TRENDING_MAX_WINDOW + 1) * MINUTE,
+            max_members=settings.TRENDING_MINUTE_MAX_MEMBERS,
+        )
+
+    async def top(self, window: int, limit: int, now: Optional[float] = None) -> list[TrendingLink]:
+        """The `limit` most visited links over the last `window` minutes, the current one included."""
+        await self.ensure_cache_connection()
+        minute = int((now or time.time()) // MINUTE)
+        leaders = await self.cache.zunion_top(
+            f"top:{window}m",
+            [minute_key(m) for m in range(minute - window + 1, minute + 1)],
+            limit,
+            expire=UNION_TTL,
+        )
+        return [TrendingLink(code, int(score)) for code, score in leaders]
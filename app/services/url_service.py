@@ -1,60 +1,194 @@
+import math
+import time
+from datetime import datetime, timezone
 from typing import Optional
 from sqlmodel import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import local_cache
+from app.core.config import settings
+from app.core.edge_cache import edge_purger
+from app.core.metrics import (
+    REDIRECT_CACHE_LOOKUP,
+    REDIRECT_DB_FALLBACK,
+    SHORTEN_COLLISION_RETRIES,
+)
 from app.models import URL
 from app.services import ShortCodeFactory
 from app.services.base import BaseService
 
+CACHE_TTL = 86400
+EXPIRY_MARK = "@"
+
+Target = tuple[str, Optional[float]]  # (original URL, expiry as a Unix timestamp)
+
+
+def encode_target(original_url: str, expires_at: Optional[datetime] = None) -> str:
+    """
+    The cached value for a link: the URL itself, or `@<unix expiry> <url>` for links
+    that expire, so redirects can check expiry without the database.
+    """
+    if expires_at is None:
+        return original_url
+    return f"{EXPIRY_MARK}{int(expires_at.timestamp())} {original_url}"
+
+
+def decode_target(value: str) -> Target:
+    if not value.startswith(EXPIRY_MARK):
+        return value, None
+    expires, _, original_url = value[1:].partition(" ")
+    return original_url, float(expires)
+
 
 class URLService(BaseService):
     def __init__(self, session: AsyncSession, generator_type: str = "random"):
         super().__init__(session)
         self.generator = ShortCodeFactory.create(generator_type)
 
-    async def create_short(self, original_url: str, max_attempts: int = 5) -> URL:
-        # Check if URL already exists
+    async def create_short(
+        self, original_url: str, max_attempts: int = 5, expires_at: Optional[datetime] = None
+    ) -> URL:
         original_url = str(original_url).strip()
-        stmt = select(URL).where(URL.original_url == original_url)
-        result = await self.session.execute(stmt)
-        existing = result.scalars().first()
-        if existing:
-            return existing
+        # Reuse an existing permanent link; links that expire are always new
+        if expires_at is None:
+            stmt = select(URL).where(
+                URL.original_url == original_url,
+                URL.not_deleted(),
+                URL.is_active,
+                URL.expires_at.is_(None),
+            )
+            result = await self.execute(stmt)
+            existing = result.scalars().first()
+            if existing:
+                return existing
 
         # Try generating unique short_code
         attempt, length = 0, 6
         while attempt < max_attempts:
             code = self.generator.generate(length=length)
-            url = URL(original_url=original_url, short_code=code)
+            url = URL(original_url=original_url, short_code=code, expires_at=expires_at)
             try:
                 self.session.add(url)
                 await self.commit_or_rollback()
                 await self.session.refresh(url)
 
                 # Cache short_code → original_url
-                await self.cache_set(f"short:{code}", original_url)
+                await self.cache_target(code, original_url, expires_at)
                 return url
             except IntegrityError:
                 await self.session.rollback()
+                SHORTEN_COLLISION_RETRIES.inc()
                 attempt += 1
                 if attempt % 2 == 0:
                     length += 1
 
         raise Exception("Could not generate unique short code after max attempts")
 
+    async def get_original_url(self, short_code: str) -> Optional[str]:
+        target = await self.resolve(short_code)
+        return target[0] if target else None
+
+    async def resolve(self, short_code: str) -> Optional[Target]:
+        """
+        Resolve a short code for the redirect path: in-process cache (if enabled), then
+        Redis, then DB. Redis is skipped automatically while its circuit breaker is open.
+        Inactive, deleted and expired links resolve to None.
+        """
+        key = f"short:{short_code}"
+        with REDIRECT_CACHE_LOOKUP.time():
+            value = local_cache.get(key) if settings.LOCAL_CACHE_ENABLED else None
+            if value:
+                return self._live(decode_target(value))
+            value = await self.cache_get(key)
+
+        if not value:
+            with REDIRECT_DB_FALLBACK.time():
+                stmt = select(URL.original_url, URL.expires_at).where(
+                    URL.short_code == short_code, URL.not_deleted(), URL.is_active
+                )
+                result = await self.execute(stmt)
+                row = result.first()
+            if not row:
+                return None
+            value = await self.cache_target(short_code, *row)
+
+        target = decode_target(value)
+        if settings.LOCAL_CACHE_ENABLED:
+            if target[1] is None:
+                local_cache.set(key, value)
+            elif (remaining := target[1] - time.time()) > 0:
+                local_cache.set(key, value, ttl=min(settings.LOCAL_CACHE_TTL, remaining))
+        return self._live(target)
+
+    @staticmethod
+    def _live(target: Target) -> Optional[Target]:
+        expires = target[1]
+        return target if expires is None or expires > time.time() else None
+
+    async def cache_target(
+        self, short_code: str, original_url: str, expires_at: Optional[datetime] = None
+    ) -> str:
+        """Cache a link's target in Redis, for no longer than it stays valid."""
+        value = encode_target(original_url, expires_at)
+        expire = CACHE_TTL
+        if expires_at is not None:
+            expire = min(expire, math.ceil(expires_at.timestamp() - time.time()))
+        if expire > 0:
+            await self.cache_set(f"short:{short_code}", value, expire=expire)
+        return value
+
     async def get_by_code(self, short_code: str) -> Optional[URL]:
         cached = await self.cache_get(f"short:{short_code}")
         if cached:
             # Fetch from DB anyway to get a managed instance
-            stmt = select(URL).where(URL.short_code == short_code)
-            result = await self.session.execute(stmt)
+            stmt = select(URL).where(URL.short_code == short_code, URL.not_deleted())
+            result = await self.execute(stmt)
             return result.scalars().first()
 
-        stmt = select(URL).where(URL.short_code == short_code)
-        result = await self.session.execute(stmt)
+        stmt = select(URL).where(URL.short_code == short_code, URL.not_deleted())
+        result = await self.execute(stmt)
         url = result.scalars().first()
 
-        if url:
-            await self.cache_set(f"short:{short_code}", url.original_url)
+        if url and url.is_active:
+            await self.cache_target(short_code, url.original_url, url.expires_at)
 
         return url
+
+    async def remove_links(
+        self,
+        codes: Optional[list[str]] = None,
+        original_url_prefix: Optional[str] = None,
+        created_before: Optional[datetime] = None,
+        deactivate_only: bool = False,
+    ) -> list[str]:
+        """
+        Soft delete (or only deactivate) the selected links with one set-based UPDATE,
+        then evict them from every cache layer; returns the affected short codes.
+        """
+        criteria = []
+        if codes:
+            criteria.append(URL.short_code.in_(codes))
+        if original_url_prefix:
+            criteria.append(URL.original_url.startswith(original_url_prefix, autoescape=True))
+        if created_before:
+            # created_at is a naive timestamp
+            if created_before.tzinfo is not None:
+                created_before = created_before.astimezone(timezone.utc).replace(tzinfo=None)
+            criteria.append(URL.created_at < created_before)
+        if not criteria:
+            raise ValueError("refusing to remove links without a selection")
+
+        remove = URL.deactivate_where if deactivate_only else URL.soft_delete_where
+        removed = await remove(self.session, *criteria, returning=URL.short_code)
+        await self.commit_or_rollback()
+        if removed:
+            await self.invalidate(*removed)
+        return removed
+
+    async def invalidate(self, *short_codes: str) -> None:
+        """Evict short codes from every cache layer after a link changes."""
+        keys = [f"short:{code}" for code in short_codes]
+        for key in keys:
+            local_cache.delete(key)
+        await self.cache.delete_many(keys + [f"stats:{code}" for code in short_codes])
+        await edge_purger.purge(*short_codes)
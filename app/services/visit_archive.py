@@ -0,0 +1,173 @@
+import logging
+import os
+from datetime import date, datetime, timezone
+from typing import Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+from sqlmodel import delete, select
+
+from app.core.config import settings
+from app.core.db import get_session
+from app.models import Visit
+from app.services.base import BaseService
+
+logger = logging.getLogger("VisitArchive")
+
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("url_id", pa.int32()),
+        ("visited_at", pa.timestamp("us", tz="UTC")),
+        ("ip_address", pa.string()),
+        ("country", pa.string()),
+        ("asn", pa.int64()),
+    ]
+)
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+# Rows are sorted by link within a file, so small row groups give tight url_id
+# min/max statistics for readers to skip on
+ROW_GROUP_SIZE = 8192
+
+
+def open_archive(uri: str) -> tuple[fs.FileSystem, str]:
+    """A filesystem and base path for a local directory or an s3://, gs://, ... URI."""
+    if "://" not in uri:
+        uri = os.path.abspath(uri)
+    return fs.FileSystem.from_uri(uri)
+
+
+class VisitArchiver(BaseService):
+    """
+    Moves visits older than a cutoff out of Postgres into zstd Parquet files,
+    partitioned by month (`month=YYYY-MM/`), one keyset batch at a time. A batch's
+    rows are deleted in the transaction that read them, after its files are written;
+    files are named after the batch's first id, so a rerun after a failure
+    overwrites them instead of duplicating rows.
+    """
+
+    def __init__(
+        self,
+        uri: str = settings.VISIT_ARCHIVE_URI,
+        batch_size: int = settings.VISIT_ARCHIVE_BATCH_SIZE,
+    ):
+        super().__init__(session=None)
+        self.filesystem, self.base_dir = open_archive(uri)
+        self.batch_size = batch_size
+
+    async def archive(self, cutoff: datetime) -> int:
+        """Archive every visit before `cutoff`; returns how many rows were moved."""
+        moved, after = 0, 0
+        while True:
+            async with get_session() as session:
+                result = await session.execute(
+                    select(*(getattr(Visit, name) for name in ARCHIVE_SCHEMA.names))
+                    .where(Visit.visited_at < cutoff, Visit.id > after)
+                    .order_by(Visit.id)
+                    .limit(self.batch_size)
+                )
+                rows = result.all()
+                if not rows:
+                    break
+                first, after = rows[0][0], rows[-1][0]
+                self.write_batch(rows)
+                # The same predicate over the batch's id range is exactly the batch
+                await session.execute(
+                    delete(Visit).where(
+                        Visit.id >= first, Visit.id <= after, Visit.visited_at < cutoff
+                    )
+                )
+                await session.commit()
+            moved += len(rows)
+            logger.info(f"Archived visits {first}..{after} ({moved} so far)")
+            if len(rows) < self.batch_size:
+                break
+        return moved
+
+    def write_batch(self, rows: Sequence[tuple]):
+        columns = list(zip(*rows))
+        columns[3] = [str(ip) if ip is not None else None for ip in columns[3]]
+        table = pa.Table.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, ARCHIVE_SCHEMA)],
+            schema=ARCHIVE_SCHEMA,
+        )
+        table = table.append_column("month", pc.strftime(table["visited_at"], "%Y-%m"))
+        table = table.sort_by([("url_id", "ascending"), ("visited_at", "ascending")])
+        ds.write_dataset(
+            table,
+            self.base_dir,
+            filesystem=self.filesystem,
+            format="parquet",
+            partitioning=PARTITIONING,
+            basename_template=f"visits-{rows[0][0]:020d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+            min_rows_per_group=ROW_GROUP_SIZE,
+            max_rows_per_group=ROW_GROUP_SIZE,
+        )
+
+
+def _as_utc(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc)
+
+
+class VisitArchiveReader:
+    """
+    Queries archived visits by link and time range. Filters are pushed down: months
+    outside the range are never listed, and row groups whose statistics exclude the
+    link or range are never read.
+    """
+
+    def __init__(self, uri: str = settings.VISIT_ARCHIVE_URI):
+        filesystem, base_dir = open_archive(uri)
+        self.dataset = ds.dataset(
+            base_dir, filesystem=filesystem, format="parquet", partitioning=PARTITIONING
+        )
+
+    @staticmethod
+    def _filter(
+        url_id: Optional[int], since: Optional[datetime], until: Optional[datetime]
+    ) -> Optional[ds.Expression]:
+        conditions = []
+        if url_id is not None:
+            conditions.append(ds.field("url_id") == url_id)
+        # Partitions are UTC months, so bounds are converted before picking them;
+        # naive bounds are taken as UTC, like the rest of the app's timestamps.
+        since, until = (None if bound is None else _as_utc(bound) for bound in (since, until))
+        if since is not None:
+            conditions += [
+                ds.field("month") >= f"{since:%Y-%m}",
+                ds.field("visited_at") >= pa.scalar(since, ARCHIVE_SCHEMA.field("visited_at").type),
+            ]
+        if until is not None:
+            conditions += [
+                ds.field("month") <= f"{until:%Y-%m}",
+                ds.field("visited_at") < pa.scalar(until, ARCHIVE_SCHEMA.field("visited_at").type),
+            ]
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def visits(
+        self,
+        url_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        columns: Optional[list[str]] = None,
+    ) -> pa.Table:
+        return self.dataset.to_table(
+            columns=columns or ARCHIVE_SCHEMA.names, filter=self._filter(url_id, since, until)
+        )
+
+    def daily_counts(
+        self, url_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> dict[date, int]:
+        table = self.visits(url_id, since, until, columns=["visited_at"])
+        days = table.append_column("day", pc.cast(table["visited_at"], pa.date32()))
+        counts = days.group_by("day").aggregate([("day", "count")])
+        return dict(zip(counts["day"].to_pylist(), counts["day_count"].to_pylist()))
@@ -1,26 +1,49 @@
-from fastapi import Request
 from datetime import datetime, timezone
-from app.core.queue import rabbitmq_client
+from typing import TYPE_CHECKING, Optional
+from app.core.outbox import visit_outbox
+from app.core.queue import queue_client
 from app.services.base import BaseService
 from app.schemas import VisitMessage
 from app.utils import extract_client_ip
 
+if TYPE_CHECKING:  # workers record visits without loading the web framework
+    from fastapi import Request
+
 
 class VisitService(BaseService):
-    """Handles logging visits via Redis + RabbitMQ."""
+    """Handles logging visits via the cache and queue backends."""
 
     def __init__(self, queue_name: str = "visits"):
         super().__init__(session=None)
         self.queue_name = queue_name
+        self.queue = queue_client
+        self.outbox = visit_outbox
 
-    async def log_visit(self, short_code: str, request: Request | None = None):
+    async def log_visit(self, short_code: str, request: Optional["Request"] = None):
+        await self.record_visit(
+            short_code=short_code,
+            ip=extract_client_ip(request) if request else None,
+        )
+
+    async def record_visit(
+        self,
+        short_code: str,
+        ip: Optional[str] = None,
+        timestamp: Optional[datetime] = None,
+    ):
+        """Count a visit and publish it for the visit worker, wherever it was served from."""
         await self.cache_incr(f"visits:{short_code}")
 
         msg = VisitMessage(
             short_code=short_code,
-            ip=extract_client_ip(request) if request else None,
-            timestamp=datetime.now(timezone.utc),
+            ip=ip,
+            timestamp=timestamp or datetime.now(timezone.utc),
         )
 
-        await rabbitmq_client.connect()
-        await rabbitmq_client.publish(self.queue_name, msg.model_dump())
+        if self.outbox.is_open:
+            # The outbox shipper forwards it, so a broker outage never reaches the redirect
+            self.outbox.append(msg.model_dump_json().encode())
+            return
+
+        await self.queue.connect()
+        await self.queue.publish(self.queue_name, msg.model_dump())
@@ -0,0 +1,136 @@
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.core.config import settings
+from app.core.db import get_session
+from app.models import URL, VisitorSketch
+from app.services.base import BaseService
+
+logger = logging.getLogger("UniqueVisitorService")
+
+REBUILD_KEY_TTL = 60
+
+
+class VisitorHit(NamedTuple):
+    url_id: int
+    short_code: str
+    ip: Optional[str]
+    visited_at: datetime
+
+
+def all_time_key(short_code: str) -> str:
+    return f"uv:{short_code}"
+
+
+def day_key(short_code: str, day: date) -> str:
+    return f"uv:{short_code}:{day:%Y%m%d}"
+
+
+class UniqueVisitorService(BaseService):
+    """
+    Approximate distinct visitors per short code, kept as HyperLogLog sketches in the
+    cache: one all-time key answering stats in O(1), and one key per UTC day that is
+    copied to Postgres so it outlives its TTL and can be merged with other days.
+    """
+
+    def __init__(self, session: AsyncSession | None = None):
+        super().__init__(session)
+        # Day sketches touched since the last persist: (url_id, short_code, day)
+        self._dirty: set[tuple[int, str, date]] = set()
+
+    @staticmethod
+    def visitor_id(ip: Optional[str]) -> Optional[str]:
+        """Keyed hash of the address, so raw IPs never enter the sketches."""
+        if not ip:
+            return None
+        digest = hashlib.blake2b(ip.encode(), digest_size=8, key=settings.VISITOR_HASH_KEY.encode())
+        return digest.hexdigest()
+
+    async def record(self, hits: list[VisitorHit]):
+        """
+        Add visitors to their all-time and day sketches, one pipeline per kind.
+        Adding a visitor twice is a no-op, so redelivered batches never inflate counts.
+        """
+        all_time, daily = defaultdict(list), defaultdict(list)
+        for hit in hits:
+            visitor = self.visitor_id(hit.ip)
+            if visitor is None:
+                continue
+            day = hit.visited_at.astimezone(timezone.utc).date()
+            all_time[all_time_key(hit.short_code)].append(visitor)
+            daily[day_key(hit.short_code, day)].append(visitor)
+            self._dirty.add((hit.url_id, hit.short_code, day))
+        if not all_time:
+            return
+        await self.ensure_cache_connection()
+        await self.cache.pfadd_many(all_time)
+        await self.cache.pfadd_many(daily, expire=settings.UNIQUE_VISITORS_DAY_TTL)
+
+    async def persist(self) -> int:
+        """Copy touched day sketches to Postgres; returns how many rows were written."""
+        dirty, self._dirty = self._dirty, set()
+        rows = []
+        for url_id, short_code, day in dirty:
+            key = day_key(short_code, day)
+            sketch = await self.cache.dump_sketch(key)
+            if sketch is None:
+                continue
+            rows.append(
+                {
+                    "url_id": url_id,
+                    "day": day,
+                    "estimate": await self.cache.pfcount(key),
+                    "sketch": sketch,
+                }
+            )
+        if not rows:
+            return 0
+
+        stmt = insert(VisitorSketch).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[VisitorSketch.url_id, VisitorSketch.day],
+            set_={"estimate": stmt.excluded.estimate, "sketch": stmt.excluded.sketch},
+            # Sketches only grow: a copy read before another worker's never replaces it
+            where=VisitorSketch.estimate <= stmt.excluded.estimate,
+        )
+        try:
+            async with get_session() as session:
+                await session.execute(stmt)
+                await session.commit()
+        except Exception:
+            self._dirty |= dirty
+            raise
+        return len(rows)
+
+    async def count(self, url: URL) -> int:
+        """Approximate unique visitors of a link, rebuilt from Postgres if the cache lost it."""
+        await self.ensure_cache_connection()
+        count = await self.cache.pfcount(all_time_key(url.short_code))
+        if count == 0 and url.visit_count:
+            count = await self.rebuild(url)
+        return count
+
+    async def rebuild(self, url: URL) -> int:
+        """Merge a link's persisted day sketches back into its all-time key."""
+        result = await self.execute(
+            select(VisitorSketch.day, VisitorSketch.sketch).where(VisitorSketch.url_id == url.id)
+        )
+        keys = []
+        for day, sketch in result.all():
+            key = f"{day_key(url.short_code, day)}:rebuild"
+            if not await self.cache.load_sketch(key, sketch, expire=REBUILD_KEY_TTL):
+                return 0
+            keys.append(key)
+        if not keys:
+            return 0
+        target = all_time_key(url.short_code)
+        await self.cache.pfmerge(target, keys)
+        logger.info(f"Rebuilt unique visitors of {url.short_code} from {len(keys)} days")
+        return await self.cache.pfcount(target)
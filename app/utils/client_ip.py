@@ -1,12 +1,42 @@
 import re
-from fastapi import Request
+from functools import lru_cache
+from ipaddress import ip_address, ip_network
+from typing import TYPE_CHECKING
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from fastapi import Request
 
 SHORT_CODE_RE = re.compile(r"^[A-Za-z0-9_-]{4,64}$")
 
 
-def extract_client_ip(request: Request) -> str:
-    xff = request.headers.get("x-forwarded-for")
-    if xff:
-        return xff.split(",")[0].strip()
+@lru_cache(maxsize=4)
+def _networks(proxies: tuple[str, ...]) -> tuple:
+    return tuple(ip_network(proxy, strict=False) for proxy in proxies)
+
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _networks(tuple(settings.TRUSTED_PROXIES)))
+
+
+def extract_client_ip(request: "Request") -> str:
+    """
+    The client's address. X-Forwarded-For is only read when the peer is a trusted
+    proxy, and from the right: each proxy appends the address it saw, so the first
+    untrusted hop is the client and anything left of it is whatever the client sent.
+    """
     client = request.client
-    return client.host if client else "unknown"
+    peer = client.host if client else "unknown"
+    xff = request.headers.get("x-forwarded-for")
+    if not xff or not is_trusted_proxy(peer):
+        return peer
+    hops = [hop.strip() for hop in xff.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
@@ -0,0 +1,78 @@
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import (
+    VISIT_WORKER_BATCH_INTERVAL,
+    VISIT_WORKER_BATCH_TARGET,
+    VISIT_WORKER_QUEUE_DEPTH,
+)
+from app.core.queue import BatchLimits
+
+
+class AdaptiveBatchPolicy(BatchLimits):
+    """
+    Sizes visit batches from the queue backlog and the measured insert cost.
+
+    With a backlog, batches grow towards the backlog (up to `max_size`) for insert
+    efficiency, capped so a flush stays within `target_flush_seconds` at the
+    observed per-row cost. With an empty queue they shrink to `min_size` and the
+    fill interval drops to `min_interval`, so visits reach Postgres quickly.
+    """
+
+    def __init__(
+        self,
+        min_size: int = settings.VISIT_BATCH_MIN_SIZE,
+        max_size: int = settings.VISIT_BATCH_MAX_SIZE,
+        min_interval: float = settings.VISIT_BATCH_MIN_INTERVAL,
+        max_interval: float = settings.VISIT_BATCH_MAX_INTERVAL,
+        target_flush_seconds: float = settings.VISIT_BATCH_TARGET_FLUSH_SECONDS,
+        smoothing: float = 0.3,
+    ):
+        super().__init__(batch_size=min_size, interval=min_interval, max_batch_size=max_size)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_flush_seconds = target_flush_seconds
+        self.smoothing = smoothing
+        self.depth: Optional[int] = None
+        self.seconds_per_row: Optional[float] = None  # EWMA of flush time / rows
+        self._publish()
+
+    def observe_depth(self, depth: Optional[int]):
+        if depth is None:
+            return
+        self.depth = depth
+        VISIT_WORKER_QUEUE_DEPTH.set(depth)
+        self._retune()
+
+    def record_flush(self, rows: int, seconds: float):
+        if rows <= 0:
+            return
+        per_row = seconds / rows
+        if self.seconds_per_row is None:
+            self.seconds_per_row = per_row
+        else:
+            self.seconds_per_row += self.smoothing * (per_row - self.seconds_per_row)
+        self._retune()
+
+    def latency_cap(self) -> int:
+        """Largest batch expected to flush within the target latency."""
+        if not self.seconds_per_row:
+            return self.max_size
+        return max(self.min_size, int(self.target_flush_seconds / self.seconds_per_row))
+
+    def _retune(self):
+        backlog = self.depth or 0
+        target = min(max(backlog, self.min_size), self.max_size, self.latency_cap())
+        # Move part of the way so one noisy sample doesn't swing the batch size
+        size = self.batch_size + self.smoothing * (target - self.batch_size)
+        self.batch_size = max(self.min_size, min(self.max_size, round(size)))
+
+        load = min(backlog / self.max_size, 1.0)
+        self.interval = self.min_interval + load * (self.max_interval - self.min_interval)
+        self._publish()
+
+    def _publish(self):
+        VISIT_WORKER_BATCH_TARGET.set(self.batch_size)
+        VISIT_WORKER_BATCH_INTERVAL.set(self.interval)
@@ -1,7 +1,9 @@
 import asyncio
 import logging
+from app.core.config import settings
 from app.core.db import get_session
-from app.services import URLService
+from app.core.metrics import COUNTER_SYNC_CYCLE_SECONDS, COUNTER_SYNC_KEYS_DRAINED
+from app.services import TrendingService, URLService
 from app.services.base import BaseService
 
 logger = logging.getLogger("CounterSyncWorker")
@@ -17,18 +19,20 @@ class CounterSyncWorker(BaseService):
         self.interval = interval
         self.running = True
         self.retry_count = 0
+        self.trending = TrendingService()
 
     async def start(self):
         """Start the worker with proper Redis connection initialization."""
         try:
             # Ensure Redis connection is established before starting
-            await self.ensure_redis_connection()
+            await self.ensure_cache_connection()
             logger.info(f"CounterSyncWorker started. Interval = {self.interval}s")
 
             while self.running:
                 try:
                     await asyncio.sleep(self.interval)
-                    await self.flush()
+                    with COUNTER_SYNC_CYCLE_SECONDS.time():
+                        await self.flush()
                     self.retry_count = 0  # Reset retry count on success
                 except Exception as e:
                     self.retry_count += 1
@@ -46,12 +50,12 @@ class CounterSyncWorker(BaseService):
             self.running = False
 
     async def flush(self):
-        """Flush visit counts from Redis to database."""
+        """Flush visit counts from the cache backend to the database."""
         try:
             # Ensure Redis connection is active before operations
-            await self.ensure_redis_connection()
+            await self.ensure_cache_connection()
 
-            keys = await self.redis.keys("visits:*")
+            keys = await self.cache.keys("visits:*")
             if not keys:
                 logger.debug("No visit keys found to sync")
                 return
@@ -60,6 +64,7 @@ class CounterSyncWorker(BaseService):
                 us = URLService(session)
                 successful_syncs = 0
                 total_count = 0
+                drained: dict[str, int] = {}
 
                 for key in keys:
                     try:
@@ -67,8 +72,9 @@ class CounterSyncWorker(BaseService):
                             continue
 
                         short_code = key.split("visits:")[1]
-                        count_str = await self.redis.get_and_delete(key)
+                        count_str = await self.cache.get_and_delete(key)
                         count = int(count_str or 0)
+                        COUNTER_SYNC_KEYS_DRAINED.inc()
 
                         if count <= 0:
                             continue
@@ -77,6 +83,7 @@ class CounterSyncWorker(BaseService):
                         if not url:
                             logger.warning(f"URL not found for short_code: {short_code}")
                             continue
+                        drained[short_code] = count
 
                         url.visit_count = (url.visit_count or 0) + count
                         session.add(url)
@@ -90,6 +97,9 @@ class CounterSyncWorker(BaseService):
                         await session.rollback()
                         continue  # Continue with other keys
 
+                # A link's traffic goes on the leaderboard even if its database write failed
+                await self.trending.record(drained)
+
                 if successful_syncs > 0:
                     logger.info(
                         f"Sync completed. {successful_syncs}/{len(keys)} keys processed, {total_count} total visits"
@@ -104,6 +114,11 @@ class CounterSyncWorker(BaseService):
     async def stop(self):
         """Graceful shutdown"""
         self.running = False
-        if hasattr(self.redis, "close"):
-            await self.redis.close()
+        if settings.CACHE_BACKEND == "memory":
+            # Counters held in process memory would be lost with it
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Final flush failed: {e}")
+        await self.cache.close()
         logger.info("CounterSyncWorker stopped")
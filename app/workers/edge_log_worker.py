@@ -0,0 +1,115 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.services import VisitService
+
+logger = logging.getLogger("EdgeLogShipper")
+
+POLL_INTERVAL = 0.5
+MAX_LINES_PER_CYCLE = 5000
+
+
+class EdgeLogShipper:
+    """
+    Tails the nginx access log of edge cache hits and feeds them into the visit pipeline,
+    so redirects served from the microcache are still counted and logged.
+    """
+
+    def __init__(self, path: str = settings.EDGE_ACCESS_LOG_PATH, interval: float = POLL_INTERVAL):
+        self.path = path
+        self.offset_path = f"{path}.offset"
+        self.interval = interval
+        self.running = True
+        self.visit_service = VisitService()
+        self._inode, self._offset = self._load_offset()
+
+    async def start(self):
+        logger.info(f"EdgeLogShipper started. Tailing {self.path}")
+        while self.running:
+            try:
+                shipped = await self.ship()
+                if not shipped:
+                    await asyncio.sleep(self.interval)
+            except Exception as e:
+                logger.error(f"Shipping error: {e}")
+                await asyncio.sleep(self.interval)
+
+    async def ship(self) -> int:
+        """Ship new complete lines from the log; returns how many visits were recorded."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Log was rotated or truncated, start over on the new file
+            self._inode, self._offset = st.st_ino, 0
+        if st.st_size == self._offset:
+            return 0
+
+        lines, new_offset = await asyncio.to_thread(self._read_lines)
+        shipped = 0
+        for line in lines:
+            entry = self._parse(line)
+            if entry is None:
+                continue
+            await self.visit_service.record_visit(**entry)
+            shipped += 1
+
+        self._offset = new_offset
+        self._save_offset()
+        if shipped:
+            logger.info(f"Shipped {shipped} edge cache hits")
+        return shipped
+
+    def _read_lines(self) -> tuple[list[bytes], int]:
+        lines = []
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            offset = self._offset
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written line, pick it up next cycle
+                lines.append(line)
+                offset += len(line)
+                if len(lines) >= MAX_LINES_PER_CYCLE:
+                    break
+        return lines, offset
+
+    @staticmethod
+    def _parse(line: bytes) -> Optional[dict]:
+        try:
+            record = json.loads(line)
+            return {
+                "short_code": record["code"],
+                # The peer nginx saw; a forwarded-for header would be the client's to forge
+                "ip": record.get("ip") or None,
+                "timestamp": datetime.fromisoformat(record["ts"]),
+            }
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Skipping malformed edge log line: {e}, raw={line!r}")
+            return None
+
+    def _load_offset(self) -> tuple[Optional[int], int]:
+        try:
+            with open(self.offset_path) as f:
+                inode, offset = f.read().split()
+                return int(inode), int(offset)
+        except (FileNotFoundError, ValueError):
+            return None, 0
+
+    def _save_offset(self):
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(f"{self._inode} {self._offset}")
+        os.replace(tmp_path, self.offset_path)
+
+    async def stop(self):
+        """Graceful shutdown"""
+        self.running = False
+        logger.info("EdgeLogShipper stopped")
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+
+from sqlalchemy import func
+from sqlmodel import select, update
+
+from app.core.config import settings
+from app.core.db import get_session
+from app.core.metrics import Counter
+from app.models import URL
+from app.services import URLService
+
+logger = logging.getLogger("LinkExpirySweeper")
+
+LINKS_EXPIRED = Counter("links_expired", "Links deactivated by LinkExpirySweeper after expiring")
+
+
+class LinkExpirySweeper:
+    """
+    Deactivates links whose `expires_at` has passed and evicts them from Redis and the
+    edge cache. Candidates come from the partial index of links still pending expiry,
+    a bounded batch per transaction; SKIP LOCKED lets overlapping sweepers split work.
+    """
+
+    def __init__(
+        self,
+        interval: float = settings.LINK_EXPIRY_SWEEP_INTERVAL,
+        batch_size: int = settings.LINK_EXPIRY_BATCH_SIZE,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.running = True
+
+    async def start(self):
+        logger.info(f"LinkExpirySweeper started. Interval = {self.interval}s")
+        while self.running:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Expiry sweep failed: {e!r}")
+            await asyncio.sleep(self.interval)
+
+    async def sweep(self) -> int:
+        """Deactivate every link expired so far; returns how many were deactivated."""
+        total = 0
+        while self.running:
+            async with get_session() as session:
+                expired = (
+                    select(URL.id)
+                    .where(URL.is_active, URL.expires_at.is_not(None), URL.expires_at <= func.now())
+                    .order_by(URL.expires_at)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                result = await session.execute(
+                    update(URL)
+                    .where(URL.id.in_(expired.scalar_subquery()))
+                    .values(is_active=False, updated_at=func.timezone("UTC", func.now()))
+                    .returning(URL.short_code)
+                )
+                codes = list(result.scalars())
+                await session.commit()
+                if codes:
+                    await URLService(session).invalidate(*codes)
+            total += len(codes)
+            LINKS_EXPIRED.inc(len(codes))
+            if len(codes) < self.batch_size:
+                break
+        if total:
+            logger.info(f"Deactivated {total} expired links")
+        return total
+
+    async def stop(self):
+        self.running = False
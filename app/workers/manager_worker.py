@@ -1,33 +1,74 @@
 import asyncio
+import multiprocessing
+import os
 import signal
 import logging
+import time
+from queue import Empty
+from typing import Optional
 
+from app.core.config import settings
+from app.core.metrics import (
+    REGISTRY,
+    Counter,
+    Family,
+    Gauge,
+    Registry,
+    merge_families,
+    render,
+    start_metrics_server,
+)
 from app.workers.visit_worker import VisitWorker
 from app.workers.counter_sync_worker import CounterSyncWorker
+from app.workers.edge_log_worker import EdgeLogShipper
+from app.workers.link_expiry_worker import LinkExpirySweeper
 
 logger = logging.getLogger("WorkerManager")
 
+SUPERVISE_INTERVAL = 1.0
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 30.0
+METRICS_PUSH_INTERVAL = 5.0
+RESTART_BACKOFF_BASE = 1.0
+RESTART_BACKOFF_MAX = 60.0
+STABLE_AFTER = 60.0  # a child that ran this long restarts without accumulated backoff
+STOP_TIMEOUT = 30.0
 
-class WorkerManager:
-    def __init__(self):
-        self.workers = []
-        self.running = True
+# Supervisor-only metrics; children's own metrics are merged in at scrape time
+SUPERVISOR_REGISTRY = Registry()
+WORKER_PROCESSES_ALIVE = Gauge(
+    "worker_processes_alive", "Supervised worker processes running", registry=SUPERVISOR_REGISTRY
+)
+WORKER_RESTARTS = Counter(
+    "worker_restarts",
+    "Worker processes restarted after exiting",
+    labelnames=("worker",),
+    registry=SUPERVISOR_REGISTRY,
+)
 
-    async def start(self):
-        """Start all workers."""
-        # Initialize workers
-        visit_worker = VisitWorker()
-        counter_worker = CounterSyncWorker()
 
-        self.workers = [visit_worker, counter_worker]
+def build_workers(role: str, name: Optional[str] = None) -> list:
+    """Workers run by one process: a visit consumer, or the single-instance workers."""
+    if role == "visits":
+        # Each consumer process keeps its own spill log, found again after a restart by name
+        spill_dir = settings.VISIT_SPILL_DIR and os.path.join(
+            settings.VISIT_SPILL_DIR, name or role
+        )
+        return [VisitWorker(spill_dir=spill_dir)]
+    workers = [CounterSyncWorker(), LinkExpirySweeper()]
+    if settings.EDGE_ACCESS_LOG_PATH:
+        workers.append(EdgeLogShipper())
+    return workers
 
-        # Start workers
-        tasks = []
-        for worker in self.workers:
-            task = asyncio.create_task(self._start_worker(worker))
-            tasks.append(task)
 
-        await asyncio.gather(*tasks)
+class WorkerGroup:
+    """Runs a set of workers as coroutines in the current process."""
+
+    def __init__(self, workers: list):
+        self.workers = workers
+
+    async def start(self):
+        await asyncio.gather(*(self._start_worker(worker) for worker in self.workers))
 
     async def _start_worker(self, worker):
         """Start a single worker with retry logic."""
@@ -49,13 +90,231 @@ class WorkerManager:
 
     async def stop(self):
         """Stop all workers gracefully."""
-        self.running = False
-        logger.info("Stopping workers...")
-
         for worker in self.workers:
             if hasattr(worker, "stop"):
                 await worker.stop()
 
+
+def setup_logging():
+    logging.basicConfig(
+        level=getattr(logging, settings.LOG_LEVEL.upper()),
+        format=settings.LOG_FORMAT,
+    )
+
+
+def run_child(name: str, role: str, heartbeat, metrics_queue):
+    """Entry point of a supervised worker process."""
+    setup_logging()
+    asyncio.run(_child_main(name, role, heartbeat, metrics_queue))
+
+
+async def _child_main(name: str, role: str, heartbeat, metrics_queue):
+    group = WorkerGroup(build_workers(role, name))
+    stopping = asyncio.Event()
+
+    def request_stop():
+        if not stopping.is_set():
+            stopping.set()
+            asyncio.create_task(group.stop())
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, request_stop)
+
+    def push_metrics():
+        try:
+            metrics_queue.put_nowait((name, REGISTRY.collect()))
+        except Exception as e:
+            logger.warning(f"Could not report metrics: {e!r}")
+
+    async def report():
+        last_push = 0.0
+        while True:
+            heartbeat.value = time.time()
+            if time.monotonic() - last_push >= METRICS_PUSH_INTERVAL:
+                push_metrics()
+                last_push = time.monotonic()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    logger.info(f"Worker process {name} ({role}) started, pid {os.getpid()}")
+    reporter = asyncio.create_task(report())
+    try:
+        await group.start()
+    finally:
+        reporter.cancel()
+        push_metrics()
+    if not stopping.is_set():
+        raise SystemExit(1)  # workers gave up; let the supervisor restart us
+
+
+class ChildProcess:
+    """A supervised worker process slot, kept across restarts."""
+
+    def __init__(self, name: str, role: str, context):
+        self.name = name
+        self.role = role
+        self.heartbeat = context.Value("d", 0.0, lock=False)
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.failures = 0
+        self.restarts = 0
+        self.exitcode: Optional[int] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def heartbeat_age(self) -> float:
+        return time.time() - self.heartbeat.value
+
+    def status(self) -> dict:
+        return {
+            "role": self.role,
+            "pid": self.process.pid if self.alive else None,
+            "alive": self.alive,
+            "restarts": self.restarts,
+            "last_exit_code": self.exitcode,
+            "heartbeat_age": round(self.heartbeat_age(), 1) if self.alive else None,
+        }
+
+
+class WorkerManager:
+    """
+    Supervises worker processes: `visit_processes` competing visit consumers (one
+    per core by default) and a single process for the workers that must not run
+    twice (counter sync, edge log shipping). Crashed or hung children are
+    restarted with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        visit_processes: int = settings.VISIT_WORKER_PROCESSES,
+        serve_metrics: bool = True,
+    ):
+        self._context = multiprocessing.get_context("spawn")
+        count = visit_processes or os.cpu_count() or 1
+        self.children = [
+            ChildProcess(f"visits-{i}", "visits", self._context) for i in range(count)
+        ] + [ChildProcess("singletons", "singletons", self._context)]
+        self.metrics_queue = self._context.Queue()
+        self.snapshots: dict[str, list[Family]] = {}
+        self.running = True
+        self.serve_metrics = serve_metrics
+        self.metrics_server = None
+        self._stopped = asyncio.Event()
+
+    async def start(self):
+        """Start all worker processes and supervise them until stopped."""
+        if settings.embedded_workers:
+            logger.warning(
+                "In-process cache/queue backends are private to the web process; "
+                "these worker processes will not see its data"
+            )
+
+        if self.serve_metrics and settings.WORKER_METRICS_PORT:
+            self.metrics_server = await start_metrics_server(
+                "0.0.0.0", settings.WORKER_METRICS_PORT, registry=self, health=self.health
+            )
+
+        for child in self.children:
+            self._spawn(child)
+
+        while self.running:
+            self._supervise()
+            self._drain_metrics()
+            try:
+                await asyncio.wait_for(self._stopped.wait(), SUPERVISE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, child: ChildProcess):
+        child.heartbeat.value = time.time()  # grace period while the child imports
+        child.process = self._context.Process(
+            target=run_child,
+            args=(child.name, child.role, child.heartbeat, self.metrics_queue),
+            name=f"worker-{child.name}",
+        )
+        child.process.start()
+        child.started_at = time.monotonic()
+        logger.info(f"Started {child.name} (pid {child.process.pid})")
+
+    def _supervise(self):
+        now = time.monotonic()
+        for child in self.children:
+            if child.alive:
+                if child.heartbeat_age() > HEARTBEAT_TIMEOUT:
+                    logger.error(
+                        f"{child.name} (pid {child.process.pid}) missed heartbeats for "
+                        f"{HEARTBEAT_TIMEOUT:.0f}s, killing it"
+                    )
+                    child.process.kill()
+                continue
+
+            if child.process is not None:
+                child.process.join(0)
+                child.exitcode = child.process.exitcode
+                child.process = None
+                child.failures = 0 if now - child.started_at >= STABLE_AFTER else child.failures + 1
+                delay = min(RESTART_BACKOFF_BASE * 2**child.failures, RESTART_BACKOFF_MAX)
+                child.restart_at = now + delay
+                logger.error(
+                    f"{child.name} exited with code {child.exitcode}, restarting in {delay:.0f}s"
+                )
+
+            if now >= child.restart_at:
+                child.restarts += 1
+                WORKER_RESTARTS.labels(worker=child.name).inc()
+                self._spawn(child)
+
+        WORKER_PROCESSES_ALIVE.set(sum(child.alive for child in self.children))
+
+    def _drain_metrics(self):
+        while True:
+            try:
+                name, families = self.metrics_queue.get_nowait()
+            except Empty:
+                return
+            self.snapshots[name] = families
+
+    def render(self) -> str:
+        """Supervisor metrics plus each child's last snapshot, labelled by worker."""
+        self._drain_metrics()
+        return render([*SUPERVISOR_REGISTRY.collect(), *merge_families(self.snapshots)])
+
+    def health(self) -> dict:
+        workers = {child.name: child.status() for child in self.children}
+        healthy = all(
+            child.alive and child.heartbeat_age() <= HEARTBEAT_TIMEOUT for child in self.children
+        )
+        return {"status": "healthy" if healthy else "degraded", "workers": workers}
+
+    def request_stop(self):
+        """Make `start` return; safe to call from a signal handler."""
+        self.running = False
+        self._stopped.set()
+
+    async def stop(self):
+        """Stop all worker processes gracefully."""
+        self.request_stop()
+        logger.info("Stopping workers...")
+
+        for child in self.children:
+            if child.alive:
+                child.process.terminate()  # SIGTERM: the child flushes and exits
+
+        deadline = time.monotonic() + STOP_TIMEOUT
+        for child in self.children:
+            if child.process is None:
+                continue
+            await asyncio.to_thread(child.process.join, max(deadline - time.monotonic(), 0))
+            if child.process.is_alive():
+                logger.warning(f"{child.name} did not stop in {STOP_TIMEOUT:.0f}s, killing it")
+                child.process.kill()
+
+        if self.metrics_server:
+            self.metrics_server.close()
+
         logger.info("All workers stopped")
 
 
@@ -63,17 +322,16 @@ async def main():
     manager = WorkerManager()
 
     # Setup signal handlers
-    def signal_handler(signum, frame):
-        asyncio.create_task(manager.stop())
-
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, manager.request_stop)
 
     try:
         await manager.start()
-    except KeyboardInterrupt:
+    finally:
         await manager.stop()
 
 
 if __name__ == "__main__":
+    setup_logging()
     asyncio.run(main())
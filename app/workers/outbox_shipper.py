@@ -0,0 +1,101 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from app.core.metrics import Counter, Gauge
+from app.core.outbox import Outbox, VisitOutbox, visit_outbox
+from app.core.queue import queue_client, retry_delay
+
+logger = logging.getLogger("OutboxShipper")
+
+SHIP_BATCH = 500
+SHIP_INTERVAL = 0.2
+PUBLISH_TIMEOUT = 10.0
+ADOPT_INTERVAL = 30.0
+STOP_TIMEOUT = 5.0
+
+OUTBOX_SHIPPED = Counter("visit_outbox_shipped", "Visit events forwarded from the outbox")
+OUTBOX_BACKLOG = Gauge("visit_outbox_backlog_bytes", "Outbox bytes waiting for the broker")
+
+
+class OutboxShipper:
+    """
+    Forwards this web process's visit outbox to the queue in batches, advancing the
+    outbox cursor only once the broker has confirmed every message in the batch.
+    Also ships and removes the outboxes of web processes that died with a backlog.
+    """
+
+    def __init__(self, outbox: VisitOutbox = visit_outbox, queue_name: str = "visits"):
+        self.outbox = outbox
+        self.queue_name = queue_name
+        self.queue = queue_client
+        self.running = True
+        self._next_adopt = 0.0
+
+    async def start(self):
+        logger.info("OutboxShipper started")
+        failures = 0
+        while self.running:
+            try:
+                if time.monotonic() >= self._next_adopt:
+                    self._next_adopt = time.monotonic() + ADOPT_INTERVAL
+                    await self.adopt_orphans()
+                shipped = await self.ship(self.outbox.outbox)
+                OUTBOX_BACKLOG.set(self.outbox.outbox.backlog())
+                failures = 0
+                if not shipped:
+                    await asyncio.sleep(SHIP_INTERVAL)
+            except Exception as e:
+                failures += 1
+                logger.warning(
+                    f"Broker unavailable, {self.outbox.outbox.backlog()} bytes of visits "
+                    f"wait in the outbox: {e!r}"
+                )
+                await asyncio.sleep(retry_delay(failures))
+
+    async def ship(self, outbox: Optional[Outbox]) -> int:
+        """Publish one batch from `outbox`; returns how many events were shipped."""
+        if outbox is None:
+            return 0
+        records, position = outbox.read(SHIP_BATCH)
+        if records:
+            await self.queue.connect()
+            # Publishes await their confirms concurrently rather than one round trip each
+            await asyncio.wait_for(
+                asyncio.gather(
+                    *(self.queue.publish(self.queue_name, json.loads(r)) for r in records)
+                ),
+                PUBLISH_TIMEOUT,
+            )
+            outbox.commit(position)
+            OUTBOX_SHIPPED.inc(len(records))
+        return len(records)
+
+    async def adopt_orphans(self):
+        """Ship what dead web processes left in their outboxes, then delete them."""
+        own = self.outbox.outbox.directory if self.outbox.outbox else None
+        for directory in Outbox.orphans(self.outbox.root, exclude=own):
+            orphan = Outbox.open(directory)
+            if orphan is None:
+                continue  # its process is alive
+            try:
+                shipped = 0
+                while count := await self.ship(orphan):
+                    shipped += count
+                orphan.remove()
+                if shipped:
+                    logger.info(f"Shipped {shipped} visits from orphaned outbox {directory}")
+            finally:
+                orphan.close()
+
+    async def stop(self):
+        """Last attempt to empty the outbox; call once the `start` task is cancelled."""
+        self.running = False
+        try:
+            while await asyncio.wait_for(self.ship(self.outbox.outbox), STOP_TIMEOUT):
+                pass
+        except Exception as e:
+            logger.warning(f"Outbox not fully shipped at shutdown, it will be adopted: {e!r}")
+        logger.info("OutboxShipper stopped")
@@ -1,36 +1,63 @@
 import asyncio
+import ipaddress
 import logging
 import json
+import time
+from typing import Optional
+from app.core.config import settings
 from app.core.db import get_session
-from app.core.queue import rabbitmq_client
+from app.core.geoip import GeoIPResolver
+from app.core.metrics import (
+    VISIT_WORKER_BATCH_SIZE,
+    VISIT_WORKER_FLUSH_SECONDS,
+    VISIT_WORKER_IN_FLIGHT,
+    VISIT_WORKER_SPILL_BYTES,
+    VISIT_WORKER_SPILLED,
+    VISIT_WORKER_VISITS_WRITTEN,
+)
+from app.core.queue import BatchLimits, queue_client, retry_delay
+from app.core.segment_log import SegmentLog
 from app.schemas.visit_message import VisitMessage
 from app.services import URLService
+from app.services.visitor_service import UniqueVisitorService, VisitorHit
 from app.models import Visit
+from app.workers.batch_policy import AdaptiveBatchPolicy
 
 logger = logging.getLogger("VisitWorker")
 
-BATCH_SIZE = 200
-BATCH_INTERVAL = 0.8
-MAX_BUFFER_SIZE = 1000
+SPILL_REPLAY_INTERVAL = 1.0
 
 
 class VisitWorker:
-    def __init__(self):
-        self.rabbitmq = rabbitmq_client
-        self.buffer: list[VisitMessage] = []
-        self._flush_task = None
-        self._consuming = True
+    def __init__(self, policy: Optional[BatchLimits] = None, spill_dir: Optional[str] = None):
+        # Batch size and fill interval follow the queue backlog unless fixed limits are given
+        self.policy = policy or AdaptiveBatchPolicy()
+        self.queue = queue_client
+        self.geoip = GeoIPResolver()
+        self.visitors = UniqueVisitorService()
+        # Batches that keep failing to commit go to disk and are acked, see _spill
+        self.spill = SegmentLog(spill_dir) if spill_dir else None
+        self._failures = 0
+        self._depth_task: Optional[asyncio.Task] = None
+        self._replay_task: Optional[asyncio.Task] = None
+        self._sketch_task: Optional[asyncio.Task] = None
 
     async def start(self):
         """Start the worker with connection retry logic."""
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                await self.rabbitmq.connect()
+                await self.queue.connect()
                 logger.info("VisitWorker started. Listening for visit logs...")
-
-                self._flush_task = asyncio.create_task(self._periodic_flush())
-                await self.rabbitmq.consume("visits", self._handle_message)
+                if self._depth_task is None:
+                    self._depth_task = asyncio.create_task(self._monitor_depth())
+                if self.spill and self._replay_task is None:
+                    self._replay_task = asyncio.create_task(self._replay_spill())
+                if self._sketch_task is None:
+                    self._sketch_task = asyncio.create_task(self._persist_sketches())
+
+                # Batches are acknowledged only once their visits are committed
+                await self.queue.consume_batches("visits", self._handle_batch, self.policy)
                 break  # Success
             except Exception as e:
                 logger.error(f"Connection attempt {attempt + 1} failed: {e}")
@@ -40,110 +67,167 @@ class VisitWorker:
                     logger.error("Max connection retries exceeded")
                     raise
 
-    async def _handle_message(self, message_body: bytes):
-        """Handle incoming messages using Pydantic schema."""
-        try:
-            payload = json.loads(message_body.decode("utf-8"))
-            msg = VisitMessage.model_validate(payload)  # ✅ validate & convert
-
-            if len(self.buffer) >= MAX_BUFFER_SIZE:
-                logger.warning("Buffer full, forcing flush")
-                await self.flush()
+    async def _monitor_depth(self):
+        """Sample the queue backlog so the batch policy can follow it."""
+        while True:
+            try:
+                self.policy.observe_depth(await self.queue.depth("visits"))
+            except Exception as e:
+                logger.debug(f"Queue depth unavailable: {e!r}")
+            await asyncio.sleep(settings.VISIT_QUEUE_DEPTH_INTERVAL)
 
-            self.buffer.append(msg)
-            if len(self.buffer) >= BATCH_SIZE:
-                await self.flush()
+    async def _persist_sketches(self):
+        """Periodically copy the day sketches this worker touched to Postgres."""
+        while True:
+            await asyncio.sleep(settings.UNIQUE_VISITORS_PERSIST_INTERVAL)
+            try:
+                await self.visitors.persist()
+            except Exception as e:
+                logger.warning(f"Persisting visitor sketches failed: {e!r}")
 
+    @staticmethod
+    def _parse(message_body: bytes) -> VisitMessage | None:
+        try:
+            payload = json.loads(message_body.decode("utf-8"))
+            return VisitMessage.model_validate(payload)  # ✅ validate & convert
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}, raw={message_body}")
         except Exception as e:
-            logger.error(f"Error handling message: {e}, raw={message_body}")
+            logger.error(f"Invalid visit message: {e}, raw={message_body}")
+        return None
 
-    async def _periodic_flush(self):
-        """Periodic flush with error handling."""
-        while self._consuming:
+    async def _handle_batch(self, bodies: list[bytes]):
+        """Write a delivered batch; raising leaves it unacknowledged for redelivery."""
+        VISIT_WORKER_IN_FLIGHT.set(len(bodies))
+        started = time.perf_counter()
+        try:
+            msgs = [msg for msg in map(self._parse, bodies) if msg]
+            if not msgs:
+                return
+            # Nothing overtakes visits already waiting on disk
+            if self.spill and self.spill.pending and self._spill(msgs):
+                return
+            try:
+                await self._write_visits(msgs)
+            except Exception:
+                self._failures += 1
+                if self._failures >= settings.VISIT_SPILL_AFTER_FAILURES and self._spill(msgs):
+                    return
+                raise
+            self._failures = 0
+            self.policy.record_flush(len(bodies), time.perf_counter() - started)
+        finally:
+            VISIT_WORKER_IN_FLIGHT.set(0)
+
+    def _spill(self, msgs: list[VisitMessage]) -> bool:
+        """
+        Append a batch to the spill log so it can be acked; False when spilling is off
+        or the log is full, leaving the transport to redeliver it.
+        """
+        if self.spill is None or self.spill.size() >= settings.VISIT_SPILL_MAX_BYTES:
+            return False
+        self.spill.append(json.dumps([msg.model_dump(mode="json") for msg in msgs]).encode())
+        VISIT_WORKER_SPILLED.inc(len(msgs))
+        VISIT_WORKER_SPILL_BYTES.set(self.spill.size())
+        return True
+
+    async def _replay_spill(self):
+        """Write spilled batches to Postgres in the order they were spilled."""
+        failures = 0
+        while True:
+            records, position = self.spill.read(1)
+            if not records:
+                await asyncio.sleep(SPILL_REPLAY_INTERVAL)
+                continue
             try:
-                await asyncio.sleep(BATCH_INTERVAL)
-                if self.buffer:
-                    await self.flush()
-            except asyncio.CancelledError:
-                break
+                msgs = [VisitMessage.model_validate(m) for m in json.loads(records[0])]
+            except ValueError as e:
+                logger.error(f"Dropping unreadable spilled batch: {e}")
+                self.spill.commit(position)
+                continue
+            try:
+                await self._write_visits(msgs)
             except Exception as e:
-                logger.error(f"Periodic flush error: {e}")
-
-    async def flush(self):
-        """Flush buffer to database with transaction handling."""
-        if not self.buffer:
-            return
+                failures += 1
+                logger.warning(f"Spill replay failed ({failures} in a row): {e}")
+                await asyncio.sleep(retry_delay(failures))
+                continue
+            failures = 0
+            self.spill.commit(position)
+            VISIT_WORKER_SPILL_BYTES.set(self.spill.size())
+
+    @staticmethod
+    def _inet(ip: Optional[str]) -> Optional[str]:
+        """The address if it is one; ip_address is an inet column, so junk would fail the batch."""
+        try:
+            return str(ipaddress.ip_address(ip)) if ip else None
+        except ValueError:
+            return None
 
-        buffer_copy = self.buffer.copy()
-        self.buffer.clear()
+    async def _write_visits(self, msgs: list[VisitMessage]) -> int:
+        """Insert visits in one transaction; raises if the commit fails."""
+        VISIT_WORKER_BATCH_SIZE.observe(len(msgs))
+        started = time.perf_counter()
 
         try:
+            await self.geoip.refresh()
+            locations = self.geoip.lookup_many([msg.ip for msg in msgs])
+
             async with get_session() as session:
                 us = URLService(session)
-                visits = []
+                visits, hits = [], []
                 processed_count, errors = 0, 0
 
-                for msg in buffer_copy:
-                    try:
-                        if not isinstance(msg, VisitMessage):
-                            logger.error(f"Invalid buffer item: {msg}")
-                            errors += 1
-                            continue
-
-                        url = await us.get_by_code(msg.short_code)
-                        if not url:
-                            logger.warning(f"URL not found for short_code: {msg.short_code}")
-                            errors += 1
-                            continue
-
-                        visit = Visit(
-                            url_id=url.id,
-                            ip_address=msg.ip,
-                            visited_at=msg.timestamp,  # already a datetime
-                        )
-                        visits.append(visit)
-                        processed_count += 1
-
-                    except Exception as e:
-                        logger.error(f"Error processing visit record: {e}, msg={msg}")
+                # Lookup errors propagate: the whole batch is retried rather than acked
+                for msg, (country, asn) in zip(msgs, locations):
+                    url = await us.get_by_code(msg.short_code)
+                    if not url:
+                        logger.warning(f"URL not found for short_code: {msg.short_code}")
                         errors += 1
                         continue
 
+                    visit = Visit(
+                        url_id=url.id,
+                        ip_address=self._inet(msg.ip),
+                        country=country,
+                        asn=asn,
+                        visited_at=msg.timestamp,  # already a datetime
+                    )
+                    visits.append(visit)
+                    hits.append(VisitorHit(url.id, url.short_code, visit.ip_address, msg.timestamp))
+                    processed_count += 1
+
                 if visits:
                     try:
                         session.add_all(visits)
                         await session.commit()
-                        logger.info(
-                            f"Flushed {len(visits)} visits to DB "
-                            f"(processed {processed_count}/{len(buffer_copy)}, errors: {errors})"
-                        )
                     except Exception as e:
                         await session.rollback()
                         logger.error(f"Database commit error: {e}")
-                        self.buffer.extend(buffer_copy)  # retry
-                else:
-                    logger.warning(
-                        f"No valid visits to flush (errors: {errors}/{len(buffer_copy)})"
+                        raise
+                    VISIT_WORKER_VISITS_WRITTEN.inc(len(visits))
+                    # Best effort: the cache client absorbs its own failures
+                    await self.visitors.record(hits)
+                    logger.info(
+                        f"Flushed {len(visits)} visits to DB "
+                        f"(processed {processed_count}/{len(msgs)}, errors: {errors})"
                     )
-
-        except Exception as e:
-            logger.error(f"Flush error: {e}")
-            self.buffer.extend(buffer_copy)
+                else:
+                    logger.warning(f"No valid visits to flush (errors: {errors}/{len(msgs)})")
+                return len(visits)
+        finally:
+            VISIT_WORKER_FLUSH_SECONDS.observe(time.perf_counter() - started)
 
     async def stop(self):
-        """Graceful shutdown."""
-        self._consuming = False
-        if self._flush_task:
-            self._flush_task.cancel()
-            try:
-                await self._flush_task
-            except asyncio.CancelledError:
-                pass
-
-        if self.buffer:
-            await self.flush()
-
-        await self.rabbitmq.close()
+        """Graceful shutdown: the transport settles the batch in hand before closing."""
+        for task in (self._depth_task, self._replay_task, self._sketch_task):
+            if task:
+                task.cancel()
+        try:
+            await self.visitors.persist()
+        except Exception as e:
+            logger.error(f"Final visitor sketch persist failed: {e!r}")
+        await self.queue.close()
+        if self.spill:
+            self.spill.close()
         logger.info("VisitWorker stopped")
@@ -0,0 +1,168 @@
+"""
+Cache and queue backend latency: Redis vs the in-process cache, RabbitMQ vs Redis
+Streams vs the in-process queue.
+
+Times the operations the request path issues (cache get/set/incr, visit publish)
+and the publish-to-handler latency seen by the visit worker, against the
+benchmark services (`docker compose -f benchmarks/docker-compose.yml up -d`).
+The memory backends need no services:
+
+    python -m benchmarks.backends --ops 5000 --messages 5000 --rate 2000
+    python -m benchmarks.backends --cache memory --queue memory
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+from benchmarks.common import BENCH_ENV, save_results, summarize_latencies
+
+# Settings are read at import time, so point the app at the bench services first
+for _key, _value in BENCH_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    names = lambda s: [x for x in s.split(",") if x]  # noqa: E731
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--cache", type=names, default=["redis", "memory"])
+    parser.add_argument("--queue", type=names, default=["rabbitmq", "redis_streams", "memory"])
+    parser.add_argument("--ops", type=int, default=5000, help="operations per cache op type")
+    parser.add_argument("--messages", type=int, default=5000, help="messages per queue backend")
+    parser.add_argument("--rate", type=float, default=2000, help="publish rate, messages/sec")
+    parser.add_argument("--label", default="")
+    return parser.parse_args(argv)
+
+
+def make_cache(name: str):
+    from app.core.cache import MemoryCache, RedisClient
+
+    return RedisClient(os.environ["REDIS_URL"]) if name == "redis" else MemoryCache()
+
+
+def make_queue(name: str):
+    from app.core.queue import InProcessQueue, RabbitMQClient, RedisStreamsQueue
+
+    if name == "rabbitmq":
+        return RabbitMQClient(os.environ["RABBITMQ_URL"])
+    if name == "redis_streams":
+        return RedisStreamsQueue(os.environ["REDIS_URL"])
+    return InProcessQueue()
+
+
+async def timed(operation, count: int) -> list[float]:
+    latencies = []
+    for i in range(count):
+        started = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def bench_cache(name: str, ops: int) -> dict:
+    cache = make_cache(name)
+    await cache.connect()
+    try:
+        results = {
+            "set": await timed(lambda i: cache.set(f"bench:short:{i}", "https://e.x/"), ops),
+            "get": await timed(lambda i: cache.get(f"bench:short:{i}"), ops),
+            "incr": await timed(lambda i: cache.incr(f"bench:visits:{i % 100}"), ops),
+        }
+        for i in range(ops):
+            await cache.delete(f"bench:short:{i}")
+        for i in range(100):
+            await cache.delete(f"bench:visits:{i}")
+    finally:
+        await cache.close()
+    return {"backend": name, **{op: summarize_latencies(v) for op, v in results.items()}}
+
+
+async def bench_queue(name: str, messages: int, rate: float) -> dict:
+    queue = make_queue(name)
+    queue_name = "bench_backends"
+    await queue.connect()
+    end_to_end: list[float] = []
+    done = asyncio.Event()
+
+    async def handler(body: bytes):
+        end_to_end.append(time.perf_counter() - json.loads(body)["sent"])
+        if len(end_to_end) >= messages:
+            done.set()
+
+    if hasattr(queue, "consume_batches"):
+        from app.core.queue import BatchLimits
+
+        # The path VisitWorker takes: batched reads, acknowledged per batch
+
+        async def handle_batch(bodies: list[bytes]):
+            for body in bodies:
+                await handler(body)
+
+        consumer = asyncio.create_task(
+            queue.consume_batches(queue_name, handle_batch, BatchLimits(200, 0.05))
+        )
+    else:
+        consumer = asyncio.create_task(queue.consume(queue_name, handler))
+    publish: list[float] = []
+    interval = 1 / rate
+    started = time.perf_counter()
+    try:
+        for i in range(messages):
+            delay = started + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            sent = time.perf_counter()
+            await queue.publish(queue_name, {"short_code": "bench", "sent": sent})
+            publish.append(time.perf_counter() - sent)
+        await asyncio.wait_for(done.wait(), timeout=30)
+    finally:
+        consumer.cancel()
+        try:
+            await consumer
+        except asyncio.CancelledError:
+            pass
+        await queue.close()
+
+    return {
+        "backend": name,
+        "publish": summarize_latencies(publish),
+        "end_to_end": summarize_latencies(end_to_end),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    cache_results, queue_results = [], []
+    for name in args.cache:
+        result = await bench_cache(name, args.ops)
+        cache_results.append(result)
+        print(
+            f"cache {name:<13} "
+            + "  ".join(
+                f"{op} p50={result[op]['p50_ms']}ms p99={result[op]['p99_ms']}ms"
+                for op in ("get", "set", "incr")
+            )
+        )
+    for name in args.queue:
+        result = await bench_queue(name, args.messages, args.rate)
+        queue_results.append(result)
+        print(
+            f"queue {name:<13} publish p50={result['publish']['p50_ms']}ms "
+            f"p99={result['publish']['p99_ms']}ms  "
+            f"end-to-end p50={result['end_to_end']['p50_ms']}ms "
+            f"p99={result['end_to_end']['p99_ms']}ms"
+        )
+    return {"cache": cache_results, "queue": queue_results}
+
+
+def main(argv: Optional[list[str]] = None):
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    path = save_results("backends", vars(args), results)
+    print(f"results written to {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
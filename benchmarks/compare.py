@@ -0,0 +1,62 @@
+"""
+Compare two benchmark result files (e.g. from two commits).
+
+    python -m benchmarks.compare OLD.json NEW.json [--fail-above 10]
+
+Exits non-zero when any latency percentile regresses by more than --fail-above percent.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+def flatten(value, prefix: str = "") -> Iterator[tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for i, child in enumerate(value):
+            yield from flatten(child, f"{prefix}[{i}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def is_latency(key: str) -> bool:
+    return key.rsplit(".", 1)[-1] in ("p50_ms", "p95_ms", "p99_ms")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files")
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--fail-above", type=float, default=None, help="max latency regression %")
+    args = parser.parse_args(argv)
+
+    old, new = (json.loads(p.read_text()) for p in (args.old, args.new))
+    if old["kind"] != new["kind"]:
+        print(f"warning: comparing {old['kind']} results with {new['kind']} results")
+    print(f"old: {old['git']['commit'][:10]} {old['git']['subject']}")
+    print(f"new: {new['git']['commit'][:10]} {new['git']['subject']}")
+
+    old_values = dict(flatten(old["results"]))
+    regressions = []
+    for key, new_value in flatten(new["results"]):
+        old_value = old_values.get(key)
+        if old_value is None:
+            continue
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        print(f"{key:<55} {old_value:>12.3f} {new_value:>12.3f} {change:>+8.1f}%")
+        if args.fail_above is not None and is_latency(key) and change > args.fail_above:
+            regressions.append(key)
+
+    if regressions:
+        print(f"latency regressions above {args.fail_above}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
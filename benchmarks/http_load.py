@@ -0,0 +1,253 @@
+"""
+HTTP load test for the API.
+
+Starts `app.main:app` under uvicorn against the benchmark services
+(`docker compose -f benchmarks/docker-compose.yml up -d`), seeds links through
+`/shorten`, then drives an open-loop, fixed-rate mix of Zipf-distributed
+redirects and `/shorten` calls. Latency is measured from each request's
+scheduled start, so a stalled server cannot hide queueing delay.
+
+    python -m benchmarks.http_load --rate 500 --duration 30
+    python -m benchmarks.compare benchmarks/results/http-<old>.json benchmarks/results/http-<new>.json
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from typing import Optional
+
+import httpx
+
+from benchmarks.common import (
+    ROOT,
+    OpsProbe,
+    ZipfSampler,
+    bench_env,
+    save_results,
+    summarize_latencies,
+)
+
+API = "/api/v1"
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=300, help="requests per second")
+    parser.add_argument("--duration", type=float, default=20, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3, help="seconds of unmeasured load")
+    parser.add_argument("--links", type=int, default=1000, help="links seeded before the run")
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="Zipf exponent for redirects")
+    parser.add_argument("--shorten-ratio", type=float, default=0.05, help="share of /shorten")
+    parser.add_argument("--concurrency", type=int, default=256, help="max in-flight requests")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--uvicorn-workers", type=int, default=1)
+    parser.add_argument(
+        "--base-url", default=None, help="benchmark an already running server instead"
+    )
+    parser.add_argument("--with-workers", action="store_true", help="also run the worker manager")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="free-form label stored with the results")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="extra environment for the server under test (repeatable)",
+    )
+    return parser.parse_args(argv)
+
+
+class ServerProcess:
+    """uvicorn (and optionally the worker manager) as child processes."""
+
+    def __init__(self, args: argparse.Namespace, env: dict[str, str]):
+        self.args = args
+        self.env = env
+        self.processes: list[subprocess.Popen] = []
+
+    async def __aenter__(self) -> str:
+        cmd = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(self.args.port),
+            "--workers",
+            str(self.args.uvicorn_workers),
+            "--no-access-log",
+            "--log-level",
+            "warning",
+        ]
+        self.processes.append(subprocess.Popen(cmd, env=self.env, cwd=ROOT))
+        if self.args.with_workers:
+            self.processes.append(
+                subprocess.Popen(
+                    [sys.executable, "app/workers/manager_worker.py"], env=self.env, cwd=ROOT
+                )
+            )
+        base_url = f"http://127.0.0.1:{self.args.port}"
+        await wait_until_ready(base_url)
+        return base_url
+
+    async def __aexit__(self, *exc):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready in {timeout}s")
+
+
+async def seed_links(client: httpx.AsyncClient, count: int, run_id: str) -> list[str]:
+    semaphore = asyncio.Semaphore(50)
+
+    async def create(i: int) -> str:
+        async with semaphore:
+            resp = await client.post(
+                f"{API}/shorten", json={"url": f"https://bench.example/{run_id}/{i}"}
+            )
+            resp.raise_for_status()
+            return resp.json()["short_code"]
+
+    return list(await asyncio.gather(*(create(i) for i in range(count))))
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, codes: list[str], args: argparse.Namespace):
+        self.client = client
+        self.codes = codes
+        self.args = args
+        self.sampler = ZipfSampler(len(codes), args.zipf_s, seed=args.seed)
+        self.random = random.Random(args.seed)
+        self.semaphore = asyncio.Semaphore(args.concurrency)
+        self.latencies: dict[str, list[float]] = {"redirect": [], "shorten": []}
+        self.errors: dict[str, int] = {}
+        self.sent = 0
+
+    async def _request(self, kind: str, scheduled: float, record: bool):
+        async with self.semaphore:
+            try:
+                if kind == "redirect":
+                    code = self.codes[self.sampler.sample()]
+                    resp = await self.client.get(f"{API}/{code}")
+                    ok = resp.status_code == 307
+                else:
+                    url = f"https://bench.example/new/{uuid.uuid4().hex}"
+                    resp = await self.client.post(f"{API}/shorten", json={"url": url})
+                    ok = resp.status_code == 200
+                error = None if ok else f"{kind}:{resp.status_code}"
+            except httpx.HTTPError as e:
+                error = f"{kind}:{type(e).__name__}"
+        if not record:
+            return
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        else:
+            self.latencies[kind].append(time.perf_counter() - scheduled)
+
+    async def run(self, duration: float, record: bool) -> float:
+        """Issue requests at a fixed rate for `duration` seconds; returns elapsed time."""
+        interval = 1 / self.args.rate
+        tasks = []
+        started = time.perf_counter()
+        i = 0
+        while True:
+            scheduled = started + i * interval
+            if scheduled - started >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            kind = "shorten" if self.random.random() < self.args.shorten_ratio else "redirect"
+            tasks.append(asyncio.create_task(self._request(kind, scheduled, record)))
+            i += 1
+        await asyncio.gather(*tasks)
+        if record:
+            self.sent += i
+        return time.perf_counter() - started
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    env = bench_env(**extra_env)
+    probe = OpsProbe(env["REDIS_URL"], env["DATABASE_URL"])
+
+    server = ServerProcess(args, env) if not args.base_url else None
+    base_url = await server.__aenter__() if server else args.base_url
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=64)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=10) as client:
+            codes = await seed_links(client, args.links, uuid.uuid4().hex[:8])
+            generator = LoadGenerator(client, codes, args)
+
+            if args.warmup:
+                await generator.run(args.warmup, record=False)
+
+            before = await probe.snapshot()
+            elapsed = await generator.run(args.duration, record=True)
+            await asyncio.sleep(1.5)  # let Postgres publish its per-backend statistics
+            after = await probe.snapshot()
+    finally:
+        if server:
+            await server.__aexit__(None, None, None)
+
+    completed = sum(len(v) for v in generator.latencies.values())
+    all_latencies = [v for values in generator.latencies.values() for v in values]
+    return {
+        "requests_sent": generator.sent,
+        "requests_ok": completed,
+        "errors": generator.errors,
+        "elapsed_s": round(elapsed, 3),
+        "target_rps": args.rate,
+        "achieved_rps": round(completed / elapsed, 1) if elapsed else 0,
+        "latency": {
+            "all": summarize_latencies(all_latencies),
+            "redirect": summarize_latencies(generator.latencies["redirect"]),
+            "shorten": summarize_latencies(generator.latencies["shorten"]),
+        },
+        "ops": OpsProbe.delta(before, after, generator.sent),
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    args = parse_args(argv)
+    results = asyncio.run(run_benchmark(args))
+    config = vars(args)
+    path = save_results("http", config, results)
+
+    latency = results["latency"]
+    print(
+        f"achieved {results['achieved_rps']} rps (target {args.rate}), errors={results['errors']}"
+    )
+    for kind in ("redirect", "shorten"):
+        summary = latency[kind]
+        print(
+            f"{kind:>8}: n={summary['count']} p50={summary['p50_ms']}ms "
+            f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms"
+        )
+    print(f"ops per request: {results['ops']['per_request']}")
+    print(f"results written to {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Visit table layout: bytes per row and insert throughput, legacy vs compact.
+
+Creates both layouts side by side in a scratch schema of the benchmark Postgres
+(`docker compose -f benchmarks/docker-compose.yml up -d`), inserts the same
+synthetic visits into each in worker-sized batches, and reports rows/sec and
+heap, index and total bytes per row.
+
+    python -m benchmarks.visit_schema --rows 200000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from benchmarks.common import BENCH_ENV, save_results
+
+# Settings are read at import time, so point the app at the bench services first
+for _key, _value in BENCH_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+SCHEMA = "bench_visit_schema"
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--links", type=int, default=1000, help="distinct url_id values")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="")
+    return parser.parse_args(argv)
+
+
+def build_tables():
+    import sqlalchemy as sa
+    from sqlalchemy.dialects.postgresql import INET
+
+    metadata = sa.MetaData(schema=SCHEMA)
+    legacy = sa.Table(
+        "visit_legacy",
+        metadata,
+        sa.Column("deleted_at", sa.DateTime()),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("uuid", sa.Uuid(), nullable=False, unique=True, index=True),
+        sa.Column("id", sa.Integer(), primary_key=True, index=True),
+        sa.Column("url_id", sa.Integer(), nullable=False),
+        sa.Column("ip_address", sa.String()),
+    )
+    compact = sa.Table(
+        "visit_compact",
+        metadata,
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("visited_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("asn", sa.BigInteger()),
+        sa.Column("url_id", sa.Integer(), nullable=False, index=True),
+        sa.Column("ip_address", INET()),
+        sa.Column("country", sa.String(2)),
+    )
+    return metadata, legacy, compact
+
+
+def synthetic_visits(args: argparse.Namespace) -> list[dict]:
+    rnd = random.Random(args.seed)
+    start = datetime.now(timezone.utc)
+    return [
+        {
+            "url_id": rnd.randrange(args.links),
+            "ip": f"{rnd.randrange(1, 224)}.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(256)}",
+            "at": start + timedelta(milliseconds=i),
+            "country": rnd.choice(["US", "DE", "IR", "BR", "IN"]),
+            "asn": rnd.randrange(1, 70_000),
+        }
+        for i in range(args.rows)
+    ]
+
+
+def legacy_row(visit: dict) -> dict:
+    at = visit["at"].replace(tzinfo=None)
+    return {
+        "deleted_at": None,
+        "is_active": True,
+        "created_at": at,
+        "updated_at": at,
+        "uuid": uuid.uuid4(),
+        "url_id": visit["url_id"],
+        "ip_address": visit["ip"],
+    }
+
+
+def compact_row(visit: dict) -> dict:
+    return {
+        "visited_at": visit["at"],
+        "asn": visit["asn"],
+        "url_id": visit["url_id"],
+        "ip_address": visit["ip"],
+        "country": visit["country"],
+    }
+
+
+async def bench_layout(engine, table, rows: list[dict], batch_size: int) -> dict:
+    from sqlalchemy import text
+
+    started = time.perf_counter()
+    for i in range(0, len(rows), batch_size):
+        async with engine.begin() as conn:
+            await conn.execute(table.insert(), rows[i : i + batch_size])
+    elapsed = time.perf_counter() - started
+
+    async with engine.begin() as conn:
+        await conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.{table.name}"))
+    name = f"'{SCHEMA}.{table.name}'"
+    async with engine.connect() as conn:
+        heap, indexes, total = (
+            await conn.execute(
+                text(
+                    f"SELECT pg_relation_size({name}), pg_indexes_size({name}), "
+                    f"pg_total_relation_size({name})"
+                )
+            )
+        ).one()
+    count = len(rows)
+    return {
+        "table": table.name,
+        "rows": count,
+        "rows_per_s": round(count / elapsed, 1),
+        "heap_bytes_per_row": round(heap / count, 1),
+        "index_bytes_per_row": round(indexes / count, 1),
+        "total_bytes_per_row": round(total / count, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    # VACUUM cannot run inside a transaction block
+    engine = create_async_engine(os.environ["DATABASE_URL"], isolation_level="AUTOCOMMIT")
+    metadata, legacy, compact = build_tables()
+    visits = synthetic_visits(args)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+            await conn.run_sync(metadata.create_all)
+
+        results = [
+            await bench_layout(engine, legacy, [legacy_row(v) for v in visits], args.batch_size),
+            await bench_layout(engine, compact, [compact_row(v) for v in visits], args.batch_size),
+        ]
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+    finally:
+        await engine.dispose()
+
+    for result in results:
+        print(
+            f"{result['table']:<14} {result['rows_per_s']:>10} rows/s  "
+            f"heap={result['heap_bytes_per_row']}B/row  "
+            f"index={result['index_bytes_per_row']}B/row  "
+            f"total={result['total_bytes_per_row']}B/row"
+        )
+    return {"layouts": results}
+
+
+def main(argv: Optional[list[str]] = None):
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    path = save_results("visit_schema", vars(args), results)
+    print(f"results written to {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Worker pipeline micro-benchmarks, independent of the HTTP stack.
+
+Feeds synthetic VisitMessage bodies through `VisitWorker._handle_batch` in
+transport-sized batches, and synthetic `visits:{code}` counters through
+`CounterSyncWorker.flush`, against the benchmark Postgres and Redis. Sweeps
+batch sizes and short-code cardinalities and reports messages/sec, flush
+latency, DB statements per batch and peak Python memory.
+
+    python -m benchmarks.workers --messages 20000 --batch-sizes 50,200,1000 --cardinalities 10,1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from benchmarks.common import BENCH_ENV, ZipfSampler, save_results, summarize_latencies
+
+# Settings are read at import time, so point the app at the bench services first
+for _key, _value in BENCH_ENV.items():
+    os.environ.setdefault(_key, _value)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    int_list = lambda s: [int(x) for x in s.split(",") if x]  # noqa: E731
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=10000, help="visits per scenario")
+    parser.add_argument("--batch-sizes", type=int_list, default=[50, 200, 1000])
+    parser.add_argument("--cardinalities", type=int_list, default=[10, 1000])
+    parser.add_argument("--zipf-s", type=float, default=1.1, help="code popularity skew")
+    parser.add_argument("--counter-keys", type=int_list, default=[100, 1000])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="")
+    return parser.parse_args(argv)
+
+
+class StatementCounter:
+    """Counts SQL statements sent by the application engine."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        self._engine = engine.sync_engine
+        self._event = event
+        event.listen(self._engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+    def close(self):
+        self._event.remove(self._engine, "before_cursor_execute", self._on_execute)
+
+
+async def prepare_schema():
+    from app.core.db import init_db
+
+    await init_db()
+
+
+async def create_links(count: int) -> list[str]:
+    from app.core.db import get_session
+    from app.models import URL
+
+    run_id = uuid.uuid4().hex[:8]
+    codes = [f"wb{run_id}{i}" for i in range(count)]
+    async with get_session() as session:
+        session.add_all(
+            URL(original_url=f"https://bench.example/{run_id}/{i}", short_code=code)
+            for i, code in enumerate(codes)
+        )
+        await session.commit()
+    return codes
+
+
+def synthetic_bodies(codes: list[str], count: int, zipf_s: float, seed: int) -> list[bytes]:
+    sampler = ZipfSampler(len(codes), zipf_s, seed=seed)
+    rnd = random.Random(seed)
+    now = datetime.now(timezone.utc).isoformat()
+    return [
+        json.dumps(
+            {
+                "short_code": codes[sampler.sample()],
+                "ip": f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(256)}",
+                "timestamp": now,
+            }
+        ).encode()
+        for _ in range(count)
+    ]
+
+
+async def bench_visit_worker(batch_size: int, codes: list[str], bodies: list[bytes]) -> dict:
+    from app.core.db import engine
+    from app.core.queue import BatchLimits
+    from app.workers.visit_worker import VisitWorker
+
+    worker = VisitWorker(BatchLimits(batch_size=batch_size))
+    flush_durations: list[float] = []
+    statements = StatementCounter(engine)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        for i in range(0, len(bodies), batch_size):
+            batch_started = time.perf_counter()
+            await worker._handle_batch(bodies[i : i + batch_size])
+            flush_durations.append(time.perf_counter() - batch_started)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        statements.close()
+
+    flushes = max(len(flush_durations), 1)
+    return {
+        "batch_size": batch_size,
+        "cardinality": len(codes),
+        "messages": len(bodies),
+        "elapsed_s": round(elapsed, 3),
+        "messages_per_s": round(len(bodies) / elapsed, 1),
+        "flushes": len(flush_durations),
+        "flush_latency": summarize_latencies(flush_durations),
+        "db_statements": statements.count,
+        "db_statements_per_batch": round(statements.count / flushes, 2),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+async def bench_counter_sync(codes: list[str], seed: int) -> dict:
+    from app.core.cache import RedisClient, cache_client
+    from app.core.db import engine
+    from app.workers.counter_sync_worker import CounterSyncWorker
+
+    rnd = random.Random(seed)
+    await cache_client.connect()
+    for code in codes:
+        await cache_client.incr(f"visits:{code}", rnd.randint(1, 50))
+
+    redis = await cache_client.client() if isinstance(cache_client, RedisClient) else None
+
+    async def redis_commands() -> int:
+        if redis is None:
+            return 0
+        return int((await redis.info("stats"))["total_commands_processed"])
+
+    commands_before = await redis_commands()
+    worker = CounterSyncWorker()
+    statements = StatementCounter(engine)
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        await worker.flush()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        statements.close()
+    commands_after = await redis_commands()
+
+    return {
+        "keys": len(codes),
+        "elapsed_s": round(elapsed, 3),
+        "keys_per_s": round(len(codes) / elapsed, 1),
+        "db_statements": statements.count,
+        # the INFO call itself counts as one command
+        "redis_commands": max(commands_after - commands_before - 1, 0),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    await prepare_schema()
+    visit_results, counter_results = [], []
+
+    for cardinality in args.cardinalities:
+        codes = await create_links(cardinality)
+        bodies = synthetic_bodies(codes, args.messages, args.zipf_s, args.seed)
+        for batch_size in args.batch_sizes:
+            result = await bench_visit_worker(batch_size, codes, bodies)
+            visit_results.append(result)
+            print(
+                f"visit  batch={batch_size:<5} codes={cardinality:<6} "
+                f"{result['messages_per_s']:>9} msg/s  "
+                f"flush p50={result['flush_latency']['p50_ms']}ms "
+                f"p99={result['flush_latency']['p99_ms']}ms  "
+                f"stmts/batch={result['db_statements_per_batch']}  "
+                f"peak={result['peak_memory_kib']}KiB"
+            )
+
+    for key_count in args.counter_keys:
+        codes = await create_links(key_count)
+        result = await bench_counter_sync(codes, args.seed)
+        counter_results.append(result)
+        print(
+            f"counter keys={key_count:<6} {result['keys_per_s']:>9} keys/s  "
+            f"db stmts={result['db_statements']}  redis cmds={result['redis_commands']}"
+        )
+
+    return {"visit_worker": visit_results, "counter_sync": counter_results}
+
+
+def main(argv: Optional[list[str]] = None):
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    path = save_results("workers", vars(args), results)
+    print(f"results written to {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
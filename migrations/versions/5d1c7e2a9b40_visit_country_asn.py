@@ -0,0 +1,31 @@
+"""visit country and asn
+
+Revision ID: 5d1c7e2a9b40
+Revises: bfc962b4f820
+Create Date: 2026-10-19 10:05:12.418233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1c7e2a9b40'
+down_revision: Union[str, Sequence[str], None] = 'bfc962b4f820'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('visit', sa.Column('country', sqlmodel.sql.sqltypes.AutoString(length=2), nullable=True))
+    op.add_column('visit', sa.Column('asn', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('visit', 'asn')
+    op.drop_column('visit', 'country')
@@ -0,0 +1,108 @@
+"""compact append-only visit table
+
+Revision ID: 9a4e6f13c2d8
+Revises: 5d1c7e2a9b40
+Create Date: 2026-10-19 10:41:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4e6f13c2d8'
+down_revision: Union[str, Sequence[str], None] = '5d1c7e2a9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# ip_address was free text; anything that is not an address becomes NULL
+TRY_INET = """
+CREATE FUNCTION pg_temp.try_inet(value text) RETURNS inet AS $$
+BEGIN
+    RETURN value::inet;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Build the new table beside the old one, copy in id order, then swap names
+    op.create_table('visit_compact',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('visited_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('asn', sa.BigInteger(), nullable=True),
+    sa.Column('url_id', sa.Integer(), nullable=False),
+    sa.Column('ip_address', postgresql.INET(), nullable=True),
+    sa.Column('country', sqlmodel.sql.sqltypes.AutoString(length=2), nullable=True),
+    sa.ForeignKeyConstraint(['url_id'], ['url.id'], name='visit_url_id_fkey_compact'),
+    sa.PrimaryKeyConstraint('id', name='visit_compact_pkey')
+    )
+    op.execute(TRY_INET)
+    # Readers may continue, but no visit may be committed between the copy and the drop
+    op.execute('LOCK TABLE visit IN EXCLUSIVE MODE')
+    # Visits had no event time of their own; created_at (naive UTC) is the closest
+    op.execute("""
+        INSERT INTO visit_compact (id, visited_at, asn, url_id, ip_address, country)
+        SELECT id, created_at AT TIME ZONE 'UTC', asn, url_id, pg_temp.try_inet(ip_address), country
+        FROM visit
+        ORDER BY id
+    """)
+    op.execute("""
+        SELECT setval(pg_get_serial_sequence('visit_compact', 'id'),
+                      COALESCE((SELECT max(id) FROM visit_compact), 0) + 1, false)
+    """)
+
+    op.drop_table('visit')
+    op.rename_table('visit_compact', 'visit')
+    op.execute('ALTER TABLE visit RENAME CONSTRAINT visit_compact_pkey TO visit_pkey')
+    op.execute('ALTER TABLE visit RENAME CONSTRAINT visit_url_id_fkey_compact TO visit_url_id_fkey')
+    op.execute('ALTER SEQUENCE visit_compact_id_seq RENAME TO visit_id_seq')
+    op.create_index(op.f('ix_visit_url_id'), 'visit', ['url_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('LOCK TABLE visit IN EXCLUSIVE MODE')
+    op.drop_index(op.f('ix_visit_url_id'), table_name='visit')
+    op.rename_table('visit', 'visit_compact')
+    op.execute('ALTER TABLE visit_compact RENAME CONSTRAINT visit_pkey TO visit_compact_pkey')
+    op.execute('ALTER TABLE visit_compact RENAME CONSTRAINT visit_url_id_fkey TO visit_url_id_fkey_compact')
+    op.execute('ALTER SEQUENCE visit_id_seq RENAME TO visit_compact_id_seq')
+
+    op.create_table('visit',
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('uuid', sa.Uuid(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url_id', sa.Integer(), nullable=False),
+    sa.Column('ip_address', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('country', sqlmodel.sql.sqltypes.AutoString(length=2), nullable=True),
+    sa.Column('asn', sa.BigInteger(), nullable=True),
+    sa.ForeignKeyConstraint(['url_id'], ['url.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("""
+        INSERT INTO visit (deleted_at, is_active, created_at, updated_at, uuid, id, url_id,
+                           ip_address, country, asn)
+        SELECT NULL, true, visited_at AT TIME ZONE 'UTC', visited_at AT TIME ZONE 'UTC',
+               gen_random_uuid(), id, url_id, host(ip_address), country, asn
+        FROM visit_compact
+        ORDER BY id
+    """)
+    op.execute("""
+        SELECT setval(pg_get_serial_sequence('visit', 'id'),
+                      COALESCE((SELECT max(id) FROM visit), 0) + 1, false)
+    """)
+    op.drop_table('visit_compact')
+    op.create_index(op.f('ix_visit_id'), 'visit', ['id'], unique=False)
+    op.create_index(op.f('ix_visit_uuid'), 'visit', ['uuid'], unique=True)
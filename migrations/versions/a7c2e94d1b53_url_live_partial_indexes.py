@@ -0,0 +1,33 @@
+"""url live partial indexes
+
+Revision ID: a7c2e94d1b53
+Revises: f4d2a8c61b07
+Create Date: 2026-10-19 15:02:41.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e94d1b53'
+down_revision: Union[str, Sequence[str], None] = 'f4d2a8c61b07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so shortening and redirects are not blocked on a large table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_url_short_code_live', 'url', ['short_code'], unique=False, postgresql_where=sa.text('deleted_at IS NULL AND is_active'), postgresql_concurrently=True)
+        op.create_index('ix_url_original_url_live', 'url', ['original_url'], unique=False, postgresql_using='hash', postgresql_where=sa.text('deleted_at IS NULL AND is_active AND expires_at IS NULL'), postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_url_original_url_live', table_name='url', postgresql_concurrently=True)
+        op.drop_index('ix_url_short_code_live', table_name='url', postgresql_concurrently=True)
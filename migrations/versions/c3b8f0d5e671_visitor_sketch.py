@@ -0,0 +1,35 @@
+"""visitor sketch
+
+Revision ID: c3b8f0d5e671
+Revises: 9a4e6f13c2d8
+Create Date: 2026-10-19 11:52:08.317460
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3b8f0d5e671'
+down_revision: Union[str, Sequence[str], None] = '9a4e6f13c2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('visitor_sketch',
+    sa.Column('url_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('estimate', sa.BigInteger(), nullable=False),
+    sa.Column('sketch', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['url_id'], ['url.id'], ),
+    sa.PrimaryKeyConstraint('url_id', 'day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('visitor_sketch')
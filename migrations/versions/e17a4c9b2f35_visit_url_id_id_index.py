@@ -0,0 +1,32 @@
+"""visit (url_id, id) index
+
+Revision ID: e17a4c9b2f35
+Revises: c3b8f0d5e671
+Create Date: 2026-10-19 12:36:44.105829
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e17a4c9b2f35'
+down_revision: Union[str, Sequence[str], None] = 'c3b8f0d5e671'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so visit inserts are not blocked on a large table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_visit_url_id_id', 'visit', ['url_id', 'id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_visit_url_id', table_name='visit', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_visit_url_id', 'visit', ['url_id'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_visit_url_id_id', table_name='visit', postgresql_concurrently=True)
@@ -0,0 +1,30 @@
+"""url expires_at
+
+Revision ID: f4d2a8c61b07
+Revises: e17a4c9b2f35
+Create Date: 2026-10-19 13:21:09.664281
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4d2a8c61b07'
+down_revision: Union[str, Sequence[str], None] = 'e17a4c9b2f35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('url', sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_url_expires_at_pending', 'url', ['expires_at'], unique=False, postgresql_where=sa.text('is_active AND expires_at IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_url_expires_at_pending', table_name='url', postgresql_where=sa.text('is_active AND expires_at IS NOT NULL'))
+    op.drop_column('url', 'expires_at')
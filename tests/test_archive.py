@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from ipaddress import ip_address
+
+import pyarrow.parquet as pq
+
+from app.services.visit_archive import VisitArchiver, VisitArchiveReader
+
+START = datetime(2024, 1, 30, tzinfo=timezone.utc)
+
+
+def visit_rows(first_id: int, count: int) -> list[tuple]:
+    # (id, url_id, visited_at, ip_address, country, asn), as read from Postgres
+    return [
+        (
+            first_id + i,
+            i % 3 + 1,
+            START + timedelta(hours=12 * i),
+            ip_address(f"203.0.113.{i % 250}") if i % 5 else None,
+            "US",
+            15169,
+        )
+        for i in range(count)
+    ]
+
+
+def test_archive_partitions_by_month_and_reader_filters(tmp_path):
+    archiver = VisitArchiver(uri=str(tmp_path), batch_size=10)
+    archiver.write_batch(visit_rows(1, 10))
+    archiver.write_batch(visit_rows(11, 10))
+
+    months = sorted(p.name for p in tmp_path.iterdir())
+    assert months == ["month=2024-01", "month=2024-02"]
+    sample = next((tmp_path / "month=2024-02").glob("*.parquet"))
+    assert pq.ParquetFile(sample).metadata.row_group(0).column(0).compression == "ZSTD"
+
+    reader = VisitArchiveReader(uri=str(tmp_path))
+    assert reader.visits().num_rows == 20
+    link = reader.visits(url_id=2)
+    assert set(link["url_id"].to_pylist()) == {2}
+    assert link.num_rows == 6
+
+    since, until = START + timedelta(days=2), START + timedelta(days=3)
+    ranged = reader.visits(since=since, until=until)
+    assert all(since <= at < until for at in ranged["visited_at"].to_pylist())
+    assert ranged.num_rows == 4
+    assert sum(reader.daily_counts(1).values()) == 8
+    assert None in reader.visits(columns=["ip_address"])["ip_address"].to_pylist()
+
+
+def test_rewriting_a_batch_replaces_its_files(tmp_path):
+    archiver = VisitArchiver(uri=str(tmp_path))
+    archiver.write_batch(visit_rows(1, 10))
+    archiver.write_batch(visit_rows(1, 10))
+    assert VisitArchiveReader(uri=str(tmp_path)).visits().num_rows == 10
+
+
+def test_reader_converts_bounds_to_utc_before_choosing_months(tmp_path):
+    VisitArchiver(uri=str(tmp_path)).write_batch(visit_rows(1, 6))  # Jan 30 .. Feb 1 12:00 UTC
+
+    reader = VisitArchiveReader(uri=str(tmp_path))
+    # 2024-01-31T12:00Z is still 2024-01 in UTC, although it is February in +14:00
+    since = datetime(2024, 2, 1, 1, 0, tzinfo=timezone(timedelta(hours=14)))
+    assert reader.visits(since=since).num_rows == 3
+    # ...and 2024-02-01T00:00Z is February, although it is still January in -02:00
+    until = datetime(2024, 1, 31, 23, 30, tzinfo=timezone(timedelta(hours=-2)))
+    assert reader.visits(until=until).num_rows == 5
+    assert reader.visits(since=since.replace(tzinfo=None) - timedelta(hours=13)).num_rows == 3
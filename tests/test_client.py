@@ -1,7 +1,11 @@
 import asyncio
 import json
+import time
 import pytest
-from app.core.cache import redis_client
+from app.core.cache import redis_client, RedisClient, MemoryCache
+from app.core.circuit_breaker import CircuitBreaker
+from app.core import queue as queue_module
+from app.core.queue import BatchLimits, InProcessQueue, RabbitMQClient, RedisStreamsQueue
 
 
 @pytest.mark.asyncio
@@ -35,3 +39,333 @@ async def test_rabbitmq_publish_consume(rabbitmq_client_fixture):
 
     assert messages, "No messages consumed"
     assert messages[0]["hello"] == "world"
+
+
+def test_circuit_breaker_opens_and_recovers():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0.05)
+    assert breaker.allow()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe while half-open
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_redis_unavailable_fails_fast_and_buffers_counters():
+    client = RedisClient(
+        "redis://127.0.0.1:1/0",
+        op_timeout=0.1,
+        breaker=CircuitBreaker("test-redis", failure_threshold=1, recovery_timeout=60),
+    )
+    assert await client.get("short:abc") is None
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    started = time.monotonic()
+    assert await client.get("short:abc") is None
+    assert await client.incr("visits:abc") == 0
+    assert await client.incr("visits:abc") == 0
+    assert time.monotonic() - started < 0.05
+    assert client.stats()["pending_counters"] == 1
+    assert client._pending_counters["visits:abc"] == 2
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_incr_buffers_refused_calls_but_drops_timed_out_ones():
+    client = RedisClient(
+        "redis://127.0.0.1:1/0",
+        op_timeout=0.5,
+        breaker=CircuitBreaker("test-redis", failure_threshold=5, recovery_timeout=60),
+    )
+    assert await client.incr("visits:abc") == 0  # refused: never applied, safe to replay
+    assert client._pending_counters == {"visits:abc": 1}
+
+    async def slow_incrby(key, amount):
+        await asyncio.sleep(1)  # may still be applied after the client gives up
+
+    await client.ensure_connection()
+    client._client.incrby = slow_incrby
+    client._op_timeout = 0.05
+    assert await client.incr("visits:abc") == 0
+    assert client._pending_counters == {"visits:abc": 1}
+    assert client.stats()["unconfirmed_increments"] == 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_matches_redis_semantics():
+    cache = MemoryCache(max_items=2)
+    assert await cache.set("short:a", "https://a.example", expire=60)
+    assert await cache.get("short:a") == "https://a.example"
+    assert await cache.incr("visits:a") == 1
+    assert await cache.incr("visits:a", 4) == 5
+    assert await cache.keys("visits:*") == ["visits:a"]
+    assert await cache.get_and_delete("visits:a") == "5"
+    assert await cache.get_and_delete("visits:a") == "0"
+
+    # Cached values are evicted LRU; counters never are
+    await cache.incr("visits:b")
+    await cache.set("short:b", "b")
+    await cache.set("short:c", "c")
+    assert await cache.get("short:a") is None
+    assert await cache.get("visits:b") == "1"
+    assert await cache.delete("short:c")
+    assert not await cache.delete("short:c")
+
+
+@pytest.mark.asyncio
+async def test_in_process_queue_delivers_drains_and_drops():
+    queue = InProcessQueue(max_size=3)
+    received = []
+
+    async def handler(body):
+        received.append(json.loads(body)["n"])
+
+    for n in range(5):
+        await queue.publish("visits", {"n": n})
+    assert queue.dropped == 2
+
+    consumer = asyncio.create_task(queue.consume("visits", handler))
+    await queue.drain(timeout=1)
+    assert received == [0, 1, 2]
+
+    await queue.close()
+    await asyncio.wait_for(consumer, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_redis_streams_acks_after_handler_and_reclaims_failures():
+    queue = RedisStreamsQueue(group="test-group", claim_idle_ms=200)
+    await queue.connect()
+    stream = queue.stream_key("test_visits")
+    await queue._client.delete(stream)
+    for n in range(5):
+        await queue.publish("test_visits", {"n": n})
+
+    received, failures = [], [1]
+
+    async def handler(bodies):
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("commit failed")
+        received.extend(json.loads(body)["n"] for body in bodies)
+
+    consumer = asyncio.create_task(
+        queue.consume_batches("test_visits", handler, BatchLimits(batch_size=3, interval=0.05))
+    )
+    await asyncio.sleep(1)
+    await queue.close()
+    await asyncio.wait_for(consumer, timeout=2)
+
+    assert sorted(received) == [0, 1, 2, 3, 4]
+    await queue.connect()
+    assert (await queue._client.xpending(stream, "test-group"))["pending"] == 0
+    await queue._client.delete(stream)
+    await queue.close()
+
+
+class _FakeStreams:
+    """Just enough of a consumer group for one consumer."""
+
+    def __init__(self, bodies: list[bytes]):
+        self.new = [(f"{n}-0".encode(), {b"body": body}) for n, body in enumerate(bodies, 1)]
+        self.pending: dict = {}
+        self.reads: list[str] = []
+
+    async def xgroup_create(self, *args, **kwargs):
+        pass
+
+    async def xautoclaim(self, *args, **kwargs):
+        return [b"0-0", []]
+
+    async def xreadgroup(self, group, consumer, streams, count, block=None):
+        ((stream, last_id),) = streams.items()
+        self.reads.append(last_id)
+        if last_id == "0":
+            return [[stream, list(self.pending.items())[:count]]]
+        entries, self.new = self.new[:count], self.new[count:]
+        self.pending.update(entries)
+        if not entries:
+            await asyncio.sleep(0.01)  # as if blocked
+        return [[stream, entries]] if entries else []
+
+    async def xack(self, stream, group, *entry_ids):
+        for entry_id in entry_ids:
+            self.pending.pop(entry_id, None)
+
+    async def aclose(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_redis_streams_backs_off_and_retries_own_pending_before_new_entries(monkeypatch):
+    delays = []
+    monkeypatch.setattr(queue_module, "retry_delay", lambda failures: delays.append(failures) or 0)
+    queue = RedisStreamsQueue()
+    queue._client = streams = _FakeStreams([b"a", b"b", b"c"])
+    handled, failures = [], [2]
+
+    async def handler(bodies):
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("commit failed")
+        handled.append(bodies)
+
+    consumer = asyncio.create_task(
+        queue.consume_batches("visits", handler, BatchLimits(batch_size=2, interval=0.01))
+    )
+    await asyncio.sleep(0.2)
+    await queue.close()
+    await asyncio.wait_for(consumer, timeout=1)
+
+    assert handled == [[b"a", b"b"], [b"c"]]
+    assert delays == [1, 2]  # the streak resets once the retried batch commits
+    assert streams.pending == {}
+    # The failed batch is retried from this consumer's pending list, not re-read as new
+    assert streams.reads[:5] == ["0", ">", "0", "0", "0"]
+
+
+class _Delivery:
+    def __init__(self, body: bytes):
+        self.body = body
+        self.settled = None
+
+    async def ack(self, multiple=False):
+        self.settled = ("ack", multiple)
+
+    async def nack(self, multiple=False, requeue=True):
+        self.settled = ("nack", multiple, requeue)
+
+
+@pytest.mark.asyncio
+async def test_rabbitmq_batch_is_acked_once_after_handler(monkeypatch):
+    monkeypatch.setattr(queue_module, "retry_delay", lambda failures: 0)
+    client = RabbitMQClient()
+    batch = [_Delivery(b"1"), _Delivery(b"2"), _Delivery(b"3")]
+    handled = []
+
+    async def handler(bodies):
+        handled.append(bodies)
+
+    assert await client._settle("visits", batch, handler, failures=2) == 0
+    assert handled == [[b"1", b"2", b"3"]]
+    assert batch[-1].settled == ("ack", True)
+    assert batch[0].settled is None  # covered by the multiple ack
+
+    async def failing(bodies):
+        raise RuntimeError("commit failed")
+
+    batch = [_Delivery(b"4"), _Delivery(b"5")]
+    assert await client._settle("visits", batch, failing, failures=0) == 1
+    assert batch[-1].settled == ("nack", True, True)
+
+
+class _Broker:
+    """One queue whose consumer keeps the prefetch it was started with, as RabbitMQ does."""
+
+    def __init__(self, count: int):
+        self.ready = [str(n).encode() for n in range(count)]
+        self.qos = self.prefetch = 0
+        self.delivered = self.acked = 0
+        self.deliver = None
+
+    async def set_qos(self, prefetch_count):
+        self.qos = prefetch_count
+
+    async def declare_queue(self, name, durable=True):
+        return self
+
+    async def consume(self, callback):
+        self.prefetch, self.deliver = self.qos, callback
+        await self.pump()
+        return "ctag"
+
+    async def cancel(self, consumer_tag):
+        pass
+
+    async def pump(self):
+        while self.ready and self.delivered - self.acked < self.prefetch:
+            self.delivered += 1
+            await self.deliver(_BrokerDelivery(self, self.delivered, self.ready.pop(0)))
+
+
+class _BrokerDelivery:
+    def __init__(self, broker: _Broker, tag: int, body: bytes):
+        self.broker, self.tag, self.body = broker, tag, body
+
+    async def ack(self, multiple=False):
+        self.broker.acked = self.tag
+        await self.broker.pump()
+
+
+@pytest.mark.asyncio
+async def test_rabbitmq_batches_grow_past_the_starting_batch_size():
+    client = RabbitMQClient()
+    client._channel = broker = _Broker(30)
+    limits = BatchLimits(batch_size=2, interval=0.05, max_batch_size=10)
+    sizes = []
+
+    async def handler(bodies):
+        sizes.append(len(bodies))
+        limits.batch_size = 10  # as the adaptive policy does under a backlog
+
+    consumer = asyncio.create_task(client.consume_batches("visits", handler, limits))
+    await asyncio.sleep(0.3)
+    await client.close()
+    await asyncio.wait_for(consumer, timeout=1)
+
+    assert sizes[0] == 2 and max(sizes) == 10
+    assert broker.prefetch == 10 * queue_module.PREFETCH_BATCHES
+
+
+@pytest.mark.asyncio
+async def test_rabbitmq_consume_batches_redelivers_failed_batch(
+    rabbitmq_client_fixture, monkeypatch
+):
+    monkeypatch.setattr(queue_module, "retry_delay", lambda failures: 0)
+    channel = await rabbitmq_client_fixture.connect()
+    await (await channel.declare_queue("test_batches", durable=True)).purge()
+    for n in range(5):
+        await rabbitmq_client_fixture.publish("test_batches", {"n": n})
+
+    received, failures = [], [1]
+
+    async def handler(bodies):
+        if failures[0]:
+            failures[0] -= 1
+            raise RuntimeError("commit failed")
+        received.extend(json.loads(body)["n"] for body in bodies)
+
+    consumer = asyncio.create_task(
+        rabbitmq_client_fixture.consume_batches(
+            "test_batches", handler, BatchLimits(batch_size=3, interval=0.1)
+        )
+    )
+    await asyncio.sleep(1)
+    await rabbitmq_client_fixture.close()
+    await asyncio.wait_for(consumer, timeout=2)
+
+    assert sorted(received) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_visitor_sketches_count_merge_and_round_trip():
+    cache = MemoryCache()
+    await cache.pfadd_many({"uv:a:1": [f"v{i}" for i in range(5000)]}, expire=60)
+    await cache.pfadd_many({"uv:a:2": [f"v{i}" for i in range(2500, 7500)]}, expire=60)
+    assert abs(await cache.pfcount("uv:a:1") - 5000) < 5000 * 0.03
+
+    # Days merge into the union, and a dumped sketch restores to the same count
+    await cache.pfmerge("uv:a", ["uv:a:1", "uv:a:2"])
+    assert abs(await cache.pfcount("uv:a") - 7500) < 7500 * 0.03
+    assert await cache.load_sketch("uv:b", await cache.dump_sketch("uv:a"))
+    assert await cache.pfcount("uv:b") == await cache.pfcount("uv:a")
+    assert await cache.pfcount("uv:missing") == 0
+    assert await cache.dump_sketch("uv:missing") is None
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from app.core.geoip import GeoIPResolver, IPRangeIndex
+
+RANGES = """start_ip,end_ip,country,asn
+8.8.8.0,8.8.8.255,US,AS15169
+1.0.0.0,1.0.0.255,AU,13335
+1.0.0.128,1.0.1.10,CN,4134
+2001:db8::,2001:db8::ffff,DE,64500
+"""
+
+
+def test_ip_range_index_batch_lookup(tmp_path):
+    path = tmp_path / "ranges.csv"
+    path.write_text(RANGES)
+    index = IPRangeIndex.from_csv(str(path))
+    assert len(index) == 3  # the overlapping CN range is skipped
+
+    assert index.lookup_many(
+        ["8.8.8.8", "1.0.0.200", None, "not-an-ip", "1.0.1.5", "2001:db8::1", "8.8.8.8"]
+    ) == [
+        ("US", 15169),
+        ("AU", 13335),
+        (None, None),
+        (None, None),
+        (None, None),
+        ("DE", 64500),
+        ("US", 15169),
+    ]
+
+
+def test_ip_range_index_rejects_rows_with_bad_country_codes(tmp_path, caplog):
+    path = tmp_path / "ranges.csv"
+    path.write_text(
+        "8.8.8.0,8.8.8.255,USA,15169\n"
+        "9.9.9.0,9.9.9.255,Ü1,19281\n"
+        "1.1.1.0,1.1.1.255,au,13335\n"
+        "4.4.4.0,4.4.4.255,,3356\n"
+    )
+    index = IPRangeIndex.from_csv(str(path))
+    assert len(index) == 2
+    assert index.lookup_many(["8.8.8.8", "9.9.9.9", "1.1.1.1", "4.4.4.4"]) == [
+        (None, None),
+        (None, None),
+        ("AU", 13335),
+        (None, 3356),
+    ]
+    assert "Skipping malformed GeoIP row 2" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_geoip_resolver_reloads_when_file_changes(tmp_path):
+    path = tmp_path / "ranges.csv"
+    resolver = GeoIPResolver(str(path), check_interval=0)
+    await resolver.refresh()  # missing file: lookups degrade to no location
+    assert resolver.lookup_many(["8.8.8.8"]) == [(None, None)]
+
+    path.write_text(RANGES)
+    await resolver.refresh()
+    first = resolver.index
+    assert resolver.lookup_many(["8.8.8.8"]) == [("US", 15169)]
+
+    await resolver.refresh()
+    assert resolver.index is first  # unchanged file is not reloaded
+
+    path.write_text(RANGES.replace("US,AS15169", "GB,AS2856"))
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+    await resolver.refresh()
+    assert resolver.lookup_many(["8.8.8.8"]) == [("GB", 2856)]
+
+    # A file that cannot be parsed keeps the last good index instead of failing batches
+    path.write_bytes(b"8.8.8.0,8.8.8.255,US,15169\n\xff\xfe\n")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2))
+    await resolver.refresh()
+    assert resolver.lookup_many(["8.8.8.8"]) == [("GB", 2856)]
+
+
+def test_ip_range_index_rejects_asns_outside_32_bits(tmp_path):
+    path = tmp_path / "ranges.csv"
+    path.write_text(
+        "start_ip,end_ip,country,asn\n"
+        "8.8.8.0,8.8.8.255,US,-1\n"
+        "9.9.9.0,9.9.9.255,CH,4294967296\n"
+        "1.1.1.0,1.1.1.255,AU,4294967295\n"
+    )
+    index = IPRangeIndex.from_csv(str(path))
+    assert index.lookup_many(["8.8.8.8", "9.9.9.9", "1.1.1.1"]) == [
+        (None, None),
+        (None, None),
+        ("AU", 4294967295),
+    ]
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time budgets in seconds; scale with IMPORT_BUDGET_SCALE on slow machines
+BUDGETS = {
+    "app.workers.manager_worker": 1.5,
+    "app.main": 2.5,
+}
+WEB_FRAMEWORK = ("fastapi", "starlette")
+
+
+def import_profile(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per module, from `python -X importtime`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        profile[name.strip()] = int(cumulative)
+    return profile
+
+
+@pytest.mark.parametrize("module", BUDGETS)
+def test_entry_point_import_time_within_budget(module):
+    budget = BUDGETS[module] * float(os.environ.get("IMPORT_BUDGET_SCALE", "1"))
+    seconds = import_profile(module)[module] / 1e6
+    assert seconds <= budget, f"importing {module} took {seconds:.2f}s (budget {budget:.2f}s)"
+
+
+def test_worker_does_not_import_web_framework():
+    loaded = [
+        name
+        for name in import_profile("app.workers.manager_worker")
+        if name.startswith(WEB_FRAMEWORK)
+    ]
+    assert loaded == []
@@ -0,0 +1,39 @@
+from app.core.metrics import Counter, Gauge, Histogram, Registry, merge_families, render
+
+
+def test_histogram_and_counter_exposition():
+    registry = Registry()
+    latency = Histogram(
+        "stage_seconds", "Stage latency", labelnames=("stage",), buckets=(0.1, 1), registry=registry
+    )
+    lookup = latency.labels(stage="lookup")
+    lookup.observe(0.05)
+    lookup.observe(0.5)
+    lookup.observe(3)
+    retries = Counter("retries", "Retries", registry=registry)
+    retries.inc()
+    retries.inc(2)
+    depth = Gauge("depth", "Depth", registry=registry)
+    depth.set_function(lambda: 7)
+
+    text = registry.render()
+    assert 'stage_seconds_bucket{stage="lookup",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="lookup",le="1.0"} 2' in text
+    assert 'stage_seconds_bucket{stage="lookup",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="lookup"} 3' in text
+    assert "retries_total 3" in text
+    assert "depth 7" in text
+    assert "# TYPE stage_seconds histogram" in text
+
+
+def test_merge_families_labels_samples_by_process():
+    snapshots = {}
+    for worker, written in (("visits-0", 3), ("visits-1", 5)):
+        registry = Registry()
+        Counter("visits_written", "Visits written", registry=registry).inc(written)
+        snapshots[worker] = registry.collect()
+
+    text = render(merge_families(snapshots))
+    assert text.count("# TYPE visits_written counter") == 1
+    assert 'visits_written_total{worker="visits-0"} 3' in text
+    assert 'visits_written_total{worker="visits-1"} 5' in text
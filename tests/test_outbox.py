@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from app.core.outbox import Outbox, VisitOutbox
+from app.core.queue import InProcessQueue
+from app.workers.outbox_shipper import OutboxShipper
+
+
+def _outbox(root, **kwargs) -> VisitOutbox:
+    outbox = VisitOutbox(str(root))
+    outbox.outbox = Outbox.create(str(root), **{"segment_bytes": 64, "max_bytes": 256, **kwargs})
+    return outbox
+
+
+def test_outbox_rolls_segments_and_drops_when_full(tmp_path):
+    outbox = _outbox(tmp_path).outbox
+    appended = [outbox.append(f"event-{n:02d}".encode()) for n in range(20)]
+    # 16-byte frames, 4 per 64-byte segment, at most 4 segments
+    assert appended == [True] * 16 + [False] * 4
+
+    records, position = outbox.read(6)
+    assert records == [f"event-{n:02d}".encode() for n in range(6)]
+    outbox.commit(position)
+    assert outbox.segments == [1, 2, 3]
+    assert outbox.append(b"event-xx")  # room again
+
+
+def test_orphaned_outbox_is_adopted_only_after_its_owner_exits(tmp_path):
+    owner = _outbox(tmp_path)
+    owner.append(b"first")
+    owner.append(b"second")
+    owner.outbox.commit(owner.outbox.read(1)[1])
+    directory = owner.outbox.directory
+
+    assert Outbox.open(directory) is None  # flock still held
+    owner.close()  # process exit with a backlog
+
+    orphan = Outbox.open(directory)
+    assert orphan.read(10)[0] == [b"second"]
+    orphan.close()
+
+
+def test_unshipped_outbox_survives_close_and_empty_one_is_removed(tmp_path):
+    outbox = _outbox(tmp_path)
+    outbox.append(b"visit")
+    outbox.close()
+    assert len(Outbox.orphans(str(tmp_path))) == 1
+
+    empty = _outbox(tmp_path)
+    empty.close()
+    assert len(Outbox.orphans(str(tmp_path))) == 1
+
+
+class _FlakyQueue(InProcessQueue):
+    def __init__(self):
+        super().__init__()
+        self.down = True
+
+    async def publish(self, queue_name: str, message: dict):
+        if self.down:
+            raise ConnectionError("broker unreachable")
+        await super().publish(queue_name, message)
+
+
+@pytest.mark.asyncio
+async def test_shipper_forwards_outbox_once_broker_recovers(tmp_path):
+    outbox = _outbox(tmp_path, segment_bytes=4096, max_bytes=8192)
+    shipper = OutboxShipper(outbox)
+    shipper.queue = queue = _FlakyQueue()
+    for n in range(3):
+        outbox.append(json.dumps({"short_code": f"c{n}"}).encode())
+
+    with pytest.raises(ConnectionError):
+        await shipper.ship(outbox.outbox)
+    assert outbox.outbox.backlog() > 0
+
+    queue.down = False
+    assert await shipper.ship(outbox.outbox) == 3
+    assert outbox.outbox.backlog() == 0
+    assert [json.loads(queue._queue("visits").get_nowait()) for _ in range(3)] == [
+        {"short_code": f"c{n}"} for n in range(3)
+    ]
+
+    # A dead process's outbox is shipped by a live one and then removed
+    dead = _outbox(tmp_path, segment_bytes=4096, max_bytes=8192)
+    dead.append(json.dumps({"short_code": "orphan"}).encode())
+    dead.outbox.close()
+    await shipper.adopt_orphans()
+    assert json.loads(queue._queue("visits").get_nowait()) == {"short_code": "orphan"}
+    assert Outbox.orphans(str(tmp_path), exclude=outbox.outbox.directory) == []
@@ -1,6 +1,31 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from ipaddress import ip_address
 import pytest
+from app.api.v1.endpoints.get_stats import not_modified
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+from starlette.requests import Request
 from app.services import URLService, VisitService
+from app.core.cache import MemoryCache, local_cache
+from app.core.config import settings
+from app.core.health import HealthProber
+from app.core.hll import HyperLogLog
+from app.core.rate_limit import RateLimiter
+from app.middleware import RateLimitMiddleware
 from app.models import URL
+from app.services.url_service import decode_target, encode_target
+from app.services.stats_service import StatsService
+from app.services.trending_service import TrendingLink, TrendingService
+from app.services.visit_export import VisitExportService
+from app.services.visitor_service import UniqueVisitorService, VisitorHit
+from app.utils import extract_client_ip
+from app.workers.batch_policy import AdaptiveBatchPolicy
+from app.workers.edge_log_worker import EdgeLogShipper
+from app.workers.manager_worker import WorkerManager
 
 
 @pytest.mark.asyncio
@@ -12,3 +37,390 @@ async def test_create_short_and_get(db_session):
 
     fetched = await us.get_by_code(url.short_code)
     assert fetched.original_url == "https://example.com"
+
+
+def test_edge_log_line_parsing():
+    line = (
+        b'{"code":"abc123","ip":"10.0.0.2","xff":"203.0.113.7, 10.0.0.1",'
+        b'"ts":"2025-09-25T06:30:48+00:00","cache":"HIT"}\n'
+    )
+    entry = EdgeLogShipper._parse(line)
+    assert entry["short_code"] == "abc123"
+    assert entry["ip"] == "10.0.0.2"  # never the client-supplied X-Forwarded-For
+    assert entry["timestamp"].year == 2025
+
+    assert EdgeLogShipper._parse(b"not json\n") is None
+
+
+class _ExitedProcess:
+    pid = 4242
+    exitcode = 1
+
+    def is_alive(self):
+        return False
+
+    def join(self, timeout=None):
+        pass
+
+
+def test_worker_manager_restarts_crashed_children_with_backoff(monkeypatch):
+    manager = WorkerManager(visit_processes=2, serve_metrics=False)
+    spawned = []
+    monkeypatch.setattr(manager, "_spawn", lambda child: spawned.append(child.name))
+    assert [child.name for child in manager.children] == ["visits-0", "visits-1", "singletons"]
+
+    crashed = manager.children[0]
+    crashed.process = _ExitedProcess()
+    crashed.started_at = time.monotonic()  # died right after starting
+    crashed.failures = 2
+
+    manager._supervise()
+    assert crashed.exitcode == 1 and crashed.failures == 3
+    assert crashed.restart_at - time.monotonic() > 7  # 1s * 2**3
+    assert "visits-0" not in spawned
+
+    crashed.restart_at = 0
+    manager._supervise()
+    assert spawned.count("visits-0") == 1 and crashed.restarts == 1
+    assert manager.health()["status"] == "degraded"
+
+
+def test_adaptive_batch_policy_follows_backlog_and_flush_cost():
+    policy = AdaptiveBatchPolicy(
+        min_size=50, max_size=1000, min_interval=0.05, max_interval=1.0, smoothing=1.0
+    )
+    assert (policy.batch_size, policy.interval) == (50, 0.05)
+
+    policy.observe_depth(5000)
+    assert (policy.batch_size, policy.interval) == (1000, 1.0)
+
+    # 2ms per row: a 0.5s flush target allows 250 rows
+    policy.record_flush(100, 0.2)
+    assert policy.batch_size == 250
+
+    policy.observe_depth(0)
+    assert (policy.batch_size, policy.interval) == (50, 0.05)
+
+    policy.observe_depth(None)  # transport cannot report depth
+    assert policy.batch_size == 50
+
+
+@pytest.mark.asyncio
+async def test_health_prober_serves_snapshot_and_gates_readiness(monkeypatch):
+    prober = HealthProber()
+
+    async def db_up():
+        return "connected"
+
+    async def db_down():
+        raise ConnectionRefusedError("connection refused")
+
+    async def ok():
+        return "in-process"
+
+    monkeypatch.setattr(prober, "_redis", ok)
+    monkeypatch.setattr(prober, "_rabbitmq", ok)
+    monkeypatch.setattr(prober, "_database", db_up)
+    assert (await prober.probe()).status == "healthy"
+    assert not prober.ready  # not warmed up yet
+
+    prober.warmed_up = True
+    assert prober.ready
+
+    monkeypatch.setattr(prober, "_database", db_down)
+    snapshot = await prober.probe()
+    assert snapshot.status == "degraded"
+    assert snapshot.database == "error: connection refused"
+    assert not prober.ready
+
+
+def test_hyperloglog_estimates_within_error_and_ignores_repeats():
+    sketch = HyperLogLog()
+    assert sketch.count() == 0
+    assert sketch.add(f"visitor-{i}" for i in range(100_000))
+    assert not sketch.add(["visitor-1", "visitor-2"])
+    assert abs(sketch.count() - 100_000) < 100_000 * 0.03
+    assert len(bytes(sketch)) == 16384
+    assert HyperLogLog(bytes(sketch)).count() == sketch.count()
+
+
+@pytest.mark.asyncio
+async def test_unique_visitor_service_records_hashed_visitors_per_day(monkeypatch):
+    cache = MemoryCache()
+    service = UniqueVisitorService()
+    monkeypatch.setattr(service, "cache", cache)
+    day = datetime(2025, 9, 25, 23, 30, tzinfo=timezone.utc)
+    hits = [VisitorHit(1, "abc", f"203.0.113.{i % 50}", day) for i in range(200)]
+    hits += [
+        VisitorHit(1, "abc", None, day),
+        VisitorHit(1, "abc", "198.51.100.1", day.replace(day=26)),
+    ]
+    await service.record(hits)
+
+    assert await cache.pfcount("uv:abc") == 51
+    assert await cache.pfcount("uv:abc:20250925") == 50
+    assert await cache.pfcount("uv:abc:20250926") == 1
+    assert service._dirty == {(1, "abc", day.date()), (1, "abc", day.date().replace(day=26))}
+    assert UniqueVisitorService.visitor_id("203.0.113.1") != "203.0.113.1"
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_admits_locally_then_enforces_limit():
+    cache = MemoryCache()
+    limiter = RateLimiter(cache=cache, window=60, local_batch=3)
+    results = [await limiter.check("create_short", "203.0.113.7", limit=5) for _ in range(7)]
+    assert results[:5] == [None] * 5
+    assert all(0 < retry <= 60 for retry in results[5:])
+    # Other clients and routes have their own windows
+    assert await limiter.check("create_short", "203.0.113.8", limit=5) is None
+    assert await limiter.check("get_stats", "203.0.113.7", limit=5) is None
+
+
+class _SlowWindowCache(MemoryCache):
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.reported = []
+
+    async def sliding_window(self, *args, admitted=0, **kwargs):
+        self.reported.append(admitted)
+        await self.release.wait()
+        return await super().sliding_window(*args, admitted=admitted, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_reports_admissions_made_during_a_round_trip():
+    cache = _SlowWindowCache()
+    limiter = RateLimiter(cache=cache, window=60, local_batch=3)
+
+    def check():
+        return limiter.check("create_short", "203.0.113.7", limit=100)
+
+    assert await check() is None and await check() is None
+    in_flight = asyncio.create_task(check())  # reports the 2 local admissions
+    await asyncio.sleep(0)
+    assert await check() is None and await check() is None  # admitted locally meanwhile
+    cache.release.set()
+    assert await in_flight is None
+    assert await check() is None
+    assert cache.reported == [2, 2]
+
+
+def test_forwarded_for_is_only_believed_from_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.0/8"])
+
+    def client_ip(peer, xff):
+        headers = [(b"x-forwarded-for", xff.encode())] if xff else []
+        return extract_client_ip(Request({"type": "http", "client": (peer, 1), "headers": headers}))
+
+    assert client_ip("203.0.113.7", "198.51.100.1") == "203.0.113.7"
+    assert client_ip("10.0.0.2", "198.51.100.1") == "198.51.100.1"
+    # A client-supplied entry sits left of what the trusted proxies appended
+    assert client_ip("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.3") == "198.51.100.1"
+    assert client_ip("10.0.0.2", None) == "10.0.0.2"
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_middleware_answers_429_with_retry_after():
+    api = FastAPI()
+    router = APIRouter()
+
+    @router.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    api.include_router(router, prefix="/api")
+
+    @api.get("/other")
+    async def other():
+        return {"ok": True}
+
+    limiter = RateLimiter(cache=MemoryCache(), window=60, local_batch=1)
+    api.add_middleware(
+        RateLimitMiddleware,
+        routes=router.routes,
+        default_limit=100,
+        route_limits={"ping": 2},
+        prefix="/api",
+        limiter=limiter,
+    )
+    async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as client:
+        statuses = [(await client.get("/api/ping")).status_code for _ in range(3)]
+        limited = await client.get("/api/ping")
+        assert statuses == [200, 200, 429]
+        assert int(limited.headers["Retry-After"]) >= 1
+        assert (await client.get("/other")).status_code == 200
+
+
+def test_visit_export_encodes_chunks_and_resumes_by_id():
+    service = VisitExportService(chunk_size=2)
+    at = datetime(2025, 9, 25, 6, 30, tzinfo=timezone.utc)
+    rows = [(7, at, ip_address("203.0.113.7"), "US", 15169), (9, at, None, None, None)]
+    lines = service._ndjson_chunk(rows).splitlines()
+    assert json.loads(lines[0]) == {
+        "id": 7,
+        "visited_at": "2025-09-25T06:30:00+00:00",
+        "ip_address": "203.0.113.7",
+        "country": "US",
+        "asn": 15169,
+    }
+    assert json.loads(lines[1])["ip_address"] is None
+    assert service._csv_chunk(rows).splitlines()[1] == "9,2025-09-25T06:30:00+00:00,,,"
+
+    sql = str(service.query(1, after=9, since=at).compile(dialect=postgresql.dialect()))
+    assert "visit.id >" in sql and "visit.visited_at >=" in sql
+    assert sql.rstrip().endswith("ORDER BY visit.id")
+
+
+@pytest.mark.asyncio
+async def test_resolve_honours_expiry_from_cached_value_without_db(monkeypatch):
+    us = URLService(session=None)  # any database access would fail
+    monkeypatch.setattr(us, "cache", MemoryCache())
+    now = datetime.now(timezone.utc)
+    await us.cache_target("live01", "https://a.example/", now + timedelta(hours=1))
+    await us.cache_target("perm01", "https://b.example/")
+    await us.cache.set(
+        "short:gone01", encode_target("https://c.example/", now - timedelta(seconds=1))
+    )
+
+    original_url, expires = await us.resolve("live01")
+    assert original_url == "https://a.example/" and expires > now.timestamp()
+    assert await us.resolve("perm01") == ("https://b.example/", None)
+    assert await us.cache.get("short:perm01") == "https://b.example/"
+    assert await us.resolve("gone01") is None
+    assert decode_target(encode_target("https://d.example/@x y")) == (
+        "https://d.example/@x y",
+        None,
+    )
+
+
+class _RecordingSession:
+    def __init__(self, codes):
+        self.codes, self.statements, self.commits = codes, [], 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        codes = self.codes
+        return type("Result", (), {"scalars": lambda self: iter(codes)})()
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.asyncio
+async def test_remove_links_is_one_update_and_evicts_cached_targets(monkeypatch):
+    session = _RecordingSession(["a1", "b2"])
+    us = URLService(session=session)
+    monkeypatch.setattr(us, "cache", MemoryCache())
+    for code in ("a1", "b2", "c3"):
+        await us.cache_target(code, f"https://{code}.example/")
+
+    removed = await us.remove_links(
+        codes=["a1", "b2"],
+        original_url_prefix="https://50%_off.example/",
+        created_before=datetime(2026, 1, 1, tzinfo=timezone.utc),
+    )
+    assert removed == ["a1", "b2"] and session.commits == 1
+    assert await us.cache.get("short:a1") is None and await us.cache.get("short:b2") is None
+    assert await us.cache.get("short:c3") == "https://c3.example/"
+
+    (statement,) = session.statements
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE url SET deleted_at=timezone(")
+    assert "url.deleted_at IS NULL" in sql and "RETURNING url.short_code" in sql
+    assert "LIKE" in sql and "ESCAPE" in sql
+
+    await us.remove_links(codes=["a1"], deactivate_only=True)
+    sql = str(session.statements[-1].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE url SET is_active=") and "WHERE url.is_active AND" in sql
+    with pytest.raises(ValueError):
+        await us.remove_links()
+
+
+@pytest.mark.asyncio
+async def test_trending_sums_minute_buckets_over_the_window(monkeypatch):
+    monkeypatch.setattr(settings, "TRENDING_MINUTE_MAX_MEMBERS", 3)
+    trending = TrendingService()
+    monkeypatch.setattr(trending, "cache", MemoryCache())
+    now = 1_700_000_000.0
+    await trending.record({"old": 50}, now=now - 600)
+    await trending.record({"a1": 5, "b2": 3}, now=now - 60)
+    await trending.record({"b2": 4, "c3": 1, "d4": 2, "e5": 1}, now=now)
+
+    leaders = await trending.top(window=2, limit=10, now=now)
+    assert leaders[:3] == [TrendingLink("b2", 7), TrendingLink("a1", 5), TrendingLink("d4", 2)]
+    assert len(leaders) == 4  # the current minute was trimmed to its 3 busiest links
+    assert await trending.top(window=1, limit=1, now=now) == [TrendingLink("b2", 4)]
+    assert (await trending.top(window=15, limit=1, now=now))[0] == TrendingLink("old", 50)
+
+
+@pytest.mark.asyncio
+async def test_stats_are_cached_and_last_modified_only_moves_with_the_counters(monkeypatch):
+    url = URL(id=7, original_url="https://a.example/", short_code="st01", visit_count=3)
+    url.created_at = datetime(2026, 1, 1)
+    lookups = []
+
+    async def get_by_code(self, short_code):
+        lookups.append(short_code)
+        return url
+
+    async def count(self, _url):
+        return 2
+
+    monkeypatch.setattr(URLService, "get_by_code", get_by_code)
+    monkeypatch.setattr(UniqueVisitorService, "count", count)
+    monkeypatch.setattr(settings, "STATS_CACHE_TTL", 0.05)
+    stats = StatsService(session=None)
+    monkeypatch.setattr(stats, "cache", MemoryCache())
+
+    first = await stats.get("st01")
+    assert first.etag == '"7-3-2"' and first.stats["visits"] == 3
+    assert await stats.get("st01") == first and lookups == ["st01"]
+
+    time.sleep(0.06)
+    rebuilt = await stats.get("st01")
+    assert len(lookups) == 2 and rebuilt.modified == first.modified
+
+    time.sleep(0.06)
+    url.visit_count = 4
+    changed = await stats.get("st01")
+    assert changed.etag == '"7-4-2"' and changed.modified > first.modified
+
+
+def test_conditional_get_prefers_if_none_match():
+    assert not_modified('"7-3-2"', 100.0, 'W/"1-1-1", "7-3-2"', None)
+    assert not_modified('"7-3-2"', 100.0, "*", None)
+    assert not not_modified('"7-3-2"', 100.0, '"7-4-2"', "Thu, 01 Jan 2099 00:00:00 GMT")
+    assert not_modified('"7-3-2"', 100.0, None, "Thu, 01 Jan 1970 00:01:40 GMT")
+    assert not not_modified('"7-3-2"', 100.0, None, "Thu, 01 Jan 1970 00:01:39 GMT")
+    assert not not_modified('"7-3-2"', 100.0, None, "yesterday")
+
+
+@pytest.mark.asyncio
+async def test_process_local_cache_is_only_used_when_enabled(monkeypatch):
+    us = URLService(session=None)
+    monkeypatch.setattr(us, "cache", MemoryCache())
+    await us.cache_target("loc01", "https://a.example/")
+
+    assert await us.resolve("loc01") == ("https://a.example/", None)
+    assert local_cache.get("short:loc01") is None
+
+    monkeypatch.setattr(settings, "LOCAL_CACHE_ENABLED", True)
+    await us.resolve("loc01")
+    assert local_cache.get("short:loc01") == "https://a.example/"
+    local_cache.delete("short:loc01")
+
+
+@pytest.mark.asyncio
+async def test_visit_export_requires_the_admin_token(monkeypatch):
+    from app.api.v1.endpoints import export_visits
+
+    api = FastAPI()
+    api.include_router(export_visits.router)
+    path = "/stats/abc123/visits/export"
+    async with AsyncClient(transport=ASGITransport(app=api), base_url="http://test") as client:
+        assert (await client.get(path)).status_code == 403  # no token configured
+        monkeypatch.setattr(settings, "ADMIN_API_TOKEN", "s3cret")
+        assert (await client.get(path)).status_code == 401
+        wrong = {"Authorization": "Bearer nope"}
+        assert (await client.get(path, headers=wrong)).status_code == 401
@@ -0,0 +1,74 @@
+import json
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from app.core.tracing import TraceExporter, end_trace, span, start_trace
+from app.middleware import ServerTimingMiddleware
+
+
+async def traced_endpoint(request):
+    with span("redis_get"):
+        pass
+    with span("db_query"):
+        pass
+    with span("db_query"):
+        pass
+    return PlainTextResponse("ok")
+
+
+def make_app(**kwargs):
+    app = Starlette(routes=[Route("/", traced_endpoint)])
+    app.add_middleware(ServerTimingMiddleware, **kwargs)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header_and_sampled_trace(tmp_path):
+    trace_file = tmp_path / "traces.jsonl"
+    exporter = TraceExporter(str(trace_file))
+    app = make_app(emit_header=True, sample_rate=1.0, exporter=exporter)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as c:
+        resp = await c.get("/")
+    exporter.close()
+
+    timing = resp.headers["server-timing"]
+    assert "redis_get;dur=" in timing
+    assert "db_query;dur=" in timing
+    assert "total;dur=" in timing
+
+    record = json.loads(trace_file.read_text().splitlines()[0])
+    assert record["status"] == 200
+    assert record["spans"]["db_query"]["count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_untraced_requests_pass_through():
+    app = make_app(emit_header=False, sample_rate=0.0)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as c:
+        resp = await c.get("/")
+    assert "server-timing" not in resp.headers
+    with span("outside_request"):
+        pass  # no active trace, must be a no-op
+
+
+def test_db_checkout_span_times_pool_checkouts():
+    from app.core.db import TracedPool
+
+    class Connection:
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    trace, token = start_trace("GET", "/stats/x")
+    try:
+        TracedPool(creator=Connection).connect().close()
+    finally:
+        end_trace(token)
+    assert trace.spans["db_checkout"][1] == 1